@@ -0,0 +1,72 @@
+"""
+Benchmark of Dataset loading from csv, Parquet, and Feather files on a synthetic WebMD-style
+table, loading every column and only the text and label columns
+(Parquet and Feather need pyarrow; without it only csv is timed)
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import pandas as pd
+from medinify.datasets import read_table, write_table
+
+WORDS = ['headache', 'nausea', 'helped', 'pain', 'dose', 'sleep', 'side', 'effects', 'after', 'weeks',
+         'worked', 'doctor', 'tired', 'better', 'worse', 'stomach', 'the', 'and', 'my', 'it']
+
+
+def synthetic_table(num_rows):
+    """
+    Builds a table of reviews with WebMD-style columns
+    :param num_rows: (int) number of reviews
+    :return: (pandas DataFrame) review table
+    """
+    random.seed(0)
+    return pd.DataFrame({
+        'comment': [' '.join(random.choices(WORDS, k=random.randint(10, 120))) for _ in range(num_rows)],
+        'effectiveness': [float(random.randint(1, 5)) for _ in range(num_rows)],
+        'ease of use': [float(random.randint(1, 5)) for _ in range(num_rows)],
+        'satisfaction': [float(random.randint(1, 5)) for _ in range(num_rows)],
+        'date': ['%d/%d/2019' % (random.randint(1, 12), random.randint(1, 28)) for _ in range(num_rows)],
+        'drug': ['Drug%d' % random.randint(0, 500) for _ in range(num_rows)]})
+
+
+def time_load(path, columns=None, repeat=3):
+    """
+    :return: (float) best load time (in seconds) of repeat loads
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_table(path, columns=columns)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks Dataset loading from csv, Parquet, and Feather files')
+    parser.add_argument('--rows', type=int, default=500000, help='number of rows in the synthetic table')
+    args = parser.parse_args()
+
+    table = synthetic_table(args.rows)
+    extensions = ['.csv']
+    try:
+        import pyarrow  # noqa: F401
+        extensions += ['.parquet', '.feather']
+    except ImportError:
+        print('pyarrow is not installed, only timing csv')
+
+    with tempfile.TemporaryDirectory() as directory:
+        print('Rows: %d' % args.rows)
+        print('%-10s %10s %12s %12s' % ('Format', 'Size (MB)', 'All (s)', '2 cols (s)'))
+        for extension in extensions:
+            path = os.path.join(directory, 'reviews' + extension)
+            write_table(table, path)
+            print('%-10s %10.1f %12.2f %12.2f' % (
+                extension[1:], os.path.getsize(path) / 2 ** 20, time_load(path),
+                time_load(path, columns=['comment', 'effectiveness'])))
+
+
+if __name__ == '__main__':
+    main()
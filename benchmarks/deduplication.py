@@ -0,0 +1,69 @@
+"""
+Benchmark of Deduplicator (normalized-text hashes and MinHash/LSH near-duplicate detection)
+on a synthetic table of reviews with injected duplicates (case and spacing variants of the same
+text, and spam posted with small edits), compared with drop_duplicates on the raw text
+"""
+
+import argparse
+import random
+import time
+import pandas as pd
+from medinify.datasets import Deduplicator
+
+WORDS = ['headache', 'nausea', 'helped', 'pain', 'dose', 'sleep', 'side', 'effects', 'after', 'weeks',
+         'worked', 'doctor', 'tired', 'better', 'worse', 'stomach', 'anxiety', 'depression', 'mg', 'days',
+         'first', 'started', 'taking', 'felt', 'no', 'longer', 'great', 'terrible', 'weight', 'gain']
+
+
+def synthetic_reviews(num_rows, duplicate_rate):
+    """
+    Builds reviews where about duplicate_rate of them are copies of an earlier review, either
+    with different case and spacing or with one word changed
+    :param num_rows: (int) number of reviews
+    :param duplicate_rate: (float) fraction of reviews that are duplicates
+    :return: (list[str]) reviews
+    """
+    random.seed(0)
+    reviews = []
+    for _ in range(num_rows):
+        if reviews and random.random() < duplicate_rate:
+            words = random.choice(reviews).split()
+            if random.random() < 0.5:
+                reviews.append('  '.join(words).upper())
+            else:
+                words[random.randrange(len(words))] = random.choice(WORDS)
+                reviews.append(' '.join(words))
+        else:
+            reviews.append(' '.join(random.choices(WORDS, k=random.randint(15, 80))))
+    return reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks near-duplicate detection with Deduplicator')
+    parser.add_argument('--rows', type=int, default=1000000, help='number of reviews')
+    parser.add_argument('--duplicates', type=float, default=0.05, help='fraction of reviews that are duplicates')
+    parser.add_argument('--batch-size', type=int, default=100000, help='reviews deduplicated per batch')
+    args = parser.parse_args()
+
+    table = pd.DataFrame({'comment': synthetic_reviews(args.rows, args.duplicates)})
+
+    start = time.perf_counter()
+    exact = table.drop_duplicates(subset='comment')
+    exact_time = time.perf_counter() - start
+
+    deduplicator = Deduplicator()
+    kept = 0
+    start = time.perf_counter()
+    for batch_start in range(0, len(table), args.batch_size):
+        kept += len(deduplicator.deduplicate(table.iloc[batch_start:batch_start + args.batch_size], 'comment'))
+    near_time = time.perf_counter() - start
+
+    print('Reviews:            %d' % args.rows)
+    print('drop_duplicates:    %.2f s\t(%d removed)' % (exact_time, len(table) - len(exact)))
+    print('Deduplicator:       %.2f s\t(%d removed, %.0f reviews/s)' % (
+        near_time, len(table) - kept, args.rows / near_time))
+    deduplicator.print_report(num_clusters=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark of EmbeddingsVectorizer's average embeddings (sparse token counts times the embedding
+matrix, in float32), in reviews per second, on a synthetic vocabulary and corpus, compared with
+the previous implementation (a python loop appending each token's vector and calling np.average
+per review)
+(the vectorizer is set up without loading embeddings or a spacy model, and texts are already
+tokenized, so only computing the averages is timed)
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+from medinify.vectorizers import EmbeddingsVectorizer
+
+
+class SyntheticEmbeddings:
+    """
+    Random word embeddings with the parts of gensim's KeyedVectors the vectorizer uses
+    """
+    def __init__(self, vocab_size, vector_size):
+        self.index2word = ['word%d' % i for i in range(vocab_size)]
+        self.vectors = np.random.RandomState(0).rand(vocab_size, vector_size).astype(np.float32)
+        self.vector_size = vector_size
+        self.vocab = {word: i for i, word in enumerate(self.index2word)}
+
+    def __getitem__(self, word):
+        return self.vectors[self.vocab[word]]
+
+
+def loop_average_embeddings(w2v, texts_tokens):
+    """
+    The previous get_features implementation (after tokenizing)
+    """
+    embeddings = np.zeros((len(texts_tokens), w2v.vector_size))
+    for i, tokens in enumerate(texts_tokens):
+        all_embeddings = []
+        for token in tokens:
+            try:
+                all_embeddings.append(w2v[token])
+            except KeyError:
+                continue
+        if len(all_embeddings) == 0:
+            continue
+        else:
+            embeddings[i] = np.average(all_embeddings, axis=0)
+    return embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks EmbeddingsVectorizer average embeddings')
+    parser.add_argument('--vocab', type=int, default=100000, help='number of words in the embeddings vocabulary')
+    parser.add_argument('--dimensions', type=int, default=300, help='embedding size')
+    parser.add_argument('--texts', type=int, default=100000, help='number of reviews')
+    args = parser.parse_args()
+
+    random.seed(0)
+    # tokens mostly follow the vocabulary's frequency order; some aren't in it
+    texts_tokens = [['word%d' % min(int(random.paretovariate(0.5)), args.vocab + 1000)
+                     for _ in range(random.randint(10, 100))] for _ in range(args.texts)]
+
+    vectorizer = EmbeddingsVectorizer.__new__(EmbeddingsVectorizer)
+    vectorizer.w2v = SyntheticEmbeddings(args.vocab, args.dimensions)
+    vectorizer.word_to_index = {word: i for i, word in enumerate(vectorizer.w2v.index2word)}
+    vectorizer.sif_a = 1e-3
+
+    start = time.perf_counter()
+    loop = loop_average_embeddings(vectorizer.w2v, texts_tokens)
+    loop_time = time.perf_counter() - start
+
+    print('Vocabulary: %d words (%d dimensions), reviews: %d' % (args.vocab, args.dimensions, args.texts))
+    print('Python loop:             %.2f s\t(%.0f reviews/s)' % (loop_time, args.texts / loop_time))
+    for weighting in [None, 'tfidf', 'sif']:
+        vectorizer.weighting = weighting
+        vectorizer.word_weights = None
+        start = time.perf_counter()
+        counts = vectorizer.token_counts(texts_tokens)
+        if weighting:
+            vectorizer.fit_weights(counts)
+        embeddings = vectorizer.average_embeddings(counts)
+        batched_time = time.perf_counter() - start
+        if weighting is None:
+            assert np.allclose(loop, embeddings, atol=1e-4)
+        print('Sparse matrix (%s):%s%.2f s\t(%.0f reviews/s)' % (
+            weighting or 'mean', ' ' * (8 - len(weighting or 'mean')), batched_time, args.texts / batched_time))
+
+
+if __name__ == '__main__':
+    main()
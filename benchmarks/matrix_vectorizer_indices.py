@@ -0,0 +1,70 @@
+"""
+Benchmark of MatrixVectorizer's token to embedding index conversion on a synthetic vocabulary
+and corpus, compared with the previous implementation (index_to_word.index(token), a linear
+scan of the vocabulary for every token)
+(the vectorizer is set up without loading embeddings or a spacy model, so only the
+conversion is timed)
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+from medinify.vectorizers import MatrixVectorizer
+
+
+def linear_scan_indices(index_to_word, tokens):
+    """
+    The previous tokens_to_indices implementation
+    """
+    indices = np.zeros(len(tokens), dtype=int)
+    for i, token in enumerate(tokens):
+        try:
+            indices[i] = index_to_word.index(token) + 1
+        except ValueError:
+            continue
+    return indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks MatrixVectorizer token to index conversion')
+    parser.add_argument('--vocab', type=int, default=300000, help='number of words in the embeddings vocabulary')
+    parser.add_argument('--texts', type=int, default=100000, help='number of texts to convert')
+    parser.add_argument('--scan-texts', type=int, default=100,
+                        help='number of texts to convert with the linear scan (it is extrapolated to --texts)')
+    args = parser.parse_args()
+
+    random.seed(0)
+    index_to_word = ['word%d' % i for i in range(args.vocab)]
+    # tokens mostly follow the vocabulary's frequency order; some aren't in it
+    texts_tokens = [['word%d' % min(int(random.paretovariate(0.5)), args.vocab + 1000)
+                     for _ in range(random.randint(10, 100))] for _ in range(args.texts)]
+
+    vectorizer = MatrixVectorizer.__new__(MatrixVectorizer)
+    vectorizer.index_to_word = index_to_word
+    start = time.perf_counter()
+    vectorizer.word_to_index = {word: i for i, word in enumerate(index_to_word)}
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = vectorizer.texts_to_indices(texts_tokens)
+    batched_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for tokens in texts_tokens:
+        vectorizer.tokens_to_indices(tokens)
+    per_text_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scanned = [linear_scan_indices(index_to_word, tokens) for tokens in texts_tokens[:args.scan_texts]]
+    scan_time = (time.perf_counter() - start) * args.texts / args.scan_texts
+
+    assert all((a == b).all() for a, b in zip(scanned, batched))
+    print('Vocabulary: %d words, texts: %d' % (args.vocab, args.texts))
+    print('Linear scan (extrapolated):  %.2f s' % scan_time)
+    print('Dict, text by text:          %.2f s' % per_text_time)
+    print('Dict, batched:               %.2f s (+ %.2f s to build the index)' % (batched_time, build_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of Medinify's review page parsers: how many pages per second each
+scraper parses with the lxml parser and with the BeautifulSoup parser
+(uses the saved review pages in tests/test_data/html, so no network is needed)
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from medinify.scrapers import WebMDScraper, DrugRatingzScraper, DrugsScraper, EverydayHealthScraper
+from medinify.scrapers.utils import lxml_available
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'test_data', 'html')
+SCRAPER_PAGES = [
+    (WebMDScraper, ['webmd_page0.html', 'webmd_page1.html', 'webmd_page2.html']),
+    (DrugsScraper, ['drugs_page1.html', 'drugs_page2.html']),
+    (EverydayHealthScraper, ['everydayhealth_page1.html', 'everydayhealth_page2.html']),
+    (DrugRatingzScraper, ['drugratingz_page.html']),
+]
+
+
+def pages_per_second(scraper, pages, repeats):
+    """
+    Times parsing pages with a scraper
+    :param scraper: (Scraper) scraper to parse pages with
+    :param pages: (list[str]) html of review pages
+    :param repeats: (int) how many times to parse every page
+    :return: (float) pages parsed per second
+    """
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for page in pages:
+                scraper.parse_page(scraper.parse_html(page), 'url')
+        elapsed = time.perf_counter() - start
+    return repeats * len(pages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks lxml and BeautifulSoup review page parsing')
+    parser.add_argument('--repeats', type=int, default=200, help='how many times to parse every page')
+    args = parser.parse_args()
+
+    parsers = ['lxml', 'beautifulsoup'] if lxml_available() else ['beautifulsoup']
+    print('%-22s' % 'Scraper' + ''.join(['%15s' % name for name in parsers]))
+    for scraper_class, file_names in SCRAPER_PAGES:
+        pages = []
+        for file_name in file_names:
+            with open(os.path.join(PAGES_DIR, file_name), 'r') as f:
+                pages.append(f.read())
+        rates = [pages_per_second(scraper_class(parser=name), pages, args.repeats) for name in parsers]
+        print('%-22s' % scraper_class.__name__ + ''.join(['%11.1f p/s' % rate for rate in rates]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark of SentimentDataset.transform_old_dataset (splitting the rating dictionary
+column into one column per rating type) on a synthetic WebMD-style table, compared
+with the previous row-by-row implementation (ast.literal_eval on every row, once per rating type)
+"""
+
+import argparse
+import ast
+import random
+import time
+import pandas as pd
+from medinify.datasets import SentimentDataset
+
+
+def synthetic_table(num_rows):
+    """
+    Builds a table of reviews with WebMD-style rating dictionaries (stored as strings, as read from csv)
+    :param num_rows: (int) number of reviews
+    :return: (pandas DataFrame) review table
+    """
+    random.seed(0)
+    ratings = [str({'effectiveness': float(random.randint(1, 5)), 'ease of use': float(random.randint(1, 5)),
+                    'satisfaction': float(random.randint(1, 5))}) for _ in range(num_rows)]
+    return pd.DataFrame({'comment': ['Review number %d' % i for i in range(num_rows)], 'rating': ratings,
+                         'date': ['1/1/2019'] * num_rows, 'drug': ['Drug'] * num_rows})
+
+
+def row_by_row_transform(data_table):
+    """
+    The previous transform_old_dataset implementation
+    :param data_table: (pandas DataFrame) review table
+    """
+    new_columns = list(ast.literal_eval(data_table.iloc[0]['rating']).keys())
+    for column in new_columns:
+        data_table[column] = data_table.apply(lambda row: ast.literal_eval(row['rating'])[column], axis=1)
+    data_table.drop(['rating'], axis=1, inplace=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks SentimentDataset.transform_old_dataset')
+    parser.add_argument('--rows', type=int, default=1000000, help='number of rows in the synthetic table')
+    args = parser.parse_args()
+
+    table = synthetic_table(args.rows)
+
+    dataset = SentimentDataset()
+    dataset.data_table = table.copy()
+    start = time.perf_counter()
+    dataset.transform_old_dataset()
+    columnar_time = time.perf_counter() - start
+
+    row_by_row_table = table.copy()
+    start = time.perf_counter()
+    row_by_row_transform(row_by_row_table)
+    row_by_row_time = time.perf_counter() - start
+
+    assert dataset.data_table.equals(row_by_row_table)
+    print('Rows:          %d' % args.rows)
+    print('Row by row:    %.2f s' % row_by_row_time)
+    print('Columnar:      %.2f s' % columnar_time)
+    print('Speedup:       %.1fx' % (row_by_row_time / columnar_time))
+
+
+if __name__ == '__main__':
+    main()
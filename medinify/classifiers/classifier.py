@@ -1,13 +1,15 @@
 
 import numpy as np
+import pandas as pd
 from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import precision_score, recall_score, accuracy_score, f1_score, confusion_matrix
-from medinify.datasets import Dataset
+from medinify.datasets import StreamingDataset
+from medinify.vectorizers import TokenCache
 from medinify.classifiers.utils import find_model
 from medinify.classifiers.utils import print_validation_metrics
 from medinify.classifiers.utils import print_evaluation_metrics
 from medinify.classifiers import Model
-import os
+from medinify import paths
 
 
 class Classifier:
@@ -15,30 +17,44 @@ class Classifier:
     Classifier is used to train, evaluate, and validate classification models
     and use trained models for classification
     """
-    def __init__(self, learner='nb', representation=None):
+    def __init__(self, learner='nb', representation=None, token_cache=None):
         """
         Constructs Classifier
         :param learner: (str) classifier type ('nb' - Naive Bayes, 'rf' - Random Forest,
             'svm' - Support Vector Machine, 'cnn' - Convolutional Neural Network)
         :param representation: How text data will be vectorized ('bow' -
             bag of words, 'embedding' - average embedding, 'matrix' - embedding matrix)
+        :param token_cache: (TokenCache) cache of tokenized texts, shared by every model the
+            Classifier fits (e.g. each cross validation fold); pass one with a directory to
+            also share tokens between runs (by default, texts are only cached in memory)
         """
         assert learner in ['nb', 'rf', 'svm', 'cnn'], \
             'Classifier Type must be \'nb\', \'rf\', \'cnn\', or \'svm\''
         self.learner_type = learner
         self.representation = representation
+        self.token_cache = token_cache if token_cache is not None else TokenCache()
 
     def fit(self, dataset, output_file=None):
         """
         Fits a model for features and labels
-        :param dataset: (Dataset) dataset containing text and labels to fit model to
+        (a StreamingDataset is fit chunk by chunk, which only Naive Bayes models support)
+        :param dataset: (Dataset or StreamingDataset) dataset containing text and labels to fit model to
         :param output_file: (str) where to save trained model
         """
-        model = Model(self.learner_type, self.representation)
+        model = Model(self.learner_type, self.representation, self.token_cache)
         print('Fitting model...')
-        features = model.vectorizer.get_features(dataset)
-        labels = model.vectorizer.get_labels(dataset)
-        model.learner.fit(features, labels)
+        if isinstance(dataset, StreamingDataset):
+            assert hasattr(model.learner, 'partial_fit'), 'Only \'nb\' models can be fit chunk by chunk'
+            model.vectorizer.fit_stream(dataset)
+            classes = dataset.unique_labels()
+            for chunk in dataset:
+                features = model.vectorizer.vectorize(chunk)
+                labels = model.vectorizer.get_labels(chunk)
+                model.learner.partial_fit(features, labels, classes=classes)
+        else:
+            features = model.vectorizer.vectorize(dataset)
+            labels = model.vectorizer.get_labels(dataset)
+            model.learner.fit(features, labels)
         print('Model fit.')
         if output_file:
             self.save(model, output_file)
@@ -47,7 +63,7 @@ class Classifier:
     def evaluate(self, evaluation_dataset, trained_model=None, trained_model_file=None, verbose=True):
         """
         Evaluates the effectiveness of trained model for classifying a Dataset
-        :param evaluation_dataset: (Dataset) data being evaluated over
+        :param evaluation_dataset: (Dataset or StreamingDataset) data being evaluated over
         :param trained_model: (Model) trained Model
         :param trained_model_file: (str) path to saved model file
         :param verbose: (boolean) whether or not to print results
@@ -56,14 +72,23 @@ class Classifier:
         assert (trained_model or trained_model_file), 'A trained model object or file but be specified'
         if trained_model_file:
             trained_model = self.load(trained_model_file)
-        features = trained_model.vectorizer.get_features(evaluation_dataset)
-        labels = trained_model.vectorizer.get_labels(evaluation_dataset)
+        if isinstance(evaluation_dataset, StreamingDataset):
+            chunks = evaluation_dataset
+        else:
+            chunks = [evaluation_dataset]
+        labels = []
+        predictions = []
+        for chunk in chunks:
+            features = trained_model.vectorizer.vectorize(chunk)
+            labels.append(trained_model.vectorizer.get_labels(chunk))
+            if not self.learner_type == 'cnn':
+                predictions.append(np.asarray(trained_model.learner.predict(features)))
+            else:
+                predictions.append(np.asarray(trained_model.learner.predict(features, trained_model)))
+        labels = pd.concat(labels)
+        predictions = np.concatenate(predictions)
         unique_labels = list(set(labels))
 
-        if not self.learner_type == 'cnn':
-            predictions = trained_model.learner.predict(features)
-        else:
-            predictions = trained_model.learner.predict(features, trained_model)
         accuracy = accuracy_score(labels, predictions)
         precisions = precision_score(labels, predictions, average=None, labels=unique_labels)
         precision_dict = dict(zip(unique_labels, precisions))
@@ -82,6 +107,9 @@ class Classifier:
     def validate(self, dataset, k_folds=10):
         """
         Runs K-Fold cross validation on a particular dataset
+        Folds are views of the dataset (see Dataset.view), so its data isn't copied for each fold,
+        and features that don't depend on the training data (e.g. average embeddings) are only
+        computed once, then shared by all folds
         :param dataset: (Dataset) data to run K-Fold cross validation on
         :param k_folds: (int) number of k-folds
         """
@@ -92,28 +120,30 @@ class Classifier:
         f_scores = []
         total_matrix = None
 
-        train_dataset = Dataset(text_column=dataset.text_column, label_column=dataset.label_column)
-        test_dataset = Dataset(text_column=dataset.text_column, label_column=dataset.label_column)
+        vectorizer = Model(self.learner_type, self.representation, self.token_cache).vectorizer
+        if vectorizer.precomputable:
+            print('Computing features...')
+            dataset.features[vectorizer.nickname] = vectorizer.get_features(dataset)
 
+        labels = dataset.labels()
         num_fold = 1
-        for train_indices, test_indices in skf.split(dataset.data_table[dataset.text_column], dataset.data_table[dataset.label_column]):
-            print('\nFold %s:' % num_fold)
-            train_data = dataset.data_table.iloc[train_indices]
-            train_dataset.data_table = train_data
-            test_data = dataset.data_table.iloc[test_indices]
-            test_dataset.data_table = test_data
-            model = self.fit(train_dataset)
-            fold_accuracy, fold_precisions, fold_recalls, fold_f_scores, fold_matrix = self.evaluate(
-                test_dataset, trained_model=model, verbose=False)
-            accuracies.append(fold_accuracy)
-            precisions.append(fold_precisions)
-            recalls.append(fold_recalls)
-            f_scores.append(fold_f_scores)
-            if type(total_matrix) == np.ndarray:
-                total_matrix += fold_matrix
-            else:
-                total_matrix = fold_matrix
-            num_fold += 1
+        try:
+            for train_indices, test_indices in skf.split(np.zeros(len(labels)), labels):
+                print('\nFold %s:' % num_fold)
+                model = self.fit(dataset.view(train_indices))
+                fold_accuracy, fold_precisions, fold_recalls, fold_f_scores, fold_matrix = self.evaluate(
+                    dataset.view(test_indices), trained_model=model, verbose=False)
+                accuracies.append(fold_accuracy)
+                precisions.append(fold_precisions)
+                recalls.append(fold_recalls)
+                f_scores.append(fold_f_scores)
+                if type(total_matrix) == np.ndarray:
+                    total_matrix += fold_matrix
+                else:
+                    total_matrix = fold_matrix
+                num_fold += 1
+        finally:
+            dataset.features.pop(vectorizer.nickname, None)
 
         unique_labels = list(precisions[0].keys())
         print_validation_metrics(accuracies, precisions, recalls, f_scores, total_matrix, unique_labels)
@@ -129,9 +159,9 @@ class Classifier:
         assert (trained_model or trained_model_file), 'A trained model or file but be specified'
         if trained_model_file:
             trained_model = self.load(trained_model_file)
-        features = trained_model.vectorizer.get_features(dataset)
+        features = trained_model.vectorizer.vectorize(dataset)
         labels = trained_model.vectorizer.get_labels(dataset).to_numpy()
-        comments = dataset.data_table[dataset.text_column]
+        comments = dataset.texts()
         predictions = trained_model.learner.predict(features, trained_model)
 
         with open(output_file, 'w') as f:
@@ -144,17 +174,10 @@ class Classifier:
         """
         Save trained model
         :param model: (Model) model to save
-        :param path: (str) path to save model
+        :param path: (str) path to save model (file names are saved in the models/ directory,
+            see paths.output_path)
         """
-        written = False
-        for file in os.walk(os.getcwd()):
-            if os.path.isdir(file[0]) and file[0][-15:] == 'medinify/models':
-                directory_path = file[0]
-                write_path = directory_path + '/' + path
-                model.save_model(write_path)
-                written = True
-        if not written:
-            raise NotADirectoryError('models/ directory not found.')
+        model.save_model(paths.output_path('models', path))
 
     def load(self, path):
         """
@@ -167,6 +190,7 @@ class Classifier:
         if not abspath:
             raise NotADirectoryError('models/ directory not found.')
         model.load_model(abspath)
+        model.vectorizer.token_cache = self.token_cache
         return model
 
 
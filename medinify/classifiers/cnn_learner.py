@@ -4,11 +4,10 @@ import torch
 import torch.nn as nn
 import torch.utils.data
 from torch import optim
-from medinify.vectorizers import find_embeddings
+from medinify.vectorizers import load_embeddings
 from medinify.vectorizers import get_lookup_table
 from medinify.classifiers import CNNClassifier
 from medinify.classifiers import DataIterator
-from gensim.models import KeyedVectors
 from tqdm import tqdm
 
 
@@ -33,9 +32,7 @@ class CNNLearner:
         :param labels: (np.array) numeric representation of labels
         :param n_epochs: number of epochs to train for
         """
-        embeddings_file = find_embeddings()
-        w2v = KeyedVectors.load_word2vec_format(embeddings_file)
-        lookup_table = get_lookup_table(w2v)
+        lookup_table = get_lookup_table(load_embeddings())
         network = CNNClassifier(lookup_table)
         optimizer = optim.Adam(network.parameters(), lr=0.001)
         criterion = nn.BCEWithLogitsLoss()
@@ -1,8 +1,7 @@
 
 import pickle
 from medinify.vectorizers.utils import get_lookup_table
-from medinify.vectorizers.utils import find_embeddings
-from gensim.models import KeyedVectors
+from medinify.vectorizers.utils import load_embeddings
 from medinify.classifiers import CNNLearner, CNNClassifier
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.ensemble import RandomForestClassifier
@@ -24,13 +23,14 @@ class Model:
     for fitting, evaluating, and classifying with the learner has to be vectorized in
     the same way
     """
-    def __init__(self, learner='nb', representation=None):
+    def __init__(self, learner='nb', representation=None, token_cache=None):
         """
         Constructor for Model
         :param learner: (str) classifier type ('nb' - Naive Bayes, 'rf' - Random Forest,
             'svm' - Support Vector Machine, 'cnn' - Convolutional Neural Network)
         :param representation: How text data will be vectorized ('bow' -
             bag of words, 'embedding' - average embedding, 'matrix' - embedding matrix)
+        :param token_cache: (TokenCache) cache of tokenized texts for the vectorizer
         """
         self.type = learner
         if learner == 'nb':
@@ -47,9 +47,9 @@ class Model:
 
         for vec in vectorizers.Vectorizer.__subclasses__():
             if representation and vec.nickname == representation:
-                self.vectorizer = vec()
+                self.vectorizer = vec(token_cache=token_cache)
             elif vec.nickname == self.learner.default_vectorizer:
-                self.vectorizer = vec()
+                self.vectorizer = vec(token_cache=token_cache)
         try:
             self.vectorizer
         except AttributeError:
@@ -76,9 +76,7 @@ class Model:
             self.vectorizer = pickle.load(f)
             if self.type == 'cnn':
                 state_dict = pickle.load(f)
-                embeddings_file = find_embeddings()
-                w2v = KeyedVectors.load_word2vec_format(embeddings_file)
-                lookup_table = get_lookup_table(w2v)
+                lookup_table = get_lookup_table(load_embeddings())
                 network = CNNClassifier(lookup_table)
                 network.load_state_dict(state_dict)
                 self.learner.network = network
@@ -1,6 +1,6 @@
 
 import numpy as np
-import os
+from medinify import paths
 
 
 def print_evaluation_metrics(accuracy, precision_dict, recalls_dict, f_scores_dict, matrix, unique_labels):
@@ -46,15 +46,8 @@ def print_validation_metrics(accuracies, precisions, recalls, f_scores, total_ma
 
 def find_model(path):
     """
-    Searches models/ directory for specified model file
-    :param path: name of saved model file
+    Searches models/ directory for specified model file (see paths.find_file)
+    :param path: name of saved model file (or path to it)
     :return: abspath - absolute path to file or None if not found
     """
-    for file in os.walk(os.getcwd()):
-        if os.path.isdir(file[0]) and file[0][-15:] == 'medinify/models':
-            directory_path = file[0]
-            absolute_path = directory_path + '/' + path
-            if path in os.listdir(directory_path) and os.path.isfile(absolute_path):
-                return absolute_path
-            else:
-                return None
+    return paths.find_file('models', path)
@@ -1,3 +1,9 @@
 from .dataset import Dataset
+from .dataset_view import DatasetView
 from .sentiment_dataset import SentimentDataset
-from .utils import find_csv
+from .streaming_dataset import StreamingDataset
+from .deduplicator import Deduplicator
+from .dataset_stats import DatasetStats
+from .checkpoint_journal import CheckpointJournal
+from .review_store import ReviewStore
+from .utils import find_csv, read_table, write_table, iter_table_chunks
@@ -0,0 +1,109 @@
+"""
+Append-only checkpoint of reviews scraped while collecting a dataset from a list of urls,
+so that a stopped collection can be resumed without losing (or re-scraping) finished urls
+"""
+import json
+import os
+import tempfile
+import pandas as pd
+
+
+class CheckpointJournal:
+    """
+    The CheckpointJournal class appends each url's newly scraped reviews to a csv file
+    (so saving a checkpoint costs as much as the url's reviews, not the whole dataset)
+    A small progress file next to it records which urls are done and how long the
+    csv file was after the last finished url; anything written after that (e.g. by a
+    collection stopped halfway through writing) is cut off when the journal is reopened
+
+    Attributes:
+        path:           (str) Path of the csv file scraped reviews are appended to
+        progress_path:  (str) Path of the progress file
+        done:           (set[int]) Indices of the urls that are done
+        size:           (int) Size (in bytes) of the csv file after the last finished url
+        columns:        (list[str] or None) Columns of the csv file (None until reviews are written)
+    """
+    def __init__(self, path):
+        """
+        Constructor for CheckpointJournal
+        Reopens the journal at path if there is one
+        :param path: (str) path of the csv file to append scraped reviews to
+        """
+        self.path = path
+        self.progress_path = os.path.splitext(path)[0] + '_progress.json'
+        self.done = set()
+        self.size = 0
+        self.columns = None
+        if os.path.exists(self.progress_path) and os.path.exists(self.path):
+            with open(self.progress_path, 'r') as f:
+                progress = json.load(f)
+            self.done = set(progress['done'])
+            self.size = progress['size']
+            self.columns = progress['columns']
+            with open(self.path, 'r+b') as f:
+                f.truncate(self.size)
+
+    def append(self, reviews, index):
+        """
+        Appends one url's scraped reviews and records that the url is done
+        (the csv file's columns are those of the first reviews appended; later reviews may lack
+        some of them, but a ValueError is raised if they have a column the file doesn't)
+        :param reviews: (pandas DataFrame) reviews scraped from the url
+        :param index: (int) index of the url (in the list of urls being collected)
+        """
+        if len(reviews) > 0:
+            write_header = self.columns is None
+            if write_header:
+                self.columns = list(reviews.columns)
+            new_columns = [column for column in reviews.columns if column not in self.columns]
+            if new_columns:
+                raise ValueError('Reviews have columns that are not in checkpoint file %s: %s' % (
+                    self.path, ', '.join(new_columns)))
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', newline='') as f:
+                reviews.reindex(columns=self.columns).to_csv(f, header=write_header, index=False)
+            self.size = os.path.getsize(self.path)
+        self.done.add(index)
+        self._save_progress()
+
+    def read(self):
+        """
+        Reads all reviews in the journal
+        :return: (pandas DataFrame) scraped reviews
+        """
+        if self.columns is None:
+            return pd.DataFrame()
+        return pd.read_csv(self.path)
+
+    def clear(self):
+        """
+        Deletes the journal and its progress file
+        """
+        for path in [self.path, self.progress_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        self.done = set()
+        self.size = 0
+        self.columns = None
+
+    def next_url(self):
+        """
+        :return: (int) index of the first url that isn't done
+        """
+        index = 0
+        while index in self.done:
+            index += 1
+        return index
+
+    def _save_progress(self):
+        """
+        Writes the progress file (atomically, so it always describes a fully written journal)
+        """
+        directory = os.path.dirname(self.progress_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w') as f:
+            json.dump({'done': sorted(self.done), 'size': self.size, 'columns': self.columns}, f)
+        os.replace(temp_path, self.progress_path)
@@ -2,9 +2,11 @@
 Class for loading, storing, editing, and writing datasets
 Works with any csv with specified text and label columns
 """
-import pandas as pd
-import os
-from medinify.datasets.utils import find_csv
+from medinify import paths
+from medinify.datasets.deduplicator import Deduplicator
+from medinify.datasets.dataset_stats import DatasetStats
+from medinify.datasets.dataset_view import DatasetView
+from medinify.datasets.utils import find_csv, read_table, write_table, compact_table, memory_usage
 
 
 class Dataset:
@@ -17,51 +19,96 @@ class Dataset:
         text_column:    (str) Column name from data csv for text data
         label_column: (str) Column name from data csv for label data
         data_table:         (pandas DataFrame) Where all data is internally stored
+        uncompacted_memory: (int or None) Memory used by data_table before it was compacted (in bytes)
+        features:           (dict) Features precomputed for data_table, by the nickname of the
+            Vectorizer that computed them (shared with views of the Dataset, see view)
     """
-    def __init__(self, csv_file=None, text_column='text', label_column='label'):
+    def __init__(self, csv_file=None, text_column='text', label_column='label', columns=None, compact=False):
         """
         Constructor for Dataset
         Sets up what data will be processed as text and label, and loads data
         into DataFrame if csv path is provided
-        :param csv_file: (str) Path to csv file with stored data
+        :param csv_file: (str) Path to csv (or .parquet or .feather) file with stored data
         :param text_column: (str) name of the csv column containing the text data
         :param label_column: (str) name of the csv column containing the label data
+        :param columns: (list[str] or None) columns to load from the file (None for all columns)
+        :param compact: (boolean) whether to store loaded data with compact dtypes (see compact_data)
         """
         self.text_column = text_column
         self.label_column = label_column
+        self.uncompacted_memory = None
+        self.features = {}
         if csv_file:
-            self.load_file(csv_file)
+            self.load_file(csv_file, columns=columns, compact=compact)
         else:
             self.data_table = None
 
-    def load_file(self, csv_file):
+    def load_file(self, csv_file, columns=None, compact=False):
         """
         Loads a csv file's data into Dataset's internal storage (data_table, pandas DataFrame)
         Removes empty elements with empty text or empty label
-        :param csv_file: (str) path to csv file with data
+        Parquet (.parquet) and Feather (.feather) files are also loaded (see utils.read_table),
+        and only the given columns are read (e.g. just the text and label columns)
+        :param csv_file: (str) path to csv (or .parquet or .feather) file with data
+        :param columns: (list[str] or None) columns to load (None for all columns)
+        :param compact: (boolean) whether to store the data with compact dtypes (see compact_data)
         """
         abspath = find_csv(csv_file)
         if not abspath:
             raise FileNotFoundError('File not found in data/ directory.')
-        data_table = pd.read_csv(abspath)
+        data_table = read_table(abspath, columns=columns)
         self.data_table = data_table
         self._clean_data()
+        if compact:
+            self.compact_data()
+
+    def compact_data(self):
+        """
+        Converts data_table to memory-compact dtypes (see utils.compact_table): categoricals for
+        columns like drug and url, datetimes for dates, and small integers for ratings and labels
+        """
+        memory_before = memory_usage(self.data_table)
+        self.data_table = compact_table(self.data_table, self.text_column)
+        if self.uncompacted_memory is None:
+            self.uncompacted_memory = memory_before
+        print('Compacted data from %.1f MB to %.1f MB.' % (
+            memory_before / 2 ** 20, memory_usage(self.data_table) / 2 ** 20))
+
+    def texts(self):
+        """
+        :return: (pandas Series) texts
+        """
+        return self.data_table[self.text_column]
+
+    def labels(self):
+        """
+        :return: (pandas Series) labels
+        """
+        return self.data_table[self.label_column]
+
+    def view(self, indices):
+        """
+        Selects rows of the Dataset without copying them (e.g. a cross validation fold)
+        :param indices: (array-like[int]) positions of the rows to select
+        :return: (DatasetView) view of the rows
+        """
+        return DatasetView(self, indices)
+
+    def cached_features(self, nickname):
+        """
+        :param nickname: (str) nickname of the Vectorizer the features were computed by
+        :return: features precomputed for data_table (type varies), or None if there are none
+        """
+        return self.features.get(nickname)
 
     def write_file(self, output_file):
         """
         Writes file of the current internal data (data_table)
-        Searches for data/csvs directory, saves csv there
-        :param output_file: (str) name to save file to (should end with .csv)
-        """
-        written = False
-        for file in os.walk(os.getcwd()):
-            if os.path.isdir(file[0]) and file[0][-18:] == 'medinify/data/csvs':
-                directory_path = file[0]
-                write_path = directory_path + '/' + output_file
-                self.data_table.to_csv(write_path, index=False)
-                written = True
-        if not written:
-            raise NotADirectoryError('data/csvs directory not found.')
+        Saves csv in data/csvs directory (or at output_file, if it is a path; see paths.output_path)
+        (or a Parquet or Feather file, if output_file ends with .parquet or .feather)
+        :param output_file: (str) name to save file to (should end with .csv, .parquet, or .feather)
+        """
+        write_table(self.data_table, paths.output_path('csvs', output_file))
 
     def _remove_empty_elements(self):
         """
@@ -85,6 +132,19 @@ class Dataset:
         if num_removed > 0:
             print('Removed %d duplicate elements(s).' % num_removed)
 
+    def remove_near_duplicates(self, deduplicator=None):
+        """
+        Removes texts that duplicate an earlier text after normalizing case, spacing, and punctuation,
+        or that are near-duplicates of one (see Deduplicator), and prints the clusters removed
+        :param deduplicator: (Deduplicator) deduplicator to use (e.g. one that has already seen
+            other batches of data; a new one by default)
+        :return: (Deduplicator) deduplicator used
+        """
+        deduplicator = deduplicator or Deduplicator()
+        self.data_table = deduplicator.deduplicate(self.data_table, self.text_column)
+        deduplicator.print_report()
+        return deduplicator
+
     def _clean_data(self):
         """
         Removes empty and duplicate elements from Dataset
@@ -93,29 +153,17 @@ class Dataset:
         self._remove_duplicate_elements()
         self._remove_empty_elements()
 
+    def stats(self):
+        """
+        Computes stats about current Dataset (label distribution, text lengths, drugs, and memory used)
+        :return: (DatasetStats) stats
+        """
+        return DatasetStats.of(self)
+
     def print_stats(self):
         """
         Prints stats about current Dataset, including the number of texts
-        and the number of elements per unique label (and percentages)
+        and the number of elements per unique label (and percentages), and memory used
+        (see DatasetStats.print_stats)
         """
-        labels = self.data_table[self.label_column]
-        print('\n******************************************************************************************\n')
-        print('Dataset Stats:\n')
-        print('Total texts: %d' % len(labels))
-        unique_labels = set(labels)
-        print('Number of Unique Labels: %d\t(%s)\n' % (
-            len(unique_labels), ', '.join([str(x) for x in unique_labels])))
-
-        print('Label Stats:')
-        for label in unique_labels:
-            num_label = labels.loc[labels == label].shape[0]
-            percent = 100 * (num_label / len(labels))
-            print('\tLabel: %s\t\tNumber of Instance: %d\t\tPercent of Instances: %.2f%%' % (
-                str(label), num_label, percent))
-        print('\n******************************************************************************************\n')
-
-
-
-
-
-
+        self.stats().print_stats()
@@ -0,0 +1,142 @@
+"""
+Summary statistics of a dataset (label distribution, text lengths, drugs, and memory use),
+computed in one pass over each table or chunk
+"""
+import numpy as np
+from medinify.datasets.utils import memory_usage
+
+
+class DatasetStats:
+    """
+    The DatasetStats class accumulates statistics about a dataset's tables, so stats can be
+    computed for a whole Dataset or, chunk by chunk, for a StreamingDataset
+    Text lengths are kept as a histogram (one count per length), so length percentiles are
+    exact without keeping every length
+
+    Attributes:
+        num_texts:          (int) Number of texts
+        label_counts:       (dict) Number of texts with each label
+        drug_counts:        (dict[str, int]) Number of texts about each drug (if there is a drug column)
+        memory_usage:       (int) Memory used by the tables (in bytes)
+        uncompacted_memory: (int or None) Memory used before the data was compacted (in bytes)
+        length_counts:      (np.array) Number of texts of each length (in characters)
+    """
+    def __init__(self):
+        """
+        Constructor for DatasetStats (with no data)
+        """
+        self.num_texts = 0
+        self.label_counts = {}
+        self.drug_counts = {}
+        self.memory_usage = 0
+        self.uncompacted_memory = None
+        self.length_counts = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def of(cls, dataset):
+        """
+        Computes the stats of a Dataset or StreamingDataset (reading it chunk by chunk)
+        :param dataset: (Dataset or StreamingDataset) dataset
+        :return: (DatasetStats) stats of the dataset
+        """
+        stats = cls()
+        datasets = [dataset] if hasattr(dataset, 'data_table') else dataset
+        for chunk in datasets:
+            stats.add(chunk.data_table, chunk.text_column, chunk.label_column)
+            if getattr(chunk, 'uncompacted_memory', None) is not None:
+                stats.uncompacted_memory = (stats.uncompacted_memory or 0) + chunk.uncompacted_memory
+        return stats
+
+    def add(self, data_table, text_column, label_column):
+        """
+        Adds a table (or chunk) to the stats
+        :param data_table: (pandas DataFrame) table
+        :param text_column: (str) name of the text column
+        :param label_column: (str) name of the label column
+        """
+        self.num_texts += len(data_table)
+        for label, count in data_table[label_column].value_counts(dropna=False, sort=False).items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + int(count)
+        if 'drug' in data_table.columns:
+            for drug, count in data_table['drug'].value_counts(sort=False).items():
+                if count > 0:
+                    self.drug_counts[drug] = self.drug_counts.get(drug, 0) + int(count)
+        self.memory_usage += memory_usage(data_table)
+
+        lengths = data_table[text_column].dropna().astype(str).str.len().to_numpy(dtype=np.int64)
+        if len(lengths) > 0:
+            counts = np.bincount(lengths)
+            if len(counts) > len(self.length_counts):
+                counts[:len(self.length_counts)] += self.length_counts
+                self.length_counts = counts
+            else:
+                self.length_counts[:len(counts)] += counts
+
+    def label_percentages(self):
+        """
+        :return: (dict) percent of texts with each label
+        """
+        return {label: 100 * count / self.num_texts for label, count in self.label_counts.items()}
+
+    def length_percentiles(self, percentiles=(5, 25, 50, 75, 95)):
+        """
+        :param percentiles: (iterable[float]) percentiles to find (0-100)
+        :return: (dict[float, int]) text length (in characters) at each percentile
+        """
+        cumulative_counts = np.cumsum(self.length_counts)
+        if len(cumulative_counts) == 0 or cumulative_counts[-1] == 0:
+            return {}
+        ranks = np.ceil(np.array(percentiles, dtype=float) / 100 * cumulative_counts[-1]).clip(1)
+        lengths = np.searchsorted(cumulative_counts, ranks)
+        return dict(zip(percentiles, lengths.tolist()))
+
+    def to_dict(self):
+        """
+        :return: (dict) the stats, as plain python values
+        """
+        return {
+            'num_texts': self.num_texts,
+            'label_counts': dict(self.label_counts),
+            'label_percentages': self.label_percentages(),
+            'length_percentiles': self.length_percentiles(),
+            'drug_counts': dict(self.drug_counts),
+            'memory_usage': self.memory_usage,
+            'uncompacted_memory': self.uncompacted_memory,
+        }
+
+    def print_stats(self, num_drugs=10):
+        """
+        Prints the stats, including the number of texts and the number of elements per
+        unique label (and percentages), text lengths, the most reviewed drugs, and memory used
+        :param num_drugs: (int) number of drugs to print
+        """
+        try:
+            labels = sorted(self.label_counts)
+        except TypeError:
+            labels = sorted(self.label_counts, key=str)
+        print('\n******************************************************************************************\n')
+        print('Dataset Stats:\n')
+        print('Total texts: %d' % self.num_texts)
+        print('Number of Unique Labels: %d\t(%s)\n' % (len(labels), ', '.join([str(x) for x in labels])))
+
+        print('Label Stats:')
+        percentages = self.label_percentages()
+        for label in labels:
+            print('\tLabel: %s\t\tNumber of Instance: %d\t\tPercent of Instances: %.2f%%' % (
+                str(label), self.label_counts[label], percentages[label]))
+
+        length_percentiles = self.length_percentiles()
+        if length_percentiles:
+            print('\nText Length Percentiles (characters):')
+            print('\t%s' % '\t'.join(['%sth: %d' % (percentile, length)
+                                      for percentile, length in length_percentiles.items()]))
+
+        if self.drug_counts:
+            print('\nDrugs: %d' % len(self.drug_counts))
+            for drug, count in sorted(self.drug_counts.items(), key=lambda item: -item[1])[:num_drugs]:
+                print('\tDrug: %s\t\tNumber of Instances: %d' % (drug, count))
+
+        print('\nMemory Usage: %.1f MB' % (self.memory_usage / 2 ** 20))
+        if self.uncompacted_memory is not None:
+            print('Memory Usage Before Compacting: %.1f MB' % (self.uncompacted_memory / 2 ** 20))
+        print('\n******************************************************************************************\n')
@@ -0,0 +1,74 @@
+"""
+Lightweight view of some of a Dataset's rows (e.g. one cross validation fold)
+"""
+import numpy as np
+
+
+class DatasetView:
+    """
+    The DatasetView class selects rows of a parent Dataset by position, without copying its
+    data_table: texts and labels are only selected from the parent's columns when asked for,
+    and features precomputed for the parent (see Dataset.features) are shared with the view
+    A DatasetView can be passed to Vectorizers and Classifiers like a Dataset
+
+    Attributes:
+        parent:         (Dataset) Dataset the view selects rows of
+        indices:        (np.array[int]) Positions of the selected rows in the parent's data_table
+        text_column:    (str) Column name from data csv for text data
+        label_column:   (str) Column name from data csv for label data
+    """
+    def __init__(self, parent, indices):
+        """
+        Constructor for DatasetView
+        :param parent: (Dataset) Dataset to select rows of
+        :param indices: (array-like[int]) positions of the rows to select
+        """
+        self.parent = parent
+        self.indices = np.asarray(indices)
+        self.text_column = parent.text_column
+        self.label_column = parent.label_column
+        self._data_table = None
+
+    @property
+    def data_table(self):
+        """
+        The selected rows, as a DataFrame (only copied out of the parent the first time they are used,
+        by code that needs the whole table rather than texts(), labels(), or cached_features())
+        """
+        if self._data_table is None:
+            self._data_table = self.parent.data_table.iloc[self.indices]
+        return self._data_table
+
+    @data_table.setter
+    def data_table(self, data_table):
+        self._data_table = data_table
+
+    def __len__(self):
+        return len(self.indices)
+
+    def texts(self):
+        """
+        :return: (pandas Series) texts of the selected rows
+        """
+        if self._data_table is not None:
+            return self._data_table[self.text_column]
+        return self.parent.texts().iloc[self.indices]
+
+    def labels(self):
+        """
+        :return: (pandas Series) labels of the selected rows
+        """
+        if self._data_table is not None:
+            return self._data_table[self.label_column]
+        return self.parent.labels().iloc[self.indices]
+
+    def cached_features(self, nickname):
+        """
+        Gets the selected rows of features precomputed for the parent
+        :param nickname: (str) nickname of the Vectorizer the features were computed by
+        :return: features of the selected rows (type varies), or None if there are none
+        """
+        features = self.parent.cached_features(nickname)
+        if features is None or self._data_table is not None:
+            return None
+        return features[self.indices]
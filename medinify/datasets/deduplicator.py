@@ -0,0 +1,218 @@
+"""
+Finds exact and near-duplicate texts (e.g. the same spam review posted with different
+spacing, capitalization, or a few words changed), batch by batch
+"""
+import hashlib
+import re
+import zlib
+import numpy as np
+
+
+class Deduplicator:
+    """
+    The Deduplicator class removes texts that duplicate a text it has already seen
+    Texts are normalized (lower-cased, with punctuation and repeated whitespace removed) and
+    hashed to catch exact duplicates. Near-duplicates are found with MinHash signatures of
+    each text's word shingles, split into bands for locality sensitive hashing (LSH): texts
+    sharing a band are compared by their signatures, and a text is a near-duplicate if the
+    estimated Jaccard similarity of its shingles with an earlier text reaches threshold
+    Only hashes and signatures are kept, so batches (e.g. chunks of a file, or newly scraped
+    reviews) can be deduplicated one at a time against everything seen before
+
+    Attributes:
+        threshold:          (float) Lowest estimated Jaccard similarity of near-duplicates
+        shingle_size:       (int) Number of words per shingle
+        num_perm:           (int) Number of MinHash permutations (signature length)
+        bands:              (int) Number of LSH bands signatures are split into
+        num_texts:          (int) Number of texts seen
+        num_exact:          (int) Number of exact duplicates removed (after normalizing)
+        num_near:           (int) Number of near-duplicates removed
+        clusters:           (dict[bytes, list]) For each kept text that had duplicates removed
+            (by the hash of its normalized text), the number of duplicates removed and an example of one
+    """
+    def __init__(self, threshold=0.7, shingle_size=2, num_perm=32, bands=8, seed=0):
+        """
+        Constructor for Deduplicator
+        :param threshold: (float) lowest estimated Jaccard similarity of near-duplicates
+            (1.0 to only remove exact duplicates)
+        :param shingle_size: (int) number of words per shingle
+        :param num_perm: (int) number of MinHash permutations
+        :param bands: (int) number of LSH bands (must divide num_perm; more bands find
+            less similar candidates, but use more memory)
+        :param seed: (int) random seed for the MinHash permutations
+        """
+        assert num_perm % bands == 0, 'bands must divide num_perm'
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        random_state = np.random.RandomState(seed)
+        self._multipliers = random_state.randint(1, 2 ** 62, size=num_perm, dtype=np.uint64) * 2 + 1
+        self._increments = random_state.randint(0, 2 ** 62, size=num_perm, dtype=np.uint64)
+        self._band_multipliers = random_state.randint(1, 2 ** 62, size=num_perm // bands, dtype=np.uint64) * 2 + 1
+        self._shingle_multipliers = random_state.randint(1, 2 ** 62, size=shingle_size, dtype=np.uint64) * 2 + 1
+        self._word_hashes = _WordHashes()
+        self._exact_hashes = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._representatives = []
+        self.num_texts = 0
+        self.num_exact = 0
+        self.num_near = 0
+        self.clusters = {}
+
+    def duplicates(self, texts, batch_size=1000):
+        """
+        Finds the texts that duplicate an earlier text (in texts, or in an earlier call)
+        :param texts: (iterable[str]) texts to check (missing texts are never duplicates)
+        :param batch_size: (int) number of texts to compute MinHash signatures for at once
+        :return: (np.array[bool]) whether each text is a duplicate
+        """
+        texts = list(texts)
+        is_duplicate = np.zeros(len(texts), dtype=bool)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            normalized = [self.normalize(text) if isinstance(text, str) else None for text in batch]
+            new_texts = []
+            for i, text in enumerate(normalized):
+                if text is None:
+                    continue
+                self.num_texts += 1
+                exact_hash = hashlib.sha1(text.encode('utf-8')).digest()[:8]
+                if exact_hash in self._exact_hashes:
+                    is_duplicate[start + i] = True
+                    self.num_exact += 1
+                    self._add_to_cluster(self._exact_hashes[exact_hash], batch[i])
+                else:
+                    self._exact_hashes[exact_hash] = exact_hash
+                    new_texts.append((i, exact_hash, text))
+            if self.threshold < 1.0 and new_texts:
+                signatures = self._signatures_of([text for _, _, text in new_texts])
+                band_keys = self._band_keys(signatures)
+                for (i, exact_hash, _), signature, keys in zip(new_texts, signatures, band_keys):
+                    representative = self._find_near_duplicate(signature, keys)
+                    if representative is None:
+                        self._add_signature(signature, keys, exact_hash)
+                    else:
+                        is_duplicate[start + i] = True
+                        self.num_near += 1
+                        self._exact_hashes[exact_hash] = representative
+                        self._add_to_cluster(representative, batch[i])
+        return is_duplicate
+
+    def deduplicate(self, data_table, text_column):
+        """
+        Removes rows whose text duplicates an earlier text
+        :param data_table: (pandas DataFrame) rows to deduplicate
+        :param text_column: (str) name of the text column
+        :return: (pandas DataFrame) rows that aren't duplicates
+        """
+        return data_table.loc[~self.duplicates(data_table[text_column])]
+
+    def print_report(self, num_clusters=10):
+        """
+        Prints how many duplicates were removed, and the largest clusters of duplicates
+        :param num_clusters: (int) number of clusters to print
+        """
+        print('Removed %d exact and %d near-duplicate texts (of %d), in %d clusters.' % (
+            self.num_exact, self.num_near, self.num_texts, len(self.clusters)))
+        largest = sorted(self.clusters.values(), key=lambda cluster: -cluster[0])[:num_clusters]
+        for num_removed, example in largest:
+            print('\t%d removed:\t%s' % (num_removed, example[:80].replace('\n', ' ')))
+
+    @staticmethod
+    def normalize(text):
+        """
+        :param text: (str) text to normalize
+        :return: (str) lower-cased text, with punctuation and repeated whitespace removed
+        """
+        return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+    def _signatures_of(self, texts):
+        """
+        Computes MinHash signatures of normalized texts' word shingles
+        (each word is hashed once, and shingle hashes are combined from word hashes with numpy)
+        :param texts: (list[str]) normalized texts
+        :return: (np.array) one signature (row of num_perm uint32 values) per text
+        """
+        split_texts = [text.split(' ') for text in texts]
+        lengths = np.array([len(words) for words in split_texts])
+        words = [word for text_words in split_texts for word in text_words]
+        word_hashes = np.fromiter(map(self._word_hashes.__getitem__, words), dtype=np.uint64, count=len(words))
+
+        starts = np.cumsum(lengths) - lengths
+        ends = np.repeat(starts + lengths, lengths)
+        positions = np.arange(len(words))
+        padded = np.concatenate([word_hashes, np.zeros(self.shingle_size, dtype=np.uint64)])
+        shingle_hashes = np.zeros(len(words), dtype=np.uint64)
+        for j, multiplier in enumerate(self._shingle_multipliers):
+            in_text = positions + j < ends
+            shingle_hashes += np.where(in_text, padded[j:j + len(words)], 0) * multiplier
+
+        num_shingles = np.maximum(lengths - self.shingle_size + 1, 1)
+        is_shingle = positions - np.repeat(starts, lengths) < np.repeat(num_shingles, lengths)
+        shingle_hashes = shingle_hashes[is_shingle] >> np.uint64(32)
+        offsets = np.cumsum(num_shingles) - num_shingles
+        permuted = (np.outer(shingle_hashes, self._multipliers) + self._increments) >> np.uint64(32)
+        return np.minimum.reduceat(permuted, offsets, axis=0).astype(np.uint32)
+
+    def _band_keys(self, signatures):
+        """
+        :param signatures: (np.array) MinHash signatures
+        :return: (list[list[int]]) hash of each band of each signature
+        """
+        rows = signatures.reshape(len(signatures), self.bands, -1).astype(np.uint64)
+        return (rows * self._band_multipliers).sum(axis=2).tolist()
+
+    def _find_near_duplicate(self, signature, band_keys):
+        """
+        Finds the earlier text whose signature is most similar to signature, out of every text
+        sharing a band with it, if it is similar enough
+        :param signature: (np.array) MinHash signature
+        :param band_keys: (list[int]) hash of each band of the signature
+        :return: (bytes) hash of the earlier text, or None
+        """
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(key, ()))
+        if not candidates:
+            return None
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = np.mean(self._signatures[candidates] == signature, axis=1)
+        best = similarities.argmax()
+        if similarities[best] >= self.threshold:
+            return self._representatives[candidates[best]]
+        return None
+
+    def _add_signature(self, signature, band_keys, exact_hash):
+        """
+        Stores the signature of a text that isn't a duplicate, and adds it to the LSH buckets
+        :param signature: (np.array) MinHash signature
+        :param band_keys: (list[int]) hash of each band of the signature
+        :param exact_hash: (bytes) hash of the text
+        """
+        index = len(self._representatives)
+        if index == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[index] = signature
+        self._representatives.append(exact_hash)
+        for bucket, key in zip(self._buckets, band_keys):
+            bucket.setdefault(key, []).append(index)
+
+    def _add_to_cluster(self, representative, text):
+        """
+        Counts a removed duplicate in its representative's cluster
+        :param representative: (bytes) hash of the kept text
+        :param text: (str) removed text
+        """
+        cluster = self.clusters.setdefault(representative, [0, text])
+        cluster[0] += 1
+
+
+class _WordHashes(dict):
+    """
+    Hashes of words, computed the first time each word is looked up
+    """
+    def __missing__(self, word):
+        word_hash = self[word] = zlib.crc32(word.encode('utf-8'))
+        return word_hash
@@ -0,0 +1,166 @@
+"""
+Local SQLite store of scraped reviews, so every crawl adds to one database instead of another csv
+"""
+import hashlib
+import json
+import sqlite3
+import pandas as pd
+from medinify.datasets.utils import parse_dates, parse_ratings
+
+_CREATE_TABLE = '''
+CREATE TABLE IF NOT EXISTS reviews (
+    site TEXT NOT NULL,
+    drug TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    comment TEXT,
+    date TEXT,
+    rating TEXT,
+    url TEXT,
+    user_id TEXT,
+    label INTEGER,
+    PRIMARY KEY (site, drug, text_hash)
+)'''
+_CREATE_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS reviews_drug ON reviews (drug, date)',
+    'CREATE INDEX IF NOT EXISTS reviews_date ON reviews (date)',
+    'CREATE INDEX IF NOT EXISTS reviews_label ON reviews (label)',
+]
+_UPSERT = '''
+INSERT INTO reviews (site, drug, text_hash, comment, date, rating, url, user_id, label)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (site, drug, text_hash) DO UPDATE SET
+    date = excluded.date,
+    rating = excluded.rating,
+    url = COALESCE(excluded.url, reviews.url),
+    user_id = COALESCE(excluded.user_id, reviews.user_id),
+    label = COALESCE(excluded.label, reviews.label)'''
+
+# columns stored as they are (every other column of a review is one of its ratings)
+_REVIEW_COLUMNS = ['site', 'drug', 'comment', 'date', 'url', 'user id', 'label']
+
+
+class ReviewStore:
+    """
+    The ReviewStore class keeps reviews in a SQLite database file, one row per review, keyed
+    by site, drug, and a hash of the review's text (so storing a review again updates it)
+    Ratings are stored as JSON (sites rate different things), dates in ISO format, and there
+    are indexes on drug (and date), date, and label, so load can read a subset of the reviews
+    (e.g. one drug's reviews from a date range) without reading the whole database
+
+    Attributes:
+        path:           (str) Path to the database file
+        connection:     (sqlite3.Connection) Connection to the database
+    """
+    def __init__(self, path):
+        """
+        Constructor for ReviewStore
+        Opens the database at path (creating it if there isn't one)
+        :param path: (str) path to the database file
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self.connection.execute(_CREATE_TABLE)
+            for statement in _CREATE_INDEXES:
+                self.connection.execute(statement)
+
+    def upsert(self, reviews, site=None):
+        """
+        Adds reviews to the store (reviews already in it are updated), in one transaction
+        :param reviews: (pandas DataFrame or list[dict]) reviews (as scraped, with a rating
+            dictionary, or with one column per rating type)
+        :param site: (str) nickname of the site the reviews were scraped from (if they don't have a site column)
+        :return: (int) number of reviews written
+        """
+        reviews = pd.DataFrame(reviews)
+        if len(reviews) == 0:
+            return 0
+        if 'site' not in reviews.columns:
+            assert site, 'site must be given for reviews without a site column'
+            reviews['site'] = site
+        reviews = reviews.loc[reviews['comment'].notnull() & reviews['drug'].notnull()]
+
+        rating_columns = [column for column in reviews.columns if column not in _REVIEW_COLUMNS]
+        if rating_columns == ['rating']:
+            ratings = [json.dumps(rating) if isinstance(rating, dict) else None if pd.isnull(rating)
+                       else json.dumps({'rating': rating}) for rating in reviews['rating']]
+        else:
+            ratings = [json.dumps({column: value for column, value in row.items() if not pd.isnull(value)})
+                       for row in reviews[rating_columns].to_dict('records')]
+
+        rows = zip(
+            reviews['site'].astype(str), reviews['drug'].astype(str),
+            [hashlib.sha1(comment.encode('utf-8')).hexdigest() for comment in reviews['comment'].astype(str)],
+            reviews['comment'].astype(str), self._column(reviews, 'date', parse_dates), ratings,
+            self._column(reviews, 'url'), self._column(reviews, 'user id'),
+            self._column(reviews, 'label', lambda labels: labels.map(lambda label: int(label))))
+        with self.connection:
+            self.connection.executemany(_UPSERT, rows)
+        return len(reviews)
+
+    def load(self, drug=None, site=None, start_date=None, end_date=None, label=None, ratings=True):
+        """
+        Loads the reviews matching every filter given (only matching rows are read)
+        :param drug: (str or list[str]) drug name(s)
+        :param site: (str or list[str]) site nickname(s)
+        :param start_date: (str) earliest review date (ISO format, e.g. '2019-01-01')
+        :param end_date: (str) latest review date (ISO format)
+        :param label: (int or list[int]) label(s)
+        :param ratings: (boolean) whether to load ratings (as one column per rating type)
+        :return: (pandas DataFrame) reviews
+        """
+        conditions = []
+        parameters = []
+        for column, values in [('drug', drug), ('site', site), ('label', label)]:
+            if values is not None:
+                values = values if isinstance(values, (list, tuple, set)) else [values]
+                conditions.append('%s IN (%s)' % (column, ', '.join(['?'] * len(values))))
+                parameters.extend(values)
+        if start_date:
+            conditions.append('date >= ?')
+            parameters.append(start_date)
+        if end_date:
+            conditions.append('date <= ?')
+            parameters.append(end_date)
+
+        columns = 'comment, date, drug, site, url, user_id AS "user id", label' + (', rating' if ratings else '')
+        query = 'SELECT %s FROM reviews' % columns
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        reviews = pd.read_sql_query(query, self.connection, params=parameters)
+
+        for column in ['url', 'user id', 'label']:
+            if reviews[column].isnull().all():
+                reviews.drop(column, axis=1, inplace=True)
+        if ratings:
+            rating_columns = parse_ratings(reviews['rating'].dropna())
+            reviews = pd.concat([reviews.drop('rating', axis=1), rating_columns], axis=1)
+        return reviews
+
+    def count(self):
+        """
+        :return: (int) number of reviews in the store
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM reviews').fetchone()[0]
+
+    def close(self):
+        """
+        Closes the connection to the database
+        """
+        self.connection.close()
+
+    @staticmethod
+    def _column(reviews, column, transform=None):
+        """
+        :return: (list) values of a column, with None for missing values (and for every
+            review if there is no such column)
+        """
+        if column not in reviews.columns:
+            return [None] * len(reviews)
+        values = reviews[column]
+        present = values.notnull()
+        if transform:
+            values = values.copy().astype(object)
+            values[present] = transform(values[present])
+        return [value if is_present else None for value, is_present in zip(values.tolist(), present.tolist())]
@@ -1,9 +1,9 @@
 
 from medinify.datasets import Dataset
+from medinify.datasets.checkpoint_journal import CheckpointJournal
+from medinify.datasets.utils import parse_ratings
 from medinify import scrapers
 import pandas as pd
-import os
-import ast
 import numpy as np
 
 
@@ -22,9 +22,14 @@ class SentimentDataset(Dataset):
         num_classes: (int) number of star rating classes to use when generating labels (2 for polarity classification,
             3 or 5 for more specific degrees of sentiment)
         scraper: (Scraper) scraper to use when collecting datasets
+        rating_column: (str) Column name of the star ratings sentiment labels are generated from
+        pos_threshold: (float) Lowest star rating labelled positive (for 2 and 3 classes)
+        neg_threshold: (float) Highest star rating labelled negative (for 2 and 3 classes)
+        uncompacted_memory: (int or None) Memory used by data_table before it was compacted (in bytes)
     """
     def __init__(self, csv_file=None, text_column='comment', label_column='effectiveness', scraper='webmd',
-                 collect_user_ids=False, collect_urls=False, num_classes=2):
+                 collect_user_ids=False, collect_urls=False, num_classes=2, scraper_options=None,
+                 pos_threshold=4.0, neg_threshold=2.0, columns=None, compact=False):
         """
         Constructor for SentimentDataset
         Sets up what data will be processed as text and label, and loads data
@@ -32,16 +37,31 @@ class SentimentDataset(Dataset):
         :param csv_file: (str) Path to csv file with stored data
         :param text_column: (str) name of the csv column containing the text data
         :param label_column: (str) name of the csv column containing the label data
-        :param scraper: (Scraper) scraper to use when collecting datasets
+        :param scraper: (str) nickname of the scraper to use when collecting datasets
+            ('webmd', 'drug', 'everydayhealth', or 'drugratingz')
         :param collect_user_ids: (boolean) whether or not not collect user ids when scraping
         :param collect_urls: (boolean) whether or not to collect urls when scraping
         :param num_classes: (int) number of star rating classes to use when generating labels
+        :param scraper_options: (dict) extra keyword arguments for the scraper (e.g. max_in_flight,
+            requests_per_second, cache)
+        :param pos_threshold: (float) lowest star rating labelled positive (for 2 and 3 classes)
+        :param neg_threshold: (float) highest star rating labelled negative (for 2 and 3 classes)
+        :param columns: (list[str] or None) columns to load from the file (None for all columns)
+        :param compact: (boolean) whether to store loaded data with compact dtypes (see compact_data)
         """
+        assert num_classes in [2, 3, 5], 'num_classes must be 2, 3, or 5'
+        assert neg_threshold < pos_threshold, 'neg_threshold must be lower than pos_threshold'
         self.num_classes = num_classes
-        super().__init__(csv_file=csv_file, text_column=text_column, label_column=label_column)
-        for scrap in scrapers.Scraper.__subclasses__():
-            if scrap.nickname == scraper:
-                self.scraper = scrap(collect_urls=collect_urls, collect_user_ids=collect_user_ids)
+        self.pos_threshold = pos_threshold
+        self.neg_threshold = neg_threshold
+        self.rating_column = label_column
+        super().__init__(csv_file=csv_file, text_column=text_column, label_column=label_column, columns=columns,
+                         compact=compact)
+        self.collect_urls = collect_urls
+        self.collect_user_ids = collect_user_ids
+        self.scraper_options = scraper_options or {}
+        self.scraper = scrapers.create_scraper(scraper, collect_urls=collect_urls,
+                                               collect_user_ids=collect_user_ids, **self.scraper_options)
 
         if type(self.data_table) != pd.DataFrame:
             columns = ['comment', 'rating', 'date', 'drug']
@@ -54,125 +74,217 @@ class SentimentDataset(Dataset):
         else:
             self.generate_labels()
 
-    def collect(self, url):
+    def collect(self, url, incremental=False):
         """
         Given a url, scrapes, stores, cleans, and generates labels for review data
         :param url: (str) url for drug reviews page to scraper
+        :param incremental: (Boolean) whether to only scrape reviews that aren't in the dataset yet
         """
-        self.scraper.scrape(url)
-        scraped_data = pd.DataFrame(self.scraper.reviews)
-        self.data_table = self.data_table.append(scraped_data, ignore_index=True)
+        seen = self.review_keys() if incremental else None
+        scraped_data = pd.DataFrame(self.scraper.iter_reviews(url, seen=seen))
+        if len(scraped_data) == 0:
+            return
+        self.data_table = pd.concat([self.data_table, scraped_data], ignore_index=True)
         self.transform_old_dataset()
-        self._clean_data()
         self.generate_labels()
+        self._clean_data()
 
-    def collect_from_urls(self, urls_file=None, urls=None, start=0):
+    def collect_from_urls(self, urls_file=None, urls=None, start=0,
+                          checkpoint_file='./medinify/datasets/temp_file.csv', max_concurrent_drugs=1,
+                          incremental=False, store=None):
         """
         Collect drug review data from list of urls
+        Each url's newly scraped reviews are appended to a checkpoint file, and a small
+        progress file records which urls are done, so a stopped collection can be resumed
+        (reviews are only transformed, cleaned, and labelled once, after all urls are scraped)
         :param urls_file: (str) path to file containing list of drug review urls
         :param urls: (list[str]) list of drug review urls
-        :param start: (int) where to start in list of urls (if restarting scraping)
+        :param start: (int) where to start in list of urls (if restarting scraping; urls
+            already saved in the checkpoint file are skipped)
+        :param checkpoint_file: (str) path to the checkpoint file scraped reviews are appended to
+        :param max_concurrent_drugs: (int) number of drugs to scrape at once (if more than 1,
+            drugs are scraped by a CrawlScheduler, and may finish out of order)
+        :param incremental: (Boolean) whether to only scrape reviews that aren't in the dataset yet
+            (for recrawling drugs: on sites that list reviews newest first, only pages with new
+            reviews are downloaded)
+        :param store: (ReviewStore) review store to also add each url's scraped reviews to
         """
         assert bool(urls_file) ^ bool(urls)
         if urls_file:
             with open(urls_file, 'r') as f:
                 urls = [x[:-1] for x in f.readlines()]
+
+        journal = CheckpointJournal(checkpoint_file)
         if start != 0:
-            if os.path.exists('./medinify/datasets/temp_file.csv'):
-                self.data_table = pd.read_csv('./medinify/datasets/temp_file.csv')
+            if journal.done:
+                print('Saved data found for %d urls. Starting from %d.' % (len(journal.done), journal.next_url()))
+                skip = journal.done
             else:
                 print('No saved data found for urls 0 - %d' % start)
+                skip = set(range(start))
+        else:
+            journal.clear()
+            skip = set()
+
+        seen = self.review_keys() if incremental else None
         print('\nScraping urls...')
-        for url in urls[start:]:
-            self.collect(url)
-            self.data_table.to_csv('./medinify/datasets/temp_file.csv', index=False)
-            start += 1
+        if max_concurrent_drugs > 1:
+            scheduler = scrapers.CrawlScheduler(
+                max_drugs_per_site=max_concurrent_drugs, collect_urls=self.collect_urls,
+                collect_user_ids=self.collect_user_ids, scraper_options=self.scraper_options)
+            scraped = scheduler.crawl([(self.scraper.nickname, url) for url in urls], skip=skip, seen=seen)
+        else:
+            scraped = ((index, self.scraper.iter_reviews(url, seen=seen)) for index, url in enumerate(urls)
+                       if index not in skip)
+        for index, reviews in scraped:
+            reviews = pd.DataFrame(reviews)
+            journal.append(reviews, index)
+            if store is not None:
+                store.upsert(reviews, site=self.scraper.nickname)
 
             print('\nTemporary review data file saved.')
-            print('Safe to quit. Start from %d.' % start)
+            print('Safe to quit. Start from %d.' % journal.next_url())
         print('Finished collection.')
-        os.remove('./medinify/datasets/temp_file.csv')
-        self.transform_old_dataset()
 
-    def collect_from_drug_names(self, drug_names_file, start=0):
+        scraped_data = journal.read()
+        journal.clear()
+        if len(scraped_data) > 0:
+            self.data_table = pd.concat([self.data_table, scraped_data], ignore_index=True)
+            self.transform_old_dataset()
+            self.generate_labels()
+            self._clean_data()
+
+    def collect_from_drug_names(self, drug_names_file, start=0, url_cache_file=None, max_concurrent_drugs=1):
         """
         Collect drug review data from list of drug names
         :param drug_names_file: (str) path to file containing list of drug names
         :param start: (int) where to start in list of urls (if restarting scraping)
+        :param url_cache_file: (str) path to a json file caching each drug name's url
+            (so names searched for in an earlier run aren't searched for again)
+        :param max_concurrent_drugs: (int) number of drugs to scrape at once
         """
         print('\nCollecting urls...')
-        urls = self.scraper.get_urls(drug_names_file)
-        self.collect_from_urls(urls=urls, start=start)
+        urls = self.scraper.get_urls(drug_names_file, url_cache_file=url_cache_file)
+        self.collect_from_urls(urls=urls, start=start, max_concurrent_drugs=max_concurrent_drugs)
+
+    def load_store(self, store, **filters):
+        """
+        Loads reviews from a review store (only the reviews matching filters are read),
+        then cleans them and generates labels
+        :param store: (ReviewStore) review store to load from
+        :param filters: filters for the reviews to load (drug, site, start_date, end_date, label;
+            see ReviewStore.load)
+        """
+        self.data_table = store.load(**filters)
+        self.generate_labels()
+        self._clean_data()
+
+    def write_store(self, store, site=None):
+        """
+        Adds the dataset's reviews to a review store (reviews already in it are updated)
+        :param store: (ReviewStore) review store to write to
+        :param site: (str) nickname of the site the reviews are from (if they don't have a site
+            column; the scraper's site by default)
+        """
+        store.upsert(self.data_table, site=site or self.scraper.nickname)
+
+    def review_keys(self):
+        """
+        Gets the keys (see review_key) of the reviews in the dataset, so recrawls can skip them
+        :return: (set[str]) review keys
+        """
+        fields = [field for field in ['drug', 'date', 'comment'] if field in self.data_table.columns]
+        return {scrapers.review_key(review) for review in self.data_table[fields].to_dict('records')}
 
     def write_file(self, output_file):
         """
         Writes file of the current internal data (data_table)
         Searches for data/csvs directory, saves csv there (also transforms data
         from old, scraper structure to new structure before writing file)
-        :param output_file: (str) name to save file to (should end with .csv)
+        :param output_file: (str) name to save file to (should end with .csv, .parquet, or .feather)
         """
         if 'ratings' in list(self.data_table.columns.values):
             self.transform_old_dataset()
         super().write_file(output_file)
 
-    def load_file(self, csv_file):
+    def load_file(self, csv_file, columns=None, compact=False):
         """
         Loads a csv file's data into Sentiment Dataset's internal storage
         Removes empty elements with empty text or empty label (transforms old format if needed)
-        :param csv_file: (str) path to csv file with data
+        :param csv_file: (str) path to csv (or .parquet or .feather) file with data
+        :param columns: (list[str] or None) columns to load (None for all columns)
+        :param compact: (boolean) whether to store the data with compact dtypes (see compact_data)
         """
-        super().load_file(csv_file)
+        super().load_file(csv_file, columns=columns)
         if 'rating' in list(self.data_table.columns.values):
             self.transform_old_dataset()
         self.generate_labels()
+        if compact:
+            self.compact_data()
 
     def transform_old_dataset(self):
         """
         Transforms old rating format (one column containing a dictionary) into new
         format (one column per rating type)
+        (Only rows with a rating dictionary are transformed, so newly collected reviews can be
+        added to an already transformed dataset; single number ratings, as scraped from
+        Drugs.com and EverydayHealth, are left in the rating column; a dataset without a rating
+        column is left unchanged)
         """
-        if type(self.data_table.iloc[0]['rating']) == str:
-            new_columns = list(ast.literal_eval(self.data_table.iloc[0]['rating']).keys())
-        else:
-            new_columns = list(self.data_table.iloc[0]['rating'].keys())
-        for column in new_columns:
-            if type(self.data_table.iloc[0]['rating']) == str:
-                self.data_table[column] = self.data_table.apply(
-                    lambda row: ast.literal_eval(row['rating'])[column], axis=1)
+        if 'rating' not in self.data_table.columns:
+            return
+        ratings = self.data_table['rating'].dropna()
+        if len(ratings) > 0 and not isinstance(ratings.iloc[0], (dict, str)):
+            return
+        rating_columns = parse_ratings(ratings)
+        for column in rating_columns.columns:
+            if column in self.data_table.columns:
+                self.data_table.loc[rating_columns.index, column] = rating_columns[column]
             else:
-                self.data_table[column] = self.data_table.apply(
-                    lambda row: row['rating'][column], axis=1)
+                self.data_table[column] = rating_columns[column]
         self.data_table.drop(['rating'], axis=1, inplace=True)
 
     def generate_labels(self):
         """
         Generates sentiment labels from star ratings, stores them in new column
+        (if there already is a label column, only reviews without a label are labelled,
+        so newly collected reviews can be added to a labelled dataset)
         """
         if 'label' not in list(self.data_table.columns.values):
-            labels = self.data_table[self.label_column].apply(lambda x: self._rating_to_label(x))
-            self.data_table['label'] = labels
+            ratings = self.data_table[self.rating_column]
+            self.data_table['label'] = self._ratings_to_labels(ratings)
             self.label_column = 'label'
-            if self.num_classes == 2:
-                self.data_table = self.data_table.loc[self.data_table['label'].notnull()]
+        else:
+            self.label_column = 'label'
+            unlabelled = self.data_table['label'].isnull()
+            if self.rating_column not in list(self.data_table.columns.values) or not unlabelled.any():
+                return
+            ratings = self.data_table.loc[unlabelled, self.rating_column]
+            self.data_table.loc[ratings.index, 'label'] = self._ratings_to_labels(ratings)
+        if self.num_classes == 2:
+            self.data_table = self.data_table.loc[self.data_table['label'].notnull()]
 
-    def _rating_to_label(self, rating):
+    def _ratings_to_labels(self, ratings):
         """
         Transforms star ratings into sentiment labels based on num_classes
-        :param rating: (int) rating to transform
-        :return: sentiment label
+        (2 classes: negative (0) for ratings up to neg_threshold, positive (1) for ratings from
+        pos_threshold, and no label for ratings in between; 3 classes: negative (0), neutral (1),
+        and positive (2), with missing ratings neutral; 5 classes: one label per star (0-4) for ratings 1-5)
+        :param ratings: (pandas Series) ratings to transform
+        :return: (pandas Series) sentiment labels (NaN for ratings without a label)
         """
+        values = ratings.to_numpy(dtype=float)
         if self.num_classes == 2:
-            if rating in [1.0, 2.0]:
-                return 0
-            elif rating in [4.0, 5.0]:
-                return 1
-            else:
-                return np.NaN
+            conditions = [values <= self.neg_threshold, values >= self.pos_threshold]
+            choices = [0, 1]
         elif self.num_classes == 3:
-            if rating in [1.0, 2.0]:
-                return 0
-            elif rating in [4.0, 5.0]:
-                return 2
-            else:
-                return 1
-
+            conditions = [values <= self.neg_threshold, values >= self.pos_threshold]
+            choices = [0, 2]
+        else:
+            conditions = [values == star for star in range(1, 6)]
+            choices = list(range(5))
+        # every other rating is neutral with 3 classes (including missing ratings)
+        labels = np.select(conditions, choices, default=1 if self.num_classes == 3 else np.nan)
+        if not np.isnan(labels).any():
+            labels = labels.astype(int)
+        return pd.Series(labels, index=ratings.index)
@@ -0,0 +1,144 @@
+"""
+Dataset for corpora too large to load into memory at once
+Reads a csv (or Parquet or Feather) file in chunks, each one cleaned like a Dataset
+"""
+import hashlib
+import pandas as pd
+from medinify.datasets.dataset import Dataset
+from medinify.datasets.dataset_stats import DatasetStats
+from medinify.datasets.deduplicator import Deduplicator
+from medinify.datasets.utils import find_csv, iter_table_chunks
+
+
+class StreamingDataset:
+    """
+    The StreamingDataset class iterates over a data file in fixed-size chunks, yielding each
+    chunk as a Dataset (so chunks can be passed to Vectorizers and Classifiers one at a time)
+    Chunks are cleaned as they are read: empty elements are removed, and so are texts already
+    seen in an earlier chunk (only a digest of each text is kept, not the text itself), or,
+    with near_duplicates, near-duplicates of earlier texts (see Deduplicator)
+
+    Attributes:
+        path:           (str) Absolute path to the data file
+        text_column:    (str) Column name from data csv for text data
+        label_column:   (str) Column name from data csv for label data
+        chunk_size:     (int) Number of rows read per chunk
+        columns:        (list[str] or None) Columns to load from the file (None for all columns)
+        num_texts:      (int) Number of texts yielded by the last full pass over the file
+        num_duplicates: (int) Number of duplicate texts removed in the last full pass
+        num_empty:      (int) Number of empty elements removed in the last full pass
+        near_duplicates: (boolean) Whether near-duplicate texts are removed
+        deduplicator:   (Deduplicator or None) Deduplicator used in the last pass (if near_duplicates)
+    """
+    def __init__(self, csv_file, text_column='text', label_column='label', chunk_size=100000, columns=None,
+                 near_duplicates=False):
+        """
+        Constructor for StreamingDataset
+        :param csv_file: (str) Path to csv (or .parquet or .feather) file with stored data
+        :param text_column: (str) name of the csv column containing the text data
+        :param label_column: (str) name of the csv column containing the label data
+        :param chunk_size: (int) number of rows to read per chunk
+        :param columns: (list[str] or None) columns to load from the file (None for all columns)
+        :param near_duplicates: (boolean) whether to remove near-duplicate texts (and texts that
+            only differ in case, spacing, or punctuation) instead of only exact duplicates
+        """
+        assert chunk_size > 0, 'chunk_size must be positive'
+        self.path = find_csv(csv_file)
+        if not self.path:
+            raise FileNotFoundError('File not found in data/ directory.')
+        self.text_column = text_column
+        self.label_column = label_column
+        self.chunk_size = chunk_size
+        self.columns = columns
+        self.num_texts = 0
+        self.num_duplicates = 0
+        self.num_empty = 0
+        self.near_duplicates = near_duplicates
+        self.deduplicator = None
+
+    def __iter__(self):
+        """
+        Iterates over the file's cleaned chunks
+        (each pass starts over, so the StreamingDataset can be iterated over more than once)
+        :return: (iterator[Dataset]) one Dataset per chunk (chunks left empty by cleaning are skipped)
+        """
+        seen = set()
+        deduplicator = Deduplicator() if self.near_duplicates else None
+        num_texts = num_duplicates = num_empty = 0
+        for data_table in iter_table_chunks(self.path, self.chunk_size, columns=self.columns):
+            num_rows = len(data_table)
+            if deduplicator:
+                data_table = deduplicator.deduplicate(data_table, self.text_column)
+            else:
+                data_table = self._remove_duplicate_elements(data_table, seen)
+            num_duplicates += num_rows - len(data_table)
+            num_rows = len(data_table)
+            data_table = self._remove_empty_elements(data_table)
+            num_empty += num_rows - len(data_table)
+            if len(data_table) == 0:
+                continue
+            num_texts += len(data_table)
+            dataset = Dataset(text_column=self.text_column, label_column=self.label_column)
+            dataset.data_table = data_table
+            yield dataset
+
+        self.num_texts = num_texts
+        self.num_duplicates = num_duplicates
+        self.num_empty = num_empty
+        self.deduplicator = deduplicator
+        if deduplicator:
+            deduplicator.print_report()
+        elif num_duplicates > 0:
+            print('Removed %d duplicate elements(s).' % num_duplicates)
+        if num_empty > 0:
+            print('Removed %d empty elements(s).' % num_empty)
+
+    def stats(self):
+        """
+        Computes stats about the dataset in one pass over its chunks (see DatasetStats)
+        :return: (DatasetStats) stats
+        """
+        return DatasetStats.of(self)
+
+    def print_stats(self):
+        """
+        Prints stats about the dataset (see DatasetStats.print_stats)
+        """
+        self.stats().print_stats()
+
+    def unique_labels(self):
+        """
+        Finds every label in the file (reading only the label column)
+        :return: (list) sorted unique labels
+        """
+        labels = set()
+        for data_table in iter_table_chunks(self.path, self.chunk_size, columns=[self.label_column]):
+            labels.update(data_table[self.label_column].dropna().unique())
+        return sorted(labels)
+
+    def _remove_duplicate_elements(self, data_table, seen):
+        """
+        Removes texts that are repeated in the chunk or were seen in an earlier chunk
+        (missing and blank texts are kept, so they are counted as empty elements, not as duplicates)
+        :param data_table: (pandas DataFrame) chunk
+        :param seen: (set[bytes]) digests of the texts seen so far (new texts are added to it)
+        :return: (pandas DataFrame) chunk without duplicates
+        """
+        keep = []
+        for text in data_table[self.text_column]:
+            if pd.isnull(text) or text == '':
+                keep.append(True)
+                continue
+            digest = hashlib.sha1(str(text).encode('utf-8')).digest()
+            keep.append(digest not in seen)
+            seen.add(digest)
+        return data_table.loc[keep]
+
+    def _remove_empty_elements(self, data_table):
+        """
+        Removes elements with empty text or label
+        :param data_table: (pandas DataFrame) chunk
+        :return: (pandas DataFrame) chunk without empty elements
+        """
+        texts = data_table[self.text_column]
+        return data_table.loc[texts.notnull() & (texts != '') & data_table[self.label_column].notnull()]
@@ -1,20 +1,168 @@
 """
 Medinify dataset utility functions
 """
+import ast
+import json
 import os
+import pandas as pd
+from medinify import paths
 
 
 def find_csv(path):
     """
-    Searches data/csvs directory for data file being loaded
-    :param path: (str) name of csv file being looked for
+    Searches data/csvs directory for data file being loaded (see paths.find_file)
+    :param path: (str) name of csv file being looked for (or path to it)
     :return absolute_path: (str) (in path found) or None (if not found)
     """
-    for file in os.walk(os.getcwd()):
-        if os.path.isdir(file[0]) and file[0][-18:] == 'medinify/data/csvs':
-            directory_path = file[0]
-            absolute_path = directory_path + '/' + path
-            if path in os.listdir(directory_path) and os.path.isfile(absolute_path):
-                return absolute_path
-            else:
-                return None
+    return paths.find_file('csvs', path)
+
+
+def read_table(path, columns=None):
+    """
+    Reads a data file into a DataFrame, in the format given by its extension
+    (.parquet for Parquet, .feather or .arrow for Feather (Arrow IPC), anything else is read as csv)
+    Parquet and Feather files store columns separately and keep their dtypes, so they load much
+    faster than csv files, and only the requested columns are read (both need pyarrow installed)
+    :param path: (str) path to the data file
+    :param columns: (list[str] or None) columns to load (None for all columns)
+    :return: (pandas DataFrame) loaded data
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    if extension in ['.feather', '.arrow']:
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_table_chunks(path, chunk_size, columns=None):
+    """
+    Reads a data file (see read_table) chunk by chunk, so it never has to fit in memory at once
+    (Parquet files are read one row group at a time; Feather files are memory mapped, which only
+    avoids loading them if they aren't compressed)
+    :param path: (str) path to the data file
+    :param chunk_size: (int) number of rows per chunk
+    :param columns: (list[str] or None) columns to load (None for all columns)
+    :return: (iterator[pandas DataFrame]) chunks of the file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        from pyarrow import parquet
+        parquet_file = parquet.ParquetFile(path)
+        for index in range(parquet_file.num_row_groups):
+            yield from _iter_table_slices(parquet_file.read_row_group(index, columns=columns), chunk_size)
+    elif extension in ['.feather', '.arrow']:
+        import pyarrow
+        from pyarrow import feather
+        yield from _iter_table_slices(feather.read_table(pyarrow.memory_map(path), columns=columns), chunk_size)
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+
+
+def _iter_table_slices(table, chunk_size):
+    """
+    Converts an Arrow table to DataFrames chunk by chunk
+    :param table: (pyarrow.Table) table
+    :param chunk_size: (int) number of rows per chunk
+    :return: (iterator[pandas DataFrame]) chunks of the table
+    """
+    for offset in range(0, table.num_rows, chunk_size):
+        yield table.slice(offset, chunk_size).to_pandas()
+
+
+def write_table(data_table, path):
+    """
+    Writes a DataFrame to a data file, in the format given by its extension (see read_table)
+    :param data_table: (pandas DataFrame) data to write
+    :param path: (str) path to the data file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        data_table.to_parquet(path, index=False)
+    elif extension in ['.feather', '.arrow']:
+        data_table.reset_index(drop=True).to_feather(path)
+    else:
+        data_table.to_csv(path, index=False)
+
+
+def compact_table(data_table, text_column, max_category_ratio=0.5):
+    """
+    Converts a table's columns to more memory-compact dtypes:
+    string columns with few distinct values (like drug, url, or user id) become categoricals,
+    a date column becomes datetimes (if every date can be parsed), and whole number columns
+    (like ratings and labels) become the smallest integer type (or float32 if values are missing)
+    :param data_table: (pandas DataFrame) table to compact
+    :param text_column: (str) name of the text column (left as strings)
+    :param max_category_ratio: (float) largest ratio of distinct values to rows for a string
+        column to become categorical
+    :return: (pandas DataFrame) compacted table
+    """
+    data_table = data_table.copy()
+    for column in data_table.columns:
+        values = data_table[column]
+        if column == text_column or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if column == 'date' and not pd.api.types.is_datetime64_any_dtype(values):
+            dates = pd.to_datetime(values, errors='coerce')
+            if dates.notnull().sum() == values.notnull().sum():
+                data_table[column] = dates
+                continue
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            if values.nunique() <= max_category_ratio * len(values):
+                data_table[column] = values.astype('category')
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            present = values.dropna()
+            if not (present == present.round()).all():
+                continue
+            if len(present) == len(values):
+                data_table[column] = pd.to_numeric(values, downcast='integer')
+            elif present.abs().max() <= 2 ** 24:
+                data_table[column] = values.astype('float32')
+    return data_table
+
+
+def parse_dates(dates):
+    """
+    Parses dates in any of the formats scraped from review sites (e.g. '1/1/2019 10:00:00 AM',
+    'March 1, 2019', or '2019-01-01') into ISO format dates
+    (each distinct date string is only parsed once)
+    :param dates: (pandas Series) date strings
+    :return: (pandas Series) ISO format dates ('YYYY-MM-DD'), or None for dates that can't be parsed
+    """
+    parsed = {}
+    for date in dates.dropna().unique():
+        timestamp = pd.to_datetime(str(date), errors='coerce')
+        parsed[date] = None if pd.isnull(timestamp) else timestamp.strftime('%Y-%m-%d')
+    iso_dates = dates.map(parsed).astype(object)
+    return iso_dates.where(iso_dates.notnull(), None)
+
+
+def memory_usage(data_table):
+    """
+    :param data_table: (pandas DataFrame) table
+    :return: (int) memory used by the table (in bytes, counting the strings it holds)
+    """
+    return int(data_table.memory_usage(deep=True).sum())
+
+
+def parse_ratings(ratings):
+    """
+    Splits a column of rating dictionaries (or their string forms, as stored in csv files)
+    into one column per rating type
+    Rating strings are all parsed at once, as a single JSON array (falling back to
+    ast.literal_eval for each string if they aren't valid JSON once quotes are swapped)
+    :param ratings: (pandas Series) rating dictionaries or strings (without missing values)
+    :return: (pandas DataFrame) one column per rating type, with the same index as ratings
+    """
+    if len(ratings) == 0:
+        return pd.DataFrame(index=ratings.index)
+    if type(ratings.iloc[0]) == str:
+        try:
+            json_ratings = ratings.str.replace('\'', '"', regex=False).str.replace(
+                'None', 'null', regex=False).str.replace('nan', 'NaN', regex=False)
+            records = json.loads('[' + ','.join(json_ratings) + ']')
+        except ValueError:
+            records = [ast.literal_eval(rating) for rating in ratings]
+    else:
+        records = ratings.tolist()
+    return pd.DataFrame.from_records(records, index=ratings.index)
@@ -0,0 +1,104 @@
+"""
+Locates medinify's data directories (data/csvs, data/embeddings, and models)
+Directories are found without walking the working directory: each one is taken from an
+environment variable (or set_directory), or else looked for in the working directory and
+next to (or in) the medinify package, and found directories are remembered
+"""
+import os
+
+DIRECTORIES = {
+    'csvs': ('MEDINIFY_CSVS_DIR', os.path.join('data', 'csvs')),
+    'embeddings': ('MEDINIFY_EMBEDDINGS_DIR', os.path.join('data', 'embeddings')),
+    'models': ('MEDINIFY_MODELS_DIR', 'models'),
+}
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+_configured_directories = {}
+_found_directories = {}
+
+
+def set_directory(name, path):
+    """
+    Configures where one of medinify's data directories is (overriding its environment variable)
+    :param name: (str) 'csvs', 'embeddings', or 'models'
+    :param path: (str) path to the directory (None to go back to looking it up)
+    """
+    assert name in DIRECTORIES, 'Unknown directory: %s' % name
+    if path is None:
+        _configured_directories.pop(name, None)
+    else:
+        _configured_directories[name] = os.path.abspath(path)
+    clear_cache()
+
+
+def clear_cache():
+    """
+    Forgets previously found directories (e.g. after one is created or moved)
+    """
+    _found_directories.clear()
+
+
+def find_directory(name):
+    """
+    Finds one of medinify's data directories, in this order:
+    the directory given to set_directory, the directory in its environment variable
+    (MEDINIFY_CSVS_DIR, MEDINIFY_EMBEDDINGS_DIR, or MEDINIFY_MODELS_DIR),
+    <directory> or medinify/<directory> under the working directory, and <directory> next to
+    (or in) the medinify package (e.g. data/csvs at the root of a medinify clone)
+    :param name: (str) 'csvs', 'embeddings', or 'models'
+    :return: (str) absolute path to the directory, or None if not found
+    """
+    assert name in DIRECTORIES, 'Unknown directory: %s' % name
+    environment_variable, relative_path = DIRECTORIES[name]
+    configured = _configured_directories.get(name) or os.environ.get(environment_variable)
+    if configured:
+        return os.path.abspath(configured) if os.path.isdir(configured) else None
+
+    key = (name, os.getcwd())
+    if key not in _found_directories:
+        candidates = [os.path.join(os.getcwd(), relative_path),
+                      os.path.join(os.getcwd(), 'medinify', relative_path),
+                      os.path.join(os.path.dirname(PACKAGE_DIRECTORY), relative_path),
+                      os.path.join(PACKAGE_DIRECTORY, relative_path)]
+        for candidate in candidates:
+            if os.path.isdir(candidate):
+                _found_directories[key] = candidate
+                break
+        else:
+            return None
+    return _found_directories[key]
+
+
+def find_file(name, path):
+    """
+    Finds a file to read
+    Bare file names are looked for in the data directory (see find_directory), then in the
+    working directory; paths with a directory part are used as they are
+    :param name: (str) data directory to look in ('csvs', 'embeddings', or 'models')
+    :param path: (str) file name or path
+    :return: (str) absolute path to the file, or None if not found
+    """
+    if not os.path.dirname(path):
+        directory = find_directory(name)
+        if directory and os.path.isfile(os.path.join(directory, path)):
+            return os.path.join(directory, path)
+    if os.path.isfile(path):
+        return os.path.abspath(path)
+    return None
+
+
+def output_path(name, path):
+    """
+    Gets where to write a file
+    Bare file names are written to the data directory (see find_directory); paths with a
+    directory part are used as they are
+    :param name: (str) data directory to write to ('csvs', 'embeddings', or 'models')
+    :param path: (str) file name or path
+    :return: (str) path to write the file to
+    """
+    if os.path.dirname(path):
+        return path
+    directory = find_directory(name)
+    if not directory:
+        raise NotADirectoryError('%s directory not found.' % DIRECTORIES[name][1])
+    return os.path.join(directory, path)
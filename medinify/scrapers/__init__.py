@@ -1,5 +1,9 @@
 from .scraper import Scraper
+from .rate_limiter import RateLimiter
+from .utils import create_session, review_key
+from .response_cache import ResponseCache
 from .webmd_scraper import WebMDScraper
 from .everydayhealth_scraper import EverydayHealthScraper
 from .drugs_scraper import DrugsScraper
 from .drugratingz_scraper import DrugRatingzScraper
+from .crawl_scheduler import CrawlScheduler, create_scraper
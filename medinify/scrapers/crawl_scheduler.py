@@ -0,0 +1,135 @@
+"""
+Concurrent crawling of many drugs' reviews, across one or more drug review sites
+"""
+import inspect
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from medinify.scrapers.scraper import Scraper
+from medinify.scrapers.rate_limiter import RateLimiter
+
+
+def create_scraper(site, collect_urls=False, collect_user_ids=False, **kwargs):
+    """
+    Creates a scraper for a drug review site
+    :param site: (str) nickname of the site's scraper ('webmd', 'drug', 'everydayhealth', or 'drugratingz')
+    :param collect_urls: (Boolean) whether or not the scraper collects each review's url
+    :param collect_user_ids: (Boolean) whether or not the scraper collects user ids
+        (ignored for sites whose scrapers can't collect user ids)
+    :param kwargs: page fetching options passed on to the scraper (max_in_flight,
+        requests_per_second, retries, backoff_factor, timeout, cache, parser, rate_limiter)
+    :return: (Scraper) scraper for the site
+    """
+    for scraper_class in Scraper.__subclasses__():
+        if scraper_class.nickname == site:
+            if 'collect_user_ids' in inspect.signature(scraper_class.__init__).parameters:
+                kwargs['collect_user_ids'] = collect_user_ids
+            elif collect_user_ids:
+                print('%s scraper does not collect user ids' % site)
+            return scraper_class(collect_urls=collect_urls, **kwargs)
+    raise ValueError('No scraper found for site \'%s\'' % site)
+
+
+class CrawlScheduler:
+    """
+    The CrawlScheduler class scrapes the reviews of many drugs concurrently
+    Each site gets its own work queue and worker threads, so sites are crawled independently
+    of each other, while the number of drugs scraped at once from any one site is capped,
+    and all of a site's scrapers share one RateLimiter (so requests_per_second applies per site,
+    not per drug)
+
+    Attributes:
+        max_drugs_per_site: (int or dict[str, int]) Maximum number of drugs scraped at once
+                                from each site (or from each site nickname in the dict)
+        collect_urls:       (Boolean) Whether or not to collect each review's associated url
+        collect_user_ids:   (Boolean) Whether or not to collect user ids
+        scraper_options:    (dict) Extra keyword arguments for the scrapers
+    """
+    def __init__(self, max_drugs_per_site=2, collect_urls=False, collect_user_ids=False, scraper_options=None):
+        """
+        Constructor for CrawlScheduler
+        :param max_drugs_per_site: (int or dict[str, int]) maximum number of drugs scraped at once from
+            each site (a dict maps site nicknames to their caps; sites not in it get 1)
+        :param collect_urls: (Boolean) whether or not to collect each review's associated url
+        :param collect_user_ids: (Boolean) whether or not to collect user ids
+        :param scraper_options: (dict) extra keyword arguments for the scrapers (e.g. max_in_flight,
+            requests_per_second, cache)
+        """
+        self.max_drugs_per_site = max_drugs_per_site
+        self.collect_urls = collect_urls
+        self.collect_user_ids = collect_user_ids
+        self.scraper_options = scraper_options or {}
+
+    def crawl(self, jobs, skip=(), seen=None):
+        """
+        Scrapes the reviews of each drug, yielding them as each drug is finished
+        (so drugs finish in whatever order their downloads complete, not in the order of jobs)
+        If the crawl is stopped (or a drug fails), drugs that haven't started are cancelled
+        :param jobs: (list[tuple(str, str)]) site nickname and review url of each drug to scrape
+        :param skip: (set[int]) indices of jobs to skip (e.g. already scraped, when resuming)
+        :param seen: (set[str] or None) keys (see review_key) of already collected reviews;
+            if given, only new reviews are scraped (see Scraper.iter_reviews)
+        :return: (generator[tuple(int, list[dict])]) index (in jobs) and scraped reviews of each drug
+        """
+        site_jobs = {}
+        for index, (site, url) in enumerate(jobs):
+            if index not in skip:
+                site_jobs.setdefault(site, []).append((index, url))
+
+        executors = []
+        futures = {}
+        try:
+            for site, urls in site_jobs.items():
+                num_workers = min(self._site_cap(site), len(urls))
+                scrapers = self._create_scrapers(site, num_workers)
+                executor = ThreadPoolExecutor(max_workers=num_workers)
+                executors.append(executor)
+                for index, url in urls:
+                    futures[executor.submit(self._scrape, scrapers, url, seen)] = index
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            for executor in executors:
+                executor.shutdown(wait=False)
+
+    def _site_cap(self, site):
+        """
+        :param site: (str) site nickname
+        :return: (int) maximum number of drugs scraped at once from the site
+        """
+        if isinstance(self.max_drugs_per_site, dict):
+            return self.max_drugs_per_site.get(site, 1)
+        return self.max_drugs_per_site
+
+    def _create_scrapers(self, site, num_scrapers):
+        """
+        Creates one scraper per worker thread of a site (sharing a RateLimiter)
+        :param site: (str) site nickname
+        :param num_scrapers: (int) number of scrapers
+        :return: (queue.Queue) scrapers not currently in use
+        """
+        options = dict(self.scraper_options)
+        requests_per_second = options.pop('requests_per_second', None)
+        if not options.get('rate_limiter'):
+            options['rate_limiter'] = RateLimiter(requests_per_second)
+        scrapers = queue.Queue()
+        for _ in range(num_scrapers):
+            scrapers.put(create_scraper(site, collect_urls=self.collect_urls,
+                                        collect_user_ids=self.collect_user_ids, **options))
+        return scrapers
+
+    @staticmethod
+    def _scrape(scrapers, url, seen):
+        """
+        Scrapes one drug's reviews with a scraper that isn't in use
+        :param scrapers: (queue.Queue) scrapers not currently in use
+        :param url: (str) url for the first page of the drug's reviews
+        :param seen: (set[str] or None) keys of already collected reviews
+        :return: (list[dict]) scraped reviews
+        """
+        scraper = scrapers.get()
+        try:
+            return list(scraper.iter_reviews(url, seen=seen))
+        finally:
+            scrapers.put(scraper)
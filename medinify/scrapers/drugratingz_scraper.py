@@ -10,11 +10,21 @@ Implements the ability to collect the following data:
 
 and to search for review urls given a drug name
 """
-import requests
 from bs4 import BeautifulSoup
 from medinify.scrapers.scraper import Scraper
+from medinify.scrapers.utils import xpath, has_class, find_first
 from tqdm import tqdm
 
+RATING_TYPES = ['effectiveness', 'no side effects', 'convenience', 'value']
+
+_TITLE = xpath('//title')
+_HEADING = xpath('//h1')
+_ODD_REVIEWS = xpath('//tr[%s][.//span[%s]]' % (has_class('ratingstableodd'), has_class('description')))
+_EVEN_REVIEWS = xpath('//tr[%s][.//span[%s]]' % (has_class('ratingstableeven'), has_class('description')))
+_COMMENT = xpath('.//span[%s]' % has_class('description'))
+_RATINGS = xpath('.//td[@align="center"][@valign][not(.//a)][not(.//img)]')
+_DATE = xpath('.//td[@valign="top"][not(@align)][not(.//a)]')
+
 
 class DrugRatingzScraper(Scraper):
     """
@@ -28,10 +38,54 @@ class DrugRatingzScraper(Scraper):
     nickname = 'drugratingz'
 
     def scrape_page(self, url):
+        """
+        Collects data from a DrugRatingz.com drug reviews page into the 'reviews' attribute,
+        a list of dictionaries containing each requisite piece of data
+        (comment, rating, date, drug, and url (if specified))
+        :param url: (str) the url for the page to be scraped
+        """
         assert url[:36] == 'https://www.drugratingz.com/reviews/', 'Invalid url'
+        reviews = self.parse_page(self.parse_html(self.fetch_page(url)), url)
+        self.reviews.extend(reviews)
+        if not reviews:
+            return 0
+
+    def parse_page_lxml(self, root, url):
+        """
+        Parses the reviews on a DrugRatingz.com drug reviews page (parsed with lxml)
+        :param root: (lxml.html.HtmlElement) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, and url (if specified))
+            for each review on the page
+        """
+        drug_name = find_first(_TITLE, root).text_content().split()[0]
+        reviews = _ODD_REVIEWS(root) + _EVEN_REVIEWS(root)
+
+        if len(reviews) == 0:
+            print('No reviews found for drug %s' % drug_name)
+            return []
 
-        page = requests.get(url)
-        soup = BeautifulSoup(page.text, 'html.parser')
+        rows = []
+        print('Scraping DrugRatingz.com for %s Reviews...' % drug_name)
+        for review in tqdm(reviews):
+            row = {'comment': find_first(_COMMENT, review).text_content().strip()}
+            ratings = [int(x.text_content().replace(u'\xa0', u'')) for x in _RATINGS(review)]
+            row['rating'] = dict(zip(RATING_TYPES, ratings))
+            row['date'] = find_first(_DATE, review).text_content().strip().replace(u'\xa0', u' ')
+            row['drug'] = drug_name
+            if self.collect_urls:
+                row['url'] = url
+            rows.append(row)
+        return rows
+
+    def parse_page_soup(self, soup, url):
+        """
+        Parses the reviews on a DrugRatingz.com drug reviews page (parsed with BeautifulSoup)
+        :param soup: (BeautifulSoup) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, and url (if specified))
+            for each review on the page
+        """
         drug_name = soup.find('title').text.split()[0]
         reviews = [x for x in soup.find_all('tr', {'class': 'ratingstableodd'})
                    if x.find('span', {'class': 'description'})] + \
@@ -40,42 +94,55 @@ class DrugRatingzScraper(Scraper):
 
         if len(reviews) == 0:
             print('No reviews found for drug %s' % drug_name)
-            return
+            return []
 
+        rows = []
         print('Scraping DrugRatingz.com for %s Reviews...' % drug_name)
         for review in tqdm(reviews):
             row = {'comment': review.find('span', {'class': 'description'}).text.strip()}
-            rating_types = ['effectiveness', 'no side effects', 'convenience', 'value']
             nums = [x for x in review.find_all('td', {'align': 'center'}) if 'valign'
                     in x.attrs and not x.find('a') and not x.find('img')]
             ratings = [int(x.text.replace(u'\xa0', u'')) for x in nums]
-            row['rating'] = dict(zip(rating_types, ratings))
+            row['rating'] = dict(zip(RATING_TYPES, ratings))
 
             row['date'] = [x.text.strip().replace(u'\xa0', u' ') for x in review.find_all(
                 'td', {'valign': 'top'}) if not x.find('a') and 'align' not in x.attrs][0]
             row['drug'] = drug_name
             if self.collect_urls:
                 row['url'] = url
-            self.reviews.append(row)
+            rows.append(row)
+        return rows
 
-    def scrape(self, url):
+    def parse_front_page_lxml(self, root):
+        """
+        Checks that a DrugRatingz.com drug reviews page (parsed with lxml) is valid
+        (all of a drug's reviews are on this one page)
+        :param root: (lxml.html.HtmlElement) parsed reviews page
+        :return: (int) number of review pages (always 1)
         """
-        Scrapes all review for a given drug on DrugRatingz.com into 'reviews' attribute
+        title = find_first(_HEADING, root).text_content()
+        assert 'drug reviews' in title
+        return 1
+
+    def parse_front_page_soup(self, soup):
+        """
+        Checks that a DrugRatingz.com drug reviews page (parsed with BeautifulSoup) is valid
+        (all of a drug's reviews are on this one page)
+        :param soup: (BeautifulSoup) parsed reviews page
+        :return: (int) number of review pages (always 1)
+        """
+        title = soup.find('h1').text
+        assert 'drug reviews' in title
+        return 1
+
+    def page_url(self, url, index):
+        """
+        DrugRatingz.com shows all of a drug's reviews on one page, so this is always the given url
         :param url: (str) url to the drug reviews for this drug
+        :param index: (int) index of the review page (only 0 is valid)
+        :return: (str) url of the review page
         """
-        super().scrape(url)
-        front_page = requests.get(url)
-        front_page_soup = BeautifulSoup(front_page.text, 'html.parser')
-        try:
-            title = front_page_soup.find('h1').text
-            assert 'drug reviews' in title
-        except AssertionError:
-            print('Invalid URL entered: %s' % url)
-            return 0
-        except AttributeError:
-            print('Invalid URL entered: %s' % url)
-            return 0
-        self.scrape_page(url)
+        return url
 
     def get_url(self, drug_name):
         """
@@ -90,8 +157,8 @@ class DrugRatingzScraper(Scraper):
             return None
         search_url = 'https://www.drugratingz.com/searchResults.jsp?thingname=' + \
                      drug_name.lower().split()[0] + '&1=&2='
-        search_page = requests.get(search_url)
-        search_soup = BeautifulSoup(search_page.text, 'html.parser')
+        search_page = self.fetch_page(search_url)
+        search_soup = BeautifulSoup(search_page, 'html.parser')
         search_results = list(search_soup.find_all('tr', {'class': 'ratingstableeven'}) + search_soup.find_all('tr', {'class': 'ratingstableodd'}))
 
         max_reviews = -1
@@ -14,9 +14,19 @@ and to search for review urls given a drug name
 import requests
 from bs4 import BeautifulSoup
 from medinify.scrapers.scraper import Scraper
-from tqdm import tqdm
+from medinify.scrapers.utils import xpath, has_class, find_first, count_pages
 import re
 
+_TITLE = xpath('//h1')
+_TABLE_FOOTER = xpath('(//table[%s and %s])[1]/tfoot/tr[1]/th' % (
+    has_class('data-list'), has_class('ddc-table-sortable')))
+_REVIEWS = xpath('//div[%s]' % has_class('ddc-comment'))
+_COMMENT = xpath('.//p[%s]//span' % has_class('ddc-comment-content'))
+_RATING = xpath('.//div[%s]' % has_class('rating-score'))
+_DATE = xpath('.//span[%s]' % has_class('comment-date'))
+_USER_NAME = xpath('.//span[%s or %s]' % (
+    has_class('user-type-1_standard_member'), has_class('user-type-2_non_member')))
+
 
 class DrugsScraper(Scraper):
     """
@@ -29,16 +39,19 @@ class DrugsScraper(Scraper):
     """
 
     nickname = 'drug'
+    newest_first = True
 
-    def __init__(self, collect_user_ids=False, collect_urls=False):
+    def __init__(self, collect_user_ids=False, collect_urls=False, **kwargs):
         """
         Constructor for Drugs scraper, used to collecting review data from Drugs.com
         Sets up what data ought to be collected, and sets up how that data will be
         stored (in the list attribute 'reviews')
         :param collect_user_ids: (Boolean) whether or not this scraper will collect user ids
         :param collect_urls: (Boolean) whether or not this scraper will collect each drug review's associated url
+        :param kwargs: page fetching options passed on to Scraper (max_in_flight,
+            requests_per_second, retries, backoff_factor, timeout, cache, parser, rate_limiter)
         """
-        super().__init__(collect_urls=collect_urls)
+        super().__init__(collect_urls=collect_urls, **kwargs)
         self.collect_user_ids = collect_user_ids
 
     def scrape_page(self, url):
@@ -49,62 +62,113 @@ class DrugsScraper(Scraper):
         :param url: (str) the url for the page to be scraped
         """
         assert url[:31] == 'https://www.drugs.com/comments/', 'Invalid Drugs.com Reviews Page URL'
+        reviews = self.parse_page(self.parse_html(self.fetch_page(url)), url)
+        self.reviews.extend(reviews)
+        if not reviews:
+            return 0
+
+    def parse_page_lxml(self, root, url):
+        """
+        Parses the reviews on one page of Drugs.com drug reviews (parsed with lxml)
+        :param root: (lxml.html.HtmlElement) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, user id (if specified),
+            and url (if specified)) for each review on the page
+        """
+        drug_name = re.split(r'User Reviews for | \(Page', find_first(_TITLE, root).text_content())[1]
+
+        reviews = _REVIEWS(root)
+
+        if len(reviews) == 0:
+            print('No reviews found: %s' % url)
+            return []
+
+        rows = []
+        for review in reviews:
+            row = {'comment': find_first(_COMMENT, review).text_content().replace('"', '')}
+            rating = find_first(_RATING, review)
+            row['rating'] = float(rating.text_content()) if rating is not None else None
+            row['date'] = find_first(_DATE, review).text_content()
+            row['drug'] = drug_name.split()[0]
+            if self.collect_urls:
+                row['url'] = url
+            if self.collect_user_ids:
+                user_name = find_first(_USER_NAME, review)
+                row['user id'] = user_name.text_content() if user_name is not None else None
+            rows.append(row)
+        return rows
 
-        page = requests.get(url)
-        soup = BeautifulSoup(page.text, 'html.parser')
-        drug_name = re.split('User Reviews for | \(Page', soup.find('h1').text)[1]
+    def parse_page_soup(self, soup, url):
+        """
+        Parses the reviews on one page of Drugs.com drug reviews (parsed with BeautifulSoup)
+        :param soup: (BeautifulSoup) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, user id (if specified),
+            and url (if specified)) for each review on the page
+        """
+        drug_name = re.split(r'User Reviews for | \(Page', soup.find('h1').text)[1]
 
         reviews = list(soup.find_all('div', {'class': 'ddc-comment'}))
 
         if len(reviews) == 0:
             print('No reviews found: %s' % url)
-            return 0
+            return []
 
+        rows = []
         for review in reviews:
             row = {'comment': review.find('p', {'class': 'ddc-comment-content'}).find('span').text.replace('"', '')}
-            rating = None
-            if review.find('div', {'class', 'rating-score'}):
-                rating = float(review.find('div', {'class', 'rating-score'}).text)
-            row['rating'] = rating
+            rating = review.find('div', {'class': 'rating-score'})
+            row['rating'] = float(rating.text) if rating else None
             row['date'] = review.find('span', {'class': 'comment-date text-color-muted'}).text
             row['drug'] = drug_name.split()[0]
             if self.collect_urls:
                 row['url'] = url
             if self.collect_user_ids:
-                id_ = None
-                if review.find('span', {'class', 'user-name user-type user-type-1_standard_member'}):
-                    id_ = review.find('span', {'class', 'user-name user-type user-type-1_standard_member'}).text
-                elif review.find('span', {'class': 'user-name user-type user-type-2_non_member'}):
-                    id_ = review.find('span', {'class': 'user-name user-type user-type-2_non_member'}).text
-                row['user id'] = id_
-            self.reviews.append(row)
+                user_name = review.find('span', {'class': 'user-name user-type user-type-1_standard_member'}) or \
+                    review.find('span', {'class': 'user-name user-type user-type-2_non_member'})
+                row['user id'] = user_name.text if user_name else None
+            rows.append(row)
+        return rows
 
-    def scrape(self, url):
+    def parse_front_page_lxml(self, root):
         """
-        Scrapes all review pages for a given drug on Drugs.com into 'reviews' attribute
-        :param url: (str) url to the first page of drug reviews for this drug
+        Checks that the first page of a drug's Drugs.com reviews (parsed with lxml) is valid
+        and gets its number of review pages
+        :param root: (lxml.html.HtmlElement) parsed first review page
+        :return: (int) number of review pages
         """
-        super().scrape(url)
-        front_page = requests.get(url)
-        front_page_soup = BeautifulSoup(front_page.text, 'html.parser')
-        try:
-            title = front_page_soup.find('h1').text
-            assert 'User Reviews for ' in title
-            drug_name = re.split('User Reviews for | \(Page', front_page_soup.find('h1').text)[1]
-        except AssertionError:
-            print('Invalid URL entered: %s' % url)
-            return 0
-        except AttributeError:
-            print('Invalid URL entered: %s' % url)
-            return 0
+        self._print_drug_name(find_first(_TITLE, root).text_content())
+        return max_pages_lxml(root)
+
+    def parse_front_page_soup(self, soup):
+        """
+        Checks that the first page of a drug's Drugs.com reviews (parsed with BeautifulSoup) is valid
+        and gets its number of review pages
+        :param soup: (BeautifulSoup) parsed first review page
+        :return: (int) number of review pages
+        """
+        self._print_drug_name(soup.find('h1').text)
+        return max_pages_soup(soup)
+
+    @staticmethod
+    def _print_drug_name(title):
+        """
+        Checks the title of a Drugs.com reviews page and prints which drug is being scraped
+        :param title: (str) page title
+        """
+        assert 'User Reviews for ' in title
+        drug_name = re.split(r'User Reviews for | \(Page', title)[1]
 
         print('Scraping Drugs.com for %s Reviews...' % drug_name)
-        base_url = url + '?page='
 
-        num_pages = max_pages(url)
-        for i in tqdm(range(num_pages)):
-            full_url = base_url + str(i + 1)
-            self.scrape_page(full_url)
+    def page_url(self, url, index):
+        """
+        Builds the url of one of a drug's Drugs.com review pages
+        :param url: (str) url to the first page of drug reviews for this drug
+        :param index: (int) index of the review page (starting from 0)
+        :return: (str) url of the review page
+        """
+        return url + '?page=' + str(index + 1)
 
     def get_url(self, drug_name):
         """
@@ -121,8 +185,8 @@ class DrugsScraper(Scraper):
         name = ''.join([x if x.isalnum() or x == '+' else hex(ord(x)).replace('0x', '%') for x in characters])
 
         search_url = 'https://www.drugs.com/search.php?searchterm=' + name
-        search_page = requests.get(search_url)
-        search_soup = BeautifulSoup(search_page.text, 'html.parser')
+        search_page = self.fetch_page(search_url)
+        search_soup = BeautifulSoup(search_page, 'html.parser')
 
         reviews_url = None
 
@@ -136,11 +200,21 @@ class DrugsScraper(Scraper):
 def max_pages(input_url):
     """
     Get the number of review pages for a given drug
+    (downloads the page; scrapers read the number of pages from the first page they already
+    downloaded, with max_pages_soup or max_pages_lxml)
     :param input_url: (str) first page of reviews for a drug
     :return pages: (int) number of review pages on Drugs.com for the drug
     """
     page = requests.get(input_url)
-    soup = BeautifulSoup(page.text, 'html.parser')
+    return max_pages_soup(BeautifulSoup(page.text, 'html.parser'))
+
+
+def max_pages_soup(soup):
+    """
+    Get the number of review pages for a given drug
+    :param soup: (BeautifulSoup) parsed first page of reviews for a drug
+    :return pages: (int) number of review pages on Drugs.com for the drug
+    """
     table_footer = None
     if soup.find('table', {'class': 'data-list ddc-table-sortable'}):
         if soup.find('table', {'class': 'data-list ddc-table-sortable'}).find('tfoot'):
@@ -149,11 +223,17 @@ def max_pages(input_url):
     if not table_footer:
         return 0
     total_reviews = int(''.join([ch for ch in table_footer[2].text if ch.isdigit()]))
+    return count_pages(total_reviews, 25)
 
-    pages = total_reviews // 25
-    if total_reviews % 25 != 0:
-        pages += 1
-
-    print('Found %d reviews (%d pages).' % (total_reviews, pages))
-    return pages
 
+def max_pages_lxml(root):
+    """
+    Get the number of review pages for a given drug
+    :param root: (lxml.html.HtmlElement) first page of reviews for a drug, parsed with lxml
+    :return pages: (int) number of review pages on Drugs.com for the drug
+    """
+    table_footer = _TABLE_FOOTER(root)
+    if not table_footer:
+        return 0
+    total_reviews = int(''.join([ch for ch in table_footer[2].text_content() if ch.isdigit()]))
+    return count_pages(total_reviews, 25)
@@ -14,7 +14,18 @@ import re
 import requests
 from bs4 import BeautifulSoup
 from medinify.scrapers.scraper import Scraper
-from tqdm import tqdm
+from medinify.scrapers.utils import xpath, has_class, find_first
+
+_TITLE = xpath('//title')
+_DRUG_NAME = xpath('//span[@itemprop="name"]')
+_TOTAL_REVIEWS = xpath('(//div[%s and %s])[1]//h5//span[@itemprop="reviewCount"]' % (
+    has_class('review-details'), has_class('clearfix')))
+_PAGINATION = xpath('//div[%s]//section[%s]' % (
+    has_class('review-pagination'), has_class('review-pagination__section--info')))
+_REVIEWS = xpath('//div[@itemprop="review"]')
+_COMMENT = xpath('.//p[@itemprop="reviewBody"]')
+_RATING = xpath('.//span[@itemprop="reviewRating"]')
+_DATE = xpath('.//span[%s]' % has_class('time'))
 
 
 class EverydayHealthScraper(Scraper):
@@ -37,51 +48,97 @@ class EverydayHealthScraper(Scraper):
         """
         assert url[:30] == 'https://www.everydayhealth.com', \
             'Url must be link to an EverydayHealth.com reviews page'
+        reviews = self.parse_page(self.parse_html(self.fetch_page(url)), url)
+        self.reviews.extend(reviews)
+        if not reviews:
+            return 0
+
+    def parse_page_lxml(self, root, url):
+        """
+        Parses the reviews on one page of EverydayHealth drug reviews (parsed with lxml)
+        :param root: (lxml.html.HtmlElement) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, and url (if specified))
+            for each review on the page
+        """
+        reviews = _REVIEWS(root)
+        drug_name = find_first(_TITLE, root).text_content().split()[0]
+
+        if len(reviews) == 0:
+            print('No reviews found for drug %s' % drug_name)
+            return []
+
+        rows = []
+        for review in reviews:
+            row = {'comment': find_first(_COMMENT, review).text_content()[:-7]}
+            rating = find_first(_RATING, review)
+            row['rating'] = float(rating.text_content()) if rating is not None else None
+            row['date'] = find_first(_DATE, review).get('content')
+            row['drug'] = drug_name
+            if self.collect_urls:
+                row['url'] = url
+            rows.append(row)
+        return rows
 
-        page = requests.get(url)
-        soup = BeautifulSoup(page.text, 'html.parser')
+    def parse_page_soup(self, soup, url):
+        """
+        Parses the reviews on one page of EverydayHealth drug reviews (parsed with BeautifulSoup)
+        :param soup: (BeautifulSoup) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, and url (if specified))
+            for each review on the page
+        """
         reviews = soup.find_all('div', {'itemprop': 'review'})
         drug_name = soup.find('title').text.split()[0]
 
         if len(reviews) == 0:
             print('No reviews found for drug %s' % drug_name)
-            return
+            return []
 
+        rows = []
         for review in reviews:
             row = {'comment': review.find('p', {'itemprop': 'reviewBody'}).text[:-7]}
-            if type(row['comment']) == float:
-                print('Skipping invalid comment (Not a string)')
-                continue
-            row['rating'] = None
-            if review.find('span', {'itemprop': 'reviewRating'}):
-                row['rating'] = float(review.find('span', {'itemprop': 'reviewRating'}).text)
+            rating = review.find('span', {'itemprop': 'reviewRating'})
+            row['rating'] = float(rating.text) if rating else None
             row['date'] = review.find('span', {'class': 'time'}).attrs['content']
             row['drug'] = drug_name
             if self.collect_urls:
                 row['url'] = url
-            self.reviews.append(row)
+            rows.append(row)
+        return rows
 
-    def scrape(self, url):
+    def parse_front_page_lxml(self, root):
         """
-        Scrapes all review pages for a given drug on EverydayHealth into 'reviews' attribute
-        :param url: (str) url to the first page of drug reviews for this drug
+        Checks that the first page of a drug's EverydayHealth reviews (parsed with lxml) is valid
+        and gets its number of review pages
+        :param root: (lxml.html.HtmlElement) parsed first review page
+        :return: (int) number of review pages
         """
-        super().scrape(url)
-        front_page = requests.get(url)
-        front_page_soup = BeautifulSoup(front_page.text, 'html.parser')
-
-        try:
-            drug_name = front_page_soup.find('span', {'itemprop': 'name'}).text
-        except AttributeError:
-            print('Invalid URL entered: %s' % url)
-            return 0
+        drug_name = find_first(_DRUG_NAME, root).text_content()
 
         print('Scraping EverydayHealth for %s Reviews...' % drug_name)
-        num_pages = max_pages(url)
+        return max_pages_lxml(root)
 
-        for i in tqdm(range(num_pages)):
-            page_url = url + '/' + str(i + 1)
-            self.scrape_page(page_url)
+    def parse_front_page_soup(self, soup):
+        """
+        Checks that the first page of a drug's EverydayHealth reviews (parsed with BeautifulSoup) is valid
+        and gets its number of review pages
+        :param soup: (BeautifulSoup) parsed first review page
+        :return: (int) number of review pages
+        """
+        drug_name = soup.find('span', {'itemprop': 'name'}).text
+
+        print('Scraping EverydayHealth for %s Reviews...' % drug_name)
+        return max_pages_soup(soup)
+
+    def page_url(self, url, index):
+        """
+        Builds the url of one of a drug's EverydayHealth review pages
+        :param url: (str) url to the first page of drug reviews for this drug
+        :param index: (int) index of the review page (starting from 0)
+        :return: (str) url of the review page
+        """
+        return url + '/' + str(index + 1)
 
     def get_url(self, drug_name):
         """
@@ -94,10 +151,10 @@ class EverydayHealthScraper(Scraper):
         if len(drug_name) < 4:
             print('%s name too short; Please manually search for such reviews' % drug_name)
             return None
-        drug = re.sub('\s+', '-', drug_name.lower())
+        drug = re.sub(r'\s+', '-', drug_name.lower())
         search_url = 'https://www.everydayhealth.com/drugs/' + drug + '/reviews'
-        page = requests.get(search_url)
-        search_soup = BeautifulSoup(page.text, 'html.parser')
+        page = self.fetch_page(search_url)
+        search_soup = BeautifulSoup(page, 'html.parser')
 
         review_url = None
         if 'Reviews' in search_soup.find('title').text.split():
@@ -109,11 +166,21 @@ class EverydayHealthScraper(Scraper):
 def max_pages(input_url):
     """
     Get the number of review pages for a given drug
+    (downloads the page; scrapers read the number of pages from the first page they already
+    downloaded, with max_pages_soup or max_pages_lxml)
     :param input_url: (str) first page of reviews for a drug
     :return pages: (int) number of review pages on EverydayHealth.com for the drug
     """
     page = requests.get(input_url)
-    soup = BeautifulSoup(page.text, 'html.parser')
+    return max_pages_soup(BeautifulSoup(page.text, 'html.parser'))
+
+
+def max_pages_soup(soup):
+    """
+    Get the number of review pages for a given drug
+    :param soup: (BeautifulSoup) parsed first page of reviews for a drug
+    :return pages: (int) number of review pages on EverydayHealth.com for the drug
+    """
 
     if soup.find('div', {'class': 'review-details clearfix'}):
         total_reviews_head = soup.find('div', {'class': 'review-details clearfix'}).find('h5').find('span', {
@@ -128,3 +195,21 @@ def max_pages(input_url):
 
     print('Found %d reviews (%d pages).' % (total_reviews, pages))
     return pages
+
+
+def max_pages_lxml(root):
+    """
+    Get the number of review pages for a given drug
+    :param root: (lxml.html.HtmlElement) first page of reviews for a drug, parsed with lxml
+    :return pages: (int) number of review pages on EverydayHealth.com for the drug
+    """
+    total_reviews_head = find_first(_TOTAL_REVIEWS, root)
+    if total_reviews_head is None:
+        return 0
+
+    total_reviews = int(total_reviews_head.text_content())
+    max_pages_foot = find_first(_PAGINATION, root).text_content().split()
+    pages = int(max_pages_foot[2])
+
+    print('Found %d reviews (%d pages).' % (total_reviews, pages))
+    return pages
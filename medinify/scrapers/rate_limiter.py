@@ -0,0 +1,44 @@
+"""
+Per-host request rate limiting for drug forum scrapers
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """
+    The RateLimiter class spaces out requests made to the same host so that no host
+    receives more than requests_per_second requests per second
+    It is thread-safe, so one RateLimiter can be shared by all of a scraper's fetch threads
+    (and by several scrapers that crawl the same site)
+
+    Attributes:
+        requests_per_second:    (float or None) Maximum request rate per host (None for no limit)
+    """
+    def __init__(self, requests_per_second=None):
+        """
+        Constructor for RateLimiter
+        :param requests_per_second: (float or None) maximum number of requests per second
+            sent to any one host, or None to not limit requests
+        """
+        self.requests_per_second = requests_per_second
+        self._next_request_times = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """
+        Blocks until a request to the host of url is allowed, then reserves that request's time slot
+        :param url: (str) url about to be requested
+        """
+        if not self.requests_per_second:
+            return
+        host = urlparse(url).netloc
+        interval = 1.0 / self.requests_per_second
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_times.get(host, now))
+            self._next_request_times[host] = request_time + interval
+        delay = request_time - now
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,113 @@
+"""
+On-disk cache of downloaded review pages, so that re-running a collection
+(e.g. after fixing a parser) doesn't download every page again
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+class ResponseCache:
+    """
+    The ResponseCache class stores downloaded pages on disk, one file per url (named by the hash
+    of the url), along with the ETag and Last-Modified headers needed to cheaply revalidate them
+    Total cache size is bounded: when it grows past max_size, the least recently used pages are evicted
+    In offline mode, scrapers read pages only from the cache and never touch the network
+
+    Attributes:
+        directory:  (str) Directory cached pages are stored in
+        max_size:   (int) Maximum total size of cached pages, in bytes
+        offline:    (Boolean) Whether scrapers should only read pages from the cache
+    """
+    def __init__(self, directory, max_size=2 ** 30, offline=False):
+        """
+        Constructor for ResponseCache
+        :param directory: (str) directory to store cached pages in (created if it doesn't exist)
+        :param max_size: (int) maximum total size of cached pages, in bytes
+        :param offline: (Boolean) whether scrapers should only read pages from the cache (offline replay)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.offline = offline
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._entry_paths())
+
+    def get(self, url):
+        """
+        Looks up a cached page (and marks it as recently used)
+        :param url: (str) url of the page
+        :return: (dict or None) cached entry ('url', 'body', 'etag', 'last_modified'), or None if not cached
+        """
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if entry['url'] != url:
+            return None
+        return entry
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Stores a downloaded page, evicting least recently used pages if the cache grows too large
+        :param url: (str) url of the page
+        :param body: (str) html of the page
+        :param etag: (str or None) the response's ETag header
+        :param last_modified: (str or None) the response's Last-Modified header
+        """
+        path = self._path(url)
+        entry = {'url': url, 'body': body, 'etag': etag, 'last_modified': last_modified}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+            self._size += os.path.getsize(path) - old_size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """
+        Removes least recently used pages until the cache is back under 90% of max_size
+        (called with the lock held)
+        """
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        self._size = sum(entry[1] for entry in entries)
+        for _, size, path in sorted(entries):
+            if self._size <= 0.9 * self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def _path(self, url):
+        """
+        :param url: (str) url of a page
+        :return: (str) path of the page's cache file
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _entry_paths(self):
+        """
+        :return: (generator[str]) paths of all cache files
+        """
+        for directory_path, _, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if file_name.endswith('.json'):
+                    yield os.path.join(directory_path, file_name)
@@ -23,7 +23,15 @@ Currently, Medinify can specifically scrape certain data from the following webs
 
     (Additionally, review URLs and associated drug names can be stored alongside each review's scraped data)
 """
+import os
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from bs4 import BeautifulSoup
+from tqdm import tqdm
+from medinify.scrapers.rate_limiter import RateLimiter
+from medinify.scrapers.utils import create_session, lxml_available, parse_lxml, read_json, write_json, review_key
 
 
 class Scraper(ABC):
@@ -34,14 +42,46 @@ class Scraper(ABC):
     Attributes:
         collect_urls:   (Boolean) Whether or not to collect each review's associated url
         reviews:        (list[dict]) Scraped review data
+        max_in_flight:  (int) Maximum number of pages downloaded at the same time
+        rate_limiter:   (RateLimiter) Limits how many requests per second are sent to each host
+        session:        (requests.Session) Pooled keep-alive session all pages are downloaded through
+        timeout:        (float) Seconds to wait for a server response before giving up on a request
+        cache:          (ResponseCache or None) On-disk cache of downloaded pages
+        newest_first:   (Boolean) Whether the site lists a drug's reviews newest first
+                            (so incremental scraping can stop at the first already collected review)
+        parser:         (str) How pages are parsed ('lxml' (fast, precompiled XPath selectors)
+                            or 'beautifulsoup')
     """
-    def __init__(self, collect_urls=False):
+    newest_first = False
+
+    def __init__(self, collect_urls=False, max_in_flight=4, requests_per_second=None,
+                 retries=3, backoff_factor=0.5, timeout=30, cache=None, parser=None, rate_limiter=None):
         """
         Standard constructor for all drug forum scrapers
         :param collect_urls: (Boolean) whether or not to collects the urls associated with each review
+        :param max_in_flight: (int) maximum number of review pages to download concurrently
+        :param requests_per_second: (float or None) maximum number of requests per second to send
+            to any one host (None for no limit)
+        :param retries: (int) how many times to retry a request that fails (connection error or 429/5xx)
+        :param backoff_factor: (float) base delay (seconds) for the exponential backoff between retries
+        :param timeout: (float) seconds to wait for a server response before giving up on a request
+        :param cache: (ResponseCache or None) on-disk cache to store downloaded pages in and replay them from
+        :param parser: (str) 'lxml' or 'beautifulsoup' (defaults to 'lxml' if it is installed)
+        :param rate_limiter: (RateLimiter or None) rate limiter shared with other scrapers of the same site
+            (if given, requests_per_second is ignored)
         """
         self.collect_urls = collect_urls
         self.reviews = []
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_second)
+        self.session = create_session(pool_size=max_in_flight, retries=retries, backoff_factor=backoff_factor)
+        self.timeout = timeout
+        self.cache = cache
+        if not parser:
+            parser = 'lxml' if lxml_available() else 'beautifulsoup'
+        assert parser in ['lxml', 'beautifulsoup'], 'parser must be \'lxml\' or \'beautifulsoup\''
+        assert parser != 'lxml' or lxml_available(), 'lxml is not installed'
+        self.parser = parser
 
     @abstractmethod
     def scrape_page(self, url):
@@ -52,19 +92,273 @@ class Scraper(ABC):
         """
         pass
 
+    def parse_page(self, page, url):
+        """
+        Parses the reviews data on one (already downloaded and parsed) review page
+        :param page: (lxml.html.HtmlElement or BeautifulSoup) parsed review page
+        :param url: (str) url the page was downloaded from
+        :return: (list[dict]) review data for each review on the page
+        """
+        if self.parser == 'lxml':
+            return self.parse_page_lxml(page, url)
+        return self.parse_page_soup(page, url)
+
+    def parse_front_page(self, page):
+        """
+        Checks that the first page of a drug's reviews is a valid reviews page and reads how
+        many review pages the drug has (raises an AssertionError or AttributeError if invalid)
+        :param page: (lxml.html.HtmlElement or BeautifulSoup) parsed first review page
+        :return: (int) number of review pages
+        """
+        if self.parser == 'lxml':
+            return self.parse_front_page_lxml(page)
+        return self.parse_front_page_soup(page)
+
+    @abstractmethod
+    def parse_page_lxml(self, root, url):
+        """
+        parse_page using lxml and precompiled XPath selectors
+        :param root: (lxml.html.HtmlElement) parsed review page
+        :param url: (str) url the page was downloaded from
+        :return: (list[dict]) review data for each review on the page
+        """
+        pass
+
+    @abstractmethod
+    def parse_page_soup(self, soup, url):
+        """
+        parse_page using BeautifulSoup
+        :param soup: (BeautifulSoup) parsed review page
+        :param url: (str) url the page was downloaded from
+        :return: (list[dict]) review data for each review on the page
+        """
+        pass
+
     @abstractmethod
-    def scrape(self, url):
+    def parse_front_page_lxml(self, root):
+        """
+        parse_front_page using lxml and precompiled XPath selectors
+        :param root: (lxml.html.HtmlElement) parsed first review page
+        :return: (int) number of review pages
+        """
+        pass
+
+    @abstractmethod
+    def parse_front_page_soup(self, soup):
+        """
+        parse_front_page using BeautifulSoup
+        :param soup: (BeautifulSoup) parsed first review page
+        :return: (int) number of review pages
+        """
+        pass
+
+    @abstractmethod
+    def page_url(self, url, index):
+        """
+        Builds the url of one of a drug's review pages
+        :param url: (str) url for the first page of reviews for this drug
+        :param index: (int) index of the review page (starting from 0)
+        :return: (str) url of the review page
+        """
+        pass
+
+    def scrape(self, url, seen=None):
         """
         Scrapes all the review data for a particular drug on a particular drug review forum
         Scraped data is stored in scraper's review attribute
         (If scraper already has scraped review data, it is discarded before continued scraping)
         :param url: (str) url for the first page of reviews for this drug
+        :param seen: (set[str] or None) keys (see review_key) of already collected reviews;
+            if given, only new reviews are scraped (see iter_reviews)
         """
         if len(self.reviews) > 0:
             print('Clearing scraper\'s pre-existent dataset of {} '
                   'collected reviews...'.format(len(self.reviews)))
             self.reviews = []
 
+        front_page = self.read_front_page(url)
+        if not front_page:
+            return 0
+        self.reviews.extend(self.iter_front_page_reviews(url, *front_page, seen=seen))
+
+    def iter_reviews(self, url, seen=None):
+        """
+        Scrapes all the review data for a particular drug on a particular drug review forum,
+        yielding each review as soon as its page is parsed (instead of storing all of them
+        in the 'reviews' attribute), so reviews can be written out as they are collected
+        Yields nothing if the url is not a valid reviews page
+        If keys of already collected reviews are given (incremental scraping), those reviews are
+        skipped, and on sites that list reviews newest first, paging stops at the first of them
+        (so recrawling a drug only downloads the pages with new reviews)
+        :param url: (str) url for the first page of reviews for this drug
+        :param seen: (set[str] or None) keys (see review_key) of already collected reviews
+        :return: (generator[dict]) review data, in page order
+        """
+        front_page = self.read_front_page(url)
+        if front_page:
+            yield from self.iter_front_page_reviews(url, *front_page, seen=seen)
+
+    def read_front_page(self, url):
+        """
+        Downloads and checks the first page of a drug's reviews
+        (the first page is only downloaded and parsed once: it is used to check the url,
+        to find the number of review pages, and for its reviews)
+        :param url: (str) url for the first page of reviews for this drug
+        :return: (tuple or None) the parsed first page and the number of review pages,
+            or None if the url is not a valid reviews page
+        """
+        front_page = self.parse_html(self._fetch_review_page(self.page_url(url, 0)))
+        try:
+            num_pages = self.parse_front_page(front_page)
+        except (AssertionError, AttributeError):
+            print('Invalid URL entered: %s' % url)
+            return None
+        return front_page, num_pages
+
+    def iter_front_page_reviews(self, url, front_page, num_pages, seen=None):
+        """
+        Yields the reviews on a drug's (already downloaded) first review page, then
+        concurrently downloads the rest of its review pages and yields their reviews
+        :param url: (str) url for the first page of reviews for this drug
+        :param front_page: (lxml.html.HtmlElement or BeautifulSoup) parsed first review page
+        :param num_pages: (int) number of review pages
+        :param seen: (set[str] or None) keys (see review_key) of already collected reviews to skip
+        :return: (generator[dict]) review data, in page order
+        """
+        if num_pages == 0:
+            return
+        if seen is not None:
+            yield from self.iter_new_reviews(self.iter_front_page_reviews(url, front_page, num_pages), seen)
+            return
+        yield from self.parse_page(front_page, self.page_url(url, 0))
+        yield from self.iter_pages([self.page_url(url, i) for i in range(1, num_pages)])
+
+    def iter_new_reviews(self, reviews, seen):
+        """
+        Skips already collected reviews (and, if the site lists reviews newest first,
+        stops at the first already collected review, so no more pages are downloaded)
+        :param reviews: (generator[dict]) scraped review data
+        :param seen: (set[str]) keys (see review_key) of already collected reviews
+        :return: (generator[dict]) new review data
+        """
+        try:
+            for review in reviews:
+                if review_key(review) in seen:
+                    if self.newest_first:
+                        return
+                    continue
+                yield review
+        finally:
+            reviews.close()
+
+    def parse_html(self, page):
+        """
+        Parses a downloaded page with the scraper's parser
+        :param page: (str) html of the page
+        :return: (lxml.html.HtmlElement or BeautifulSoup) parsed page
+        """
+        if self.parser == 'lxml':
+            return parse_lxml(page)
+        return BeautifulSoup(page, 'html.parser')
+
+    def fetch_page(self, url):
+        """
+        Downloads one page through the scraper's session
+        (waiting first if the host's rate limit requires it)
+        If the scraper has a cache, a cached page is revalidated with a conditional request
+        (and not downloaded again if unchanged, or if the server answers with an error);
+        in offline mode it is returned without any request
+        :param url: (str) url of the page to download
+        :return: (str) html of the page
+        """
+        if not self.cache:
+            self.rate_limiter.wait(url)
+            return self.session.get(url, timeout=self.timeout).text
+
+        cached = self.cache.get(url)
+        if self.cache.offline:
+            if not cached:
+                raise FileNotFoundError('Page not found in cache (offline mode): %s' % url)
+            return cached['body']
+
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        self.rate_limiter.wait(url)
+        page = self.session.get(url, headers=headers, timeout=self.timeout)
+        if page.status_code == 200:
+            self.cache.put(url, page.text, etag=page.headers.get('ETag'),
+                           last_modified=page.headers.get('Last-Modified'))
+            return page.text
+        if cached:
+            return cached['body']
+        return page.text
+
+    def _fetch_review_page(self, url):
+        """
+        Downloads one review page (used by read_front_page and fetch_pages' fetch threads), treating
+        a request that fails (connection error, timeout, or retries used up), or a page missing from
+        the cache in offline mode, like an error page, so one page that can't be downloaded doesn't
+        end the crawl
+        :param url: (str) url of the page to download
+        :return: (str) html of the page ('' if it couldn't be downloaded)
+        """
+        try:
+            return self.fetch_page(url)
+        except (requests.RequestException, FileNotFoundError) as e:
+            print('Download of %s failed: %s' % (url, e))
+            return ''
+
+    def fetch_pages(self, urls):
+        """
+        Downloads pages concurrently, with at most max_in_flight requests in flight at once,
+        and yields each page's html in the same order as urls (so reviews stay in page order)
+        Only a bounded window of pages is downloaded ahead of the consumer
+        (a page that can't be downloaded is yielded as an empty page, see _fetch_review_page)
+        :param urls: (list[str]) urls of the pages to download
+        :return: (generator[str]) html of each page
+        """
+        urls = iter(urls)
+        window = 2 * self.max_in_flight
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            pending = deque()
+            try:
+                for url in urls:
+                    pending.append(executor.submit(self._fetch_review_page, url))
+                    if len(pending) == window:
+                        break
+                while pending:
+                    page = pending.popleft().result()
+                    for url in urls:
+                        pending.append(executor.submit(self._fetch_review_page, url))
+                        break
+                    yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def scrape_pages(self, urls):
+        """
+        Concurrently downloads a drug's review pages and collects their reviews,
+        in page order, into the 'reviews' attribute
+        :param urls: (list[str]) urls of the review pages to scrape
+        """
+        self.reviews.extend(self.iter_pages(urls))
+
+    def iter_pages(self, urls):
+        """
+        Concurrently downloads a drug's review pages and yields their reviews, in page order
+        (pages that couldn't be downloaded are skipped)
+        :param urls: (list[str]) urls of the review pages to scrape
+        :return: (generator[dict]) review data
+        """
+        pages = tqdm(self.fetch_pages(urls), total=len(urls))
+        for url, page in zip(urls, pages):
+            if page:
+                yield from self.parse_page(self.parse_html(page), url)
+
     @abstractmethod
     def get_url(self, drug_name):
         """
@@ -74,37 +368,70 @@ class Scraper(ABC):
         """
         pass
 
-    def get_urls(self, drug_names_file, output_file=None):
+    def get_urls(self, drug_names_file, output_file=None, url_cache_file=None, not_found_file=None,
+                 batch_size=50):
         """
         Given a text file containing drug names (one name per line), collects
         the urls for each drug name, and either writes those urls to a file,
         one url per line (if an output file is specified), or returns urls as a list[str]
+        Names are searched for concurrently (max_in_flight at a time), in batches of batch_size
+        If a url cache file is given, names already searched for (by a scraper for the same site)
+        are read from it instead of searched for again, and new results are saved to it after each batch
         :param drug_names_file: (str) path to file containing drug names
         :param output_file: (str) path to output drug urls file
+        :param url_cache_file: (str) path to a json file caching each drug name's url
+        :param not_found_file: (str) path to write the names of drugs without urls to, one per line
+            (defaults to <output_file>_not_found.txt if an output file is specified)
+        :param batch_size: (int) number of names searched for between saves of the url cache
         """
-        review_urls = []
-        not_found_drugs = []
         with open(drug_names_file, 'r') as f:
-            for line in f.readlines():
-                drug_name = line.strip()
-                drug_review_url = self.get_url(drug_name)
-                if drug_review_url:
-                    review_urls.append(drug_review_url)
-                else:
-                    not_found_drugs.append(drug_name)
+            drug_names = [line.strip() for line in f.readlines()]
+
+        url_cache = read_json(url_cache_file, default={})
+        site_urls = url_cache.setdefault(self.nickname, {})
+        unique_names = list(dict.fromkeys(drug_names))
+        new_names = [name for name in unique_names if name not in site_urls]
+        if len(new_names) < len(unique_names):
+            print('Found cached urls for %d drug names.' % (len(unique_names) - len(new_names)))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for batch_start in tqdm(range(0, len(new_names), batch_size)):
+                batch = new_names[batch_start:batch_start + batch_size]
+                for drug_name, url in zip(batch, executor.map(self._search_url, batch)):
+                    if url is not False:
+                        site_urls[drug_name] = url
+                if url_cache_file:
+                    write_json(url_cache_file, url_cache)
+
+        review_urls = [site_urls[name] for name in drug_names if site_urls.get(name)]
+        not_found_drugs = [name for name in drug_names if not site_urls.get(name)]
+        print('No urls found for %d drugs: %s' % (
+            len(not_found_drugs), ', '.join(not_found_drugs)))
+        if output_file and not not_found_file:
+            not_found_file = os.path.splitext(output_file)[0] + '_not_found.txt'
+        if not_found_file:
+            with open(not_found_file, 'w') as not_found_f:
+                for drug_name in not_found_drugs:
+                    not_found_f.write(drug_name + '\n')
         if output_file:
             with open(output_file, 'w') as url_f:
                 for url in review_urls:
                     url_f.write(url + '\n')
             print('Wrote review url file.')
-            print('No urls found for %d drugs: %s' % (
-                len(not_found_drugs), ', '.join(not_found_drugs)))
         else:
-            print('No urls found for %d drugs: %s' % (
-                len(not_found_drugs), ', '.join(not_found_drugs)))
             return review_urls
 
-
-
-
-
+    def _search_url(self, drug_name):
+        """
+        Searches for a drug's reviews url (used by get_urls' fetch threads)
+        :param drug_name: (str) drug name
+        :return: (str, None, or False) drug url if found, None if not found,
+            or False if the search failed (so the name isn't cached and is searched for again next time)
+            (a search fails if its request fails, if its page isn't cached in offline mode,
+            or if the search page can't be parsed)
+        """
+        try:
+            return self.get_url(drug_name)
+        except (requests.RequestException, FileNotFoundError, AttributeError) as e:
+            print('Search for %s failed: %s' % (drug_name, e))
+            return False
@@ -0,0 +1,185 @@
+"""
+Medinify scraper utility functions
+"""
+import functools
+import hashlib
+import json
+import os
+import random
+import tempfile
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:
+    etree = None
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _JitteredRetry(Retry):
+    """
+    urllib3 Retry policy that adds random jitter to the exponential backoff between
+    retries, so concurrent fetch threads don't all retry a struggling host at the same moment
+    """
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return 0
+        return backoff + random.uniform(0, backoff)
+
+
+def create_session(pool_size=4, retries=3, backoff_factor=0.5):
+    """
+    Creates a requests Session that keeps connections alive and reuses them across requests,
+    and that retries failed requests (connection errors and 429/5xx responses) with
+    exponential backoff and jitter
+    :param pool_size: (int) maximum number of connections kept open per host
+        (should be at least the number of threads sharing the session)
+    :param retries: (int) how many times to retry a failed request
+    :param backoff_factor: (float) base delay (in seconds) for exponential backoff between retries
+    :return session: (requests.Session) pooled session
+    """
+    retry = _JitteredRetry(total=retries, backoff_factor=backoff_factor,
+                           status_forcelist=RETRY_STATUSES, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def lxml_available():
+    """
+    :return: (Boolean) whether lxml is installed (and the fast lxml parser can be used)
+    """
+    return etree is not None
+
+
+def parse_lxml(page):
+    """
+    Parses html with lxml
+    (the page is parsed as utf-8 bytes, since lxml doesn't accept strings that declare an encoding;
+    an empty page, e.g. one that failed to download, parses as an empty document)
+    :param page: (str) html
+    :return: (lxml.html.HtmlElement) root of the parsed page
+    """
+    if not page.strip():
+        return lxml.html.fromstring('<html></html>')
+    return lxml.html.fromstring(page.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+
+def xpath(expression):
+    """
+    Precompiles an XPath selector, so it isn't recompiled for every page and review
+    :param expression: (str) XPath expression
+    :return: (lxml.etree.XPath or None) compiled selector (None if lxml isn't installed)
+    """
+    if etree is None:
+        return None
+    return etree.XPath(expression, smart_strings=False)
+
+
+def has_class(class_name):
+    """
+    Builds an XPath predicate matching elements that have class_name among their classes
+    (the way BeautifulSoup matches a class)
+    :param class_name: (str) class name
+    :return: (str) XPath predicate
+    """
+    return 'contains(concat(" ", normalize-space(@class), " "), " %s ")' % class_name
+
+
+def find_first(selector, node):
+    """
+    Gets the first element matched by a compiled selector
+    :param selector: (lxml.etree.XPath) compiled selector
+    :param node: (lxml.html.HtmlElement) element to search in
+    :return: (lxml.html.HtmlElement or None) first match, or None if nothing matches
+    """
+    matches = selector(node)
+    return matches[0] if matches else None
+
+
+def count_pages(total_reviews, reviews_per_page):
+    """
+    Gets the number of review pages needed to show a drug's reviews
+    :param total_reviews: (int) total number of reviews for the drug
+    :param reviews_per_page: (int) number of reviews shown per page
+    :return pages: (int) number of review pages
+    """
+    pages = total_reviews // reviews_per_page
+    if total_reviews % reviews_per_page != 0:
+        pages += 1
+
+    print('Found %d reviews (%d pages).' % (total_reviews, pages))
+    return pages
+
+
+def read_json(path, default=None):
+    """
+    Reads a json file
+    :param path: (str) path to the json file
+    :param default: value returned if the file doesn't exist
+    :return: contents of the file
+    """
+    if not path or not os.path.exists(path):
+        return default
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    """
+    Writes a json file atomically (so an interrupted write never leaves a broken file)
+    :param path: (str) path to the json file
+    :param data: data to write
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(file_descriptor, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def review_key(review):
+    """
+    Gets a key identifying a review (a hash of its drug, date, and comment), used to
+    recognize reviews that were already collected
+    (the date is keyed by day (see normalize_date), so scraped date strings match the same
+    dates once a dataset is compacted or loaded from a review store)
+    :param review: (dict) review data (as scraped, or a row of a collected dataset)
+    :return: (str) review key
+    """
+    fields = dict(review, date=normalize_date(review.get('date', '')))
+    text = '\x1f'.join([str(fields.get(field, '')) for field in ['drug', 'date', 'comment']])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def normalize_date(date):
+    """
+    Normalizes a review date to an ISO format day ('YYYY-MM-DD'), whether it is a date string
+    in any of the formats scraped from review sites or a parsed datetime
+    :param date: (str, datetime, or None) review date
+    :return: (str) ISO format day (or the date unchanged if it can't be parsed, '' if missing)
+    """
+    if date is None or (not isinstance(date, str) and pd.isnull(date)):
+        return ''
+    if hasattr(date, 'strftime'):
+        return date.strftime('%Y-%m-%d')
+    return _normalize_date_string(str(date))
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_date_string(date):
+    """
+    normalize_date for date strings (each distinct string is only parsed once)
+    :param date: (str) date string
+    :return: (str) ISO format day, or the date string unchanged if it can't be parsed
+    """
+    timestamp = pd.to_datetime(date, errors='coerce')
+    return date if pd.isnull(timestamp) else timestamp.strftime('%Y-%m-%d')
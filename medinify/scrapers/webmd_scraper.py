@@ -15,9 +15,18 @@ import re
 import requests
 from bs4 import BeautifulSoup
 from medinify.scrapers.scraper import Scraper
-from tqdm import tqdm
+from medinify.scrapers.utils import xpath, has_class, find_first, count_pages
 import string
 
+_TITLE = xpath('//h1')
+_HEADING = xpath('//div[@id="heading"]')
+_TOTAL_REVIEWS = xpath('//span[%s]' % has_class('totalreviews'))
+_REVIEWS = xpath('//div[%s]' % has_class('userPost'))
+_COMMENT = xpath('string(.//p[starts-with(@id, "comFul")])')
+_RATINGS = xpath('.//span[%s]' % has_class('current-rating'))
+_DATE = xpath('string(.//div[%s])' % has_class('date'))
+_REVIEWER = xpath('string(.//p[%s])' % has_class('reviewerInfo'))
+
 
 class WebMDScraper(Scraper):
     """
@@ -30,16 +39,19 @@ class WebMDScraper(Scraper):
     """
 
     nickname = 'webmd'
+    newest_first = True
 
-    def __init__(self, collect_user_ids=False, collect_urls=False):
+    def __init__(self, collect_user_ids=False, collect_urls=False, **kwargs):
         """
         Constructor for WebMD scraper, used to collecting review data from WebMD.com
         Sets up what data ought to be collected, and sets up how that data will be
         stored (in the list attribute 'reviews')
         :param collect_user_ids: (Boolean) whether or not this scraper will collect user ids
         :param collect_urls: (Boolean) whether or not this scraper will collect each drug review's associated url
+        :param kwargs: page fetching options passed on to Scraper (max_in_flight,
+            requests_per_second, retries, backoff_factor, timeout, cache, parser, rate_limiter)
         """
-        super().__init__(collect_urls=collect_urls)
+        super().__init__(collect_urls=collect_urls, **kwargs)
         self.collect_user_ids = collect_user_ids
 
     def scrape_page(self, url):
@@ -50,16 +62,57 @@ class WebMDScraper(Scraper):
         :param url: (str) the url for the page to be scraped
         """
         assert url[:39] == 'https://www.webmd.com/drugs/drugreview-', 'Url must be link to a WebMD reviews page'
+        reviews = self.parse_page(self.parse_html(self.fetch_page(url)), url)
+        self.reviews.extend(reviews)
+        if not reviews:
+            return 0
+
+    def parse_page_lxml(self, root, url):
+        """
+        Parses the reviews on one page of WebMD drug reviews (parsed with lxml)
+        :param root: (lxml.html.HtmlElement) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, user id (if specified),
+            and url (if specified)) for each review on the page
+        """
+        drug_name = find_first(_TITLE, root).text_content().replace('User Reviews & Ratings - ', '')
+        reviews = _REVIEWS(root)
+
+        if len(reviews) == 0:
+            print('No reviews found for drug %s' % drug_name)
+            return []
+
+        rows = []
+        for review in reviews:
+            row = {'comment': re.sub('Comment:|Hide Full Comment', '', _COMMENT(review))}
+            rates = [float(x.text_content().replace('Current Rating:', '').strip()) for x in _RATINGS(review)]
+            row['rating'] = {'effectiveness': rates[0], 'ease of use': rates[1], 'satisfaction': rates[2]}
+            row['date'] = _DATE(review)
+            row['drug'] = drug_name
 
-        page = requests.get(url)
-        soup = BeautifulSoup(page.text, 'html.parser')
+            if self.collect_urls:
+                row['url'] = url
+            if self.collect_user_ids:
+                row['user id'] = _REVIEWER(review).replace('Reviewer: ', '').strip()
+            rows.append(row)
+        return rows
+
+    def parse_page_soup(self, soup, url):
+        """
+        Parses the reviews on one page of WebMD drug reviews (parsed with BeautifulSoup)
+        :param soup: (BeautifulSoup) parsed review page
+        :param url: (str) the url the page was downloaded from
+        :return: (list[dict]) review data (comment, rating, date, drug, user id (if specified),
+            and url (if specified)) for each review on the page
+        """
         drug_name = soup.find('h1').text.replace('User Reviews & Ratings - ', '')
         reviews = soup.find_all('div', attrs={'class': 'userPost'})
 
         if len(reviews) == 0:
             print('No reviews found for drug %s' % drug_name)
-            return 0
+            return []
 
+        rows = []
         for review in reviews:
             row = {}
             comment = review.find('p', {'id': re.compile("^comFull*")}).text
@@ -79,38 +132,49 @@ class WebMDScraper(Scraper):
                 row['url'] = url
             if self.collect_user_ids:
                 row['user id'] = review.find('p', {'class': 'reviewerInfo'}).text.replace('Reviewer: ', '').strip()
-            self.reviews.append(row)
+            rows.append(row)
+        return rows
 
-    def scrape(self, url):
+    def parse_front_page_lxml(self, root):
         """
-        Scrapes all review pages for a given drug on WebMD into 'reviews' attribute
-        :param url: (str) url to the first page of drug reviews for this drug
+        Checks that the first page of a drug's WebMD reviews (parsed with lxml) is valid
+        and gets its number of review pages
+        :param root: (lxml.html.HtmlElement) parsed first review page
+        :return: (int) number of review pages
         """
-        super().scrape(url)
-        front_page = requests.get(url)
-        front_page_soup = BeautifulSoup(front_page.text, 'html.parser')
-        try:
-            title = front_page_soup.find('h1').text
-            assert 'User Reviews & Ratings - ' in title
-            drug_name = re.sub('User Reviews & Ratings - ', '', title)
-            drug_name = string.capwords(drug_name)
-        except AssertionError:
-            print('Invalid URL entered: %s' % url)
-            return 0
-        except AttributeError:
-            print('Invalid URL entered: %s' % url)
-            return 0
+        self._print_drug_name(find_first(_TITLE, root).text_content())
+        return max_pages_lxml(root)
 
-        print('Scraping WebMD for %s Reviews...' % drug_name)
+    def parse_front_page_soup(self, soup):
+        """
+        Checks that the first page of a drug's WebMD reviews (parsed with BeautifulSoup) is valid
+        and gets its number of review pages
+        :param soup: (BeautifulSoup) parsed first review page
+        :return: (int) number of review pages
+        """
+        self._print_drug_name(soup.find('h1').text)
+        return max_pages_soup(soup)
 
-        quote_page1 = url + '&pageIndex='
-        quote_page2 = '&sortby=3&conditionFilter=-1'
+    @staticmethod
+    def _print_drug_name(title):
+        """
+        Checks the title of a WebMD reviews page and prints which drug is being scraped
+        :param title: (str) page title
+        """
+        assert 'User Reviews & Ratings - ' in title
+        drug_name = re.sub('User Reviews & Ratings - ', '', title)
+        drug_name = string.capwords(drug_name)
 
-        num_pages = max_pages(url)
+        print('Scraping WebMD for %s Reviews...' % drug_name)
 
-        for i in tqdm(range(num_pages)):
-            page_url = quote_page1 + str(i) + quote_page2
-            self.scrape_page(page_url)
+    def page_url(self, url, index):
+        """
+        Builds the url of one of a drug's WebMD review pages (sorted newest first)
+        :param url: (str) url to the first page of drug reviews for this drug
+        :param index: (int) index of the review page (starting from 0)
+        :return: (str) url of the review page
+        """
+        return url + '&pageIndex=' + str(index) + '&sortby=3&conditionFilter=-1'
 
     def get_url(self, drug_name):
         """
@@ -127,8 +191,8 @@ class WebMDScraper(Scraper):
         name = ''.join([x if x.isalnum() else hex(ord(x)).replace('0x', '%') for x in characters])
 
         search_url = 'https://www.webmd.com/drugs/2/search?type=drugs&query=' + name
-        search_page = requests.get(search_url)
-        search_soup = BeautifulSoup(search_page.text, 'html.parser')
+        search_page = self.fetch_page(search_url)
+        search_soup = BeautifulSoup(search_page, 'html.parser')
 
         review_url = None
 
@@ -138,8 +202,8 @@ class WebMDScraper(Scraper):
         elif search_soup.find('ul', {'class': 'exact-match'}):
             exact_matches = search_soup.find('ul', {'class': 'exact-match'})
             search_link = 'https://www.webmd.com' + exact_matches.find('a').attrs['href']
-            info = requests.get(search_link)
-            info_soup = BeautifulSoup(info.text, 'html.parser')
+            info = self.fetch_page(search_link)
+            info_soup = BeautifulSoup(info, 'html.parser')
             review_url = 'https://www.webmd.com' + info_soup.find('a', {'class': 'drug-review'}).attrs['href']
 
         return review_url
@@ -148,20 +212,40 @@ class WebMDScraper(Scraper):
 def max_pages(input_url):
     """
     Get the number of review pages for a given drug
+    (downloads the page; scrapers read the number of pages from the first page they already
+    downloaded, with max_pages_soup or max_pages_lxml)
     :param input_url: (str) first page of reviews for a drug
     :return pages: (int) number of review pages on WebMD for the drug
     """
     page = requests.get(input_url)
-    soup = BeautifulSoup(page.text, 'html.parser')
+    return max_pages_soup(BeautifulSoup(page.text, 'html.parser'))
+
+
+def max_pages_soup(soup):
+    """
+    Get the number of review pages for a given drug
+    :param soup: (BeautifulSoup) parsed first page of reviews for a drug
+    :return pages: (int) number of review pages on WebMD for the drug
+    """
     if 'Be the first to share your experience with this treatment.' in \
             soup.find('div', {'id': 'heading'}).text:
         return 0
 
     total_reviews_text = soup.find('span', {'class': 'totalreviews'}).text
     total_reviews = [int(s) for s in total_reviews_text.split() if s.isdigit()][0]
-    pages = total_reviews // 5
-    if total_reviews % 5 != 0:
-        pages += 1
+    return count_pages(total_reviews, 5)
+
 
-    print('Found %d reviews (%d pages).' % (total_reviews, pages))
-    return pages
+def max_pages_lxml(root):
+    """
+    Get the number of review pages for a given drug
+    :param root: (lxml.html.HtmlElement) first page of reviews for a drug, parsed with lxml
+    :return pages: (int) number of review pages on WebMD for the drug
+    """
+    if 'Be the first to share your experience with this treatment.' in \
+            find_first(_HEADING, root).text_content():
+        return 0
+
+    total_reviews_text = find_first(_TOTAL_REVIEWS, root).text_content()
+    total_reviews = [int(s) for s in total_reviews_text.split() if s.isdigit()][0]
+    return count_pages(total_reviews, 5)
@@ -3,7 +3,10 @@ from .bow_vectorizer import BowVectorizer
 from .embeddings_vectorizer import EmbeddingsVectorizer
 from .matrix_vectorizer import MatrixVectorizer
 from .pos_vectorizer import PosVectorizer
+from .token_cache import TokenCache
 from .utils import find_embeddings
+from .utils import convert_embeddings
+from .utils import load_embeddings
 from .utils import get_lookup_table
 from .utils import get_pos_list
 
@@ -10,12 +10,15 @@ class BowVectorizer(Vectorizer):
     """
     nickname = 'bow'
 
-    def __init__(self):
+    def __init__(self, batch_size=1000, n_process=1, token_cache=None):
         """
         Constructor for BowVectorizer
         :attribute vectorizer: (CountVectorizer) transforms text into bag-of-words
+        :param batch_size: (int) number of texts to tokenize at once
+        :param n_process: (int) number of processes to tokenize with
+        :param token_cache: (TokenCache) cache of tokenized texts
         """
-        super().__init__()
+        super().__init__(batch_size=batch_size, n_process=n_process, token_cache=token_cache)
         self.vectorizer = CountVectorizer(tokenizer=self.tokenize)
 
     def get_features(self, dataset):
@@ -24,10 +27,29 @@ class BowVectorizer(Vectorizer):
         :param dataset: (Dataset) dataset containing data to be Vectorized
         :return: (scipy.sparse.csr_matrix) bag-of-words representations of texts
         """
-        try:
-            self.vectorizer.vocabulary_
-        except AttributeError:
-            self.vectorizer.fit(dataset.data_table[dataset.text_column])
-        count_vectors = self.vectorizer.transform(dataset.data_table[dataset.text_column])
+        with self.batch_tokenized(dataset.texts()):
+            try:
+                self.vectorizer.vocabulary_
+            except AttributeError:
+                self.vectorizer.fit(dataset.texts())
+            count_vectors = self.vectorizer.transform(dataset.texts())
         return count_vectors
 
+    def fit_stream(self, datasets):
+        """
+        Fits the bag-of-words vocabulary to every chunk of a dataset (in one pass, without
+        loading all of its texts at once)
+        :param datasets: (StreamingDataset) chunks of data to fit to
+        """
+        self.vectorizer.fit(self._iter_batch_tokenized(datasets))
+
+    def _iter_batch_tokenized(self, datasets):
+        """
+        Iterates over the texts of every chunk, each chunk tokenized in a batch
+        :param datasets: (StreamingDataset) chunks of data
+        :return: (iterator[str]) texts
+        """
+        for dataset in datasets:
+            with self.batch_tokenized(dataset.texts()):
+                yield from dataset.texts()
+
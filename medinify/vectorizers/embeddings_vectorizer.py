@@ -1,8 +1,8 @@
 
 from medinify.vectorizers import Vectorizer
-from medinify.vectorizers.utils import find_embeddings
+from medinify.vectorizers.utils import load_embeddings, get_word_index
 import numpy as np
-from gensim.models import KeyedVectors
+from scipy import sparse
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -12,37 +12,130 @@ class EmbeddingsVectorizer(Vectorizer):
     """
     The EmbeddingsVectorizer transforms text data into averaged
     word embeddings representation to be fed into classifier
+    Averages are computed for all texts at once, as a sparse matrix of (weighted) token counts
+    times the embedding matrix, in float32
+    Tokens can be weighted by TF-IDF or SIF (smooth inverse frequency, a / (a + word frequency)),
+    with document and word frequencies from the first dataset vectorized (the training data)
     """
     nickname = 'embedding'
+    precomputable = True
+    weighting = None
+    word_weights = None
+    word_to_index = None
 
-    def __init__(self):
+    def __init__(self, weighting=None, sif_a=1e-3, batch_size=1000, n_process=1, token_cache=None):
         """
         Constructor for EmbeddingsVectorizer
         :attribute w2v: (gensim.models.word2vec) pretrained word embeddings
+        :attribute word_to_index: (dict[str, int]) row of each word in the embedding matrix
+            (shared with other vectorizers using the same embeddings, see get_word_index; built when
+            first needed, and not pickled)
+        :attribute weighting: (str or None) how tokens are weighted ('tfidf', 'sif', or None for a plain average)
+        :attribute sif_a: (float) SIF weighting's smoothing parameter
+        :attribute word_weights: (np.array or None) weight of each word in the embeddings vocab
+            (set when the first dataset is vectorized, if there is a weighting)
+        :param batch_size: (int) number of texts to tokenize at once
+        :param n_process: (int) number of processes to tokenize with
+        :param token_cache: (TokenCache) cache of tokenized texts
         """
-        super().__init__()
-        embeddings_file = find_embeddings()
-        self.w2v = KeyedVectors.load_word2vec_format(embeddings_file)
+        assert weighting in [None, 'tfidf', 'sif'], 'weighting must be \'tfidf\', \'sif\', or None'
+        super().__init__(batch_size=batch_size, n_process=n_process, token_cache=token_cache)
+        self.w2v = load_embeddings()
+        self.weighting = weighting
+        self.sif_a = sif_a
+        # weighted averages depend on the frequencies in the training data, so can't be precomputed
+        self.precomputable = weighting is None
+
+    def __getstate__(self):
+        """
+        Pickles the vectorizer without its word index (rebuilt when first needed)
+        """
+        state = self.__dict__.copy()
+        state.pop('word_to_index', None)
+        return state
 
     def get_features(self, dataset):
         """
         Transforms text from dataset into averaged word embeddings
         :param dataset: (Dataset) dataset containing data to be Vectorized
-        :return: (np.array) averaged embedding representations of texts
-        """
-        comments = dataset.data_table[dataset.text_column]
-        embeddings = np.zeros((dataset.data_table[dataset.text_column].shape[0], self.w2v.vector_size))
-        for i, comment in enumerate(comments):
-            tokens = self.tokenize(comment)
-            all_embeddings = []
-            for token in tokens:
-                try:
-                    all_embeddings.append(self.w2v[token])
-                except KeyError:
-                    continue
-            if len(all_embeddings) == 0:
-                continue
-            else:
-                embeddings[i] = np.average(all_embeddings, axis=0)
+        :return: (np.array) averaged embedding representations of texts (float32)
+        """
+        counts = self.token_counts(self.tokenize_texts(dataset.texts()))
+        if self.weighting and self.word_weights is None:
+            self.fit_weights(counts)
+        return self.average_embeddings(counts)
+
+    def fit_stream(self, datasets):
+        """
+        Sets word weights from document and word frequencies counted chunk by chunk
+        (if there is a weighting)
+        :param datasets: (StreamingDataset) chunks of data to fit to
+        """
+        if not self.weighting:
+            return
+        doc_freqs = word_freqs = 0
+        num_texts = 0
+        for dataset in datasets:
+            counts = self.token_counts(self.tokenize_texts(dataset.texts()))
+            doc_freqs = doc_freqs + np.bincount(counts.indices, minlength=counts.shape[1])
+            word_freqs = word_freqs + np.asarray(counts.sum(axis=0)).ravel()
+            num_texts += counts.shape[0]
+        self._set_weights(doc_freqs, word_freqs, num_texts)
+
+    def token_counts(self, texts_tokens):
+        """
+        Counts the tokens of each text that have embeddings (tokens without embeddings are ignored)
+        :param texts_tokens: (list[list[str]]) tokens of each text
+        :return: (scipy.sparse.csr_matrix) number of times each text (row) has each word in
+            the embeddings vocab (column), in float32
+        """
+        if self.word_to_index is None:
+            self.word_to_index = get_word_index(self.w2v)
+        get_index = self.word_to_index.get
+        indices = np.array([get_index(token, -1) for tokens in texts_tokens for token in tokens], dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts_tokens)), [len(tokens) for tokens in texts_tokens])
+        known = indices >= 0
+        counts = sparse.csr_matrix(
+            (np.ones(known.sum(), dtype=np.float32), (rows[known], indices[known])),
+            shape=(len(texts_tokens), len(self.word_to_index)), dtype=np.float32)
+        counts.sum_duplicates()
+        return counts
+
+    def fit_weights(self, counts):
+        """
+        Sets word weights from the document and word frequencies of texts
+        :param counts: (scipy.sparse.csr_matrix) token counts of texts (see token_counts)
+        """
+        self._set_weights(np.bincount(counts.indices, minlength=counts.shape[1]),
+                          np.asarray(counts.sum(axis=0)).ravel(), counts.shape[0])
+
+    def average_embeddings(self, counts):
+        """
+        Averages the embeddings of each text's tokens (weighted by word_weights, if there are any)
+        :param counts: (scipy.sparse.csr_matrix) token counts of texts (see token_counts)
+        :return: (np.array) averaged embeddings (zeros for texts without tokens that have embeddings)
+        """
+        if self.word_weights is not None:
+            counts = counts @ sparse.diags(self.word_weights)
+        totals = np.asarray(counts.sum(axis=1), dtype=np.float32).ravel()
+        totals[totals == 0] = 1
+        embeddings = np.asarray(counts @ np.asarray(self.w2v.vectors, dtype=np.float32), dtype=np.float32)
+        embeddings /= totals[:, np.newaxis]
         return embeddings
 
+    def _set_weights(self, doc_freqs, word_freqs, num_texts):
+        """
+        Sets word weights
+        TF-IDF uses smoothed inverse document frequencies (log((1 + n) / (1 + df)) + 1, so words
+        not in the training data get the highest weight), SIF uses a / (a + p(word))
+        :param doc_freqs: (np.array) number of texts with each word
+        :param word_freqs: (np.array) number of times each word was used
+        :param num_texts: (int) number of texts
+        """
+        if self.weighting == 'tfidf':
+            weights = np.log((1 + num_texts) / (1 + np.asarray(doc_freqs, dtype=np.float64))) + 1
+        else:
+            word_freqs = np.asarray(word_freqs, dtype=np.float64)
+            probabilities = word_freqs / max(word_freqs.sum(), 1)
+            weights = self.sif_a / (self.sif_a + probabilities)
+        self.word_weights = weights.astype(np.float32)
@@ -1,7 +1,6 @@
 
 from medinify.vectorizers import Vectorizer
-from medinify.vectorizers.utils import find_embeddings
-from gensim.models import KeyedVectors
+from medinify.vectorizers.utils import load_embeddings, get_word_index
 import numpy as np
 
 
@@ -13,19 +12,40 @@ class MatrixVectorizer(Vectorizer):
     creates matrix for word embeddings
     """
     nickname = 'matrix'
+    word_to_index = None
 
-    def __init__(self):
+    def __init__(self, batch_size=1000, n_process=1, token_cache=None):
         """
         Constructor for MatrixVectorizer
         :attribute w2v: (gensim.models.word2vec) pretrained word embeddings
-        :attribute index_to_word: (list[str]) list of words in embeddings vocab,
-            search using .index() to get from token to index
+        :attribute index_to_word: (list[str]) list of words in embeddings vocab
+        :attribute word_to_index: (dict[str, int]) index of each word in index_to_word
+            (shared with other vectorizers using the same embeddings, see get_word_index; built when
+            first needed, and not pickled)
+        :param batch_size: (int) number of texts to tokenize at once
+        :param n_process: (int) number of processes to tokenize with
+        :param token_cache: (TokenCache) cache of tokenized texts
         """
-        super().__init__()
-        embeddings_file = find_embeddings()
-        self.w2v = KeyedVectors.load_word2vec_format(embeddings_file)
+        super().__init__(batch_size=batch_size, n_process=n_process, token_cache=token_cache)
+        self.w2v = load_embeddings()
         self.index_to_word = self.w2v.index2word
 
+    def __getstate__(self):
+        """
+        Pickles the vectorizer without its word index (rebuilt when first needed)
+        """
+        state = self.__dict__.copy()
+        state.pop('word_to_index', None)
+        return state
+
+    def word_index(self):
+        """
+        :return: (dict[str, int]) index of each word in index_to_word (see word_to_index)
+        """
+        if self.word_to_index is None:
+            self.word_to_index = get_word_index(self.w2v)
+        return self.word_to_index
+
     def get_features(self, dataset):
         """
         Transforms text from dataset into arrays of indices
@@ -35,10 +55,11 @@ class MatrixVectorizer(Vectorizer):
         :param dataset: (Dataset) dataset containing data to be Vectorized
         :return: (np.array) arrays of indices in lookup table of embeddings for texts
         """
-        tokens = dataset.data_table.apply(lambda row: self.tokenize(row[dataset.text_column]), axis=1)
-        indices = tokens.apply(lambda row: self.tokens_to_indices(row))
+        tokens = self.tokenize_texts(dataset.data_table[dataset.text_column])
+        indices = np.empty(len(tokens), dtype=object)
+        indices[:] = self.texts_to_indices(tokens)
         dataset.data_table['indices'] = indices
-        dataset.data_table['len'] = dataset.data_table.apply(lambda row: len(row['indices']), axis=1)
+        dataset.data_table['len'] = [len(text_indices) for text_indices in indices]
         dataset.data_table.sort_values('len', inplace=True)
         dataset.data_table = dataset.data_table.loc[dataset.data_table['len'] > 3]
         dataset.data_table = dataset.data_table.drop('len', axis=1)
@@ -47,16 +68,26 @@ class MatrixVectorizer(Vectorizer):
     def tokens_to_indices(self, tokens):
         """
         Transforms list of tokens into an array of indices
+        (index in lookup table, so index_to_word's index + 1; index 0 is for unknown words)
         :param tokens: (list[str]) tokens
         :return: (np.array) indices from/for lookup table
         """
-        indices = np.zeros(len(tokens), dtype=int)
-        for i, token in enumerate(tokens):
-            try:
-                indices[i] = self.index_to_word.index(token) + 1
-            except ValueError:
-                continue
-        return indices
+        get_index = self.word_index().get
+        return np.fromiter((get_index(token, -1) + 1 for token in tokens), dtype=int, count=len(tokens))
+
+    def texts_to_indices(self, texts_tokens):
+        """
+        Transforms the tokens of many texts into arrays of indices at once
+        (all tokens are looked up in one pass, then split back into one array per text)
+        :param texts_tokens: (list[list[str]]) tokens of each text
+        :return: (list[np.array]) indices from/for lookup table, for each text
+        """
+        if len(texts_tokens) == 0:
+            return []
+        get_index = self.word_index().get
+        all_indices = np.array([get_index(token, -1) for tokens in texts_tokens for token in tokens], dtype=int) + 1
+        offsets = np.cumsum([len(tokens) for tokens in texts_tokens])[:-1]
+        return np.split(all_indices, offsets)
 
     def indices_to_tokens(self, indices):
         """
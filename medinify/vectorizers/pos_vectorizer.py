@@ -10,14 +10,20 @@ class PosVectorizer(Vectorizer):
     representations and specified parts of speech removed to be fed into classifier
     """
     nickname = 'pos'
+    # only what's needed for part of speech tags (spacy 2 tags in tagger, spacy 3 maps tags to
+    # parts of speech in attribute_ruler), so the parser and named entity recognizer don't run
+    pipeline_components = ('tok2vec', 'tagger', 'attribute_ruler', 'morphologizer')
 
-    def __init__(self, pos_list=None):
+    def __init__(self, pos_list=None, batch_size=1000, n_process=1, token_cache=None):
         """
         Constructor for PosVectorizer
         :attribute vectorizer: (CountVectorizer) transforms text into bag-of-words
         :attribute pos_list: (list[str]) list of parts for speech to remove
+        :param batch_size: (int) number of texts to tag at once
+        :param n_process: (int) number of processes to tag with
+        :param token_cache: (TokenCache) cache of tokenized texts
         """
-        super().__init__()
+        super().__init__(batch_size=batch_size, n_process=n_process, token_cache=token_cache)
         self.vectorizer = CountVectorizer(tokenizer=self.pos_tokenize)
         with open('./data/pos_tags', 'r') as f:
             valid_tags = set(f.read().splitlines())
@@ -33,11 +39,12 @@ class PosVectorizer(Vectorizer):
         :param dataset: (Dataset) dataset containing data to be Vectorized
         :return: (scipy.sparse.csr_matrix) bag-of-words representations of texts
         """
-        try:
-            self.vectorizer.vocabulary_
-        except AttributeError:
-            self.vectorizer.fit(dataset.data_table[dataset.text_column])
-        count_vectors = self.vectorizer.transform(dataset.data_table[dataset.text_column])
+        with self.batch_tokenized(dataset.texts()):
+            try:
+                self.vectorizer.vocabulary_
+            except AttributeError:
+                self.vectorizer.fit(dataset.texts())
+            count_vectors = self.vectorizer.transform(dataset.texts())
         return count_vectors
 
     def pos_tokenize(self, text):
@@ -46,8 +53,23 @@ class PosVectorizer(Vectorizer):
         :param text: text to be tokenized
         :return: tokens
         """
-        tokens = [token.orth_ for token in self.nlp(text.lower())
-                  if token.orth_ not in self.stops and not token.is_punct | token.is_space
-                  and token.pos_ not in self.pos_list]
-        return tokens
+        return self.tokenize(text)
+
+    def tokenizer_config(self):
+        """
+        :return: (dict) how the Vectorizer tokenizes (see Vectorizer.tokenizer_config),
+            including the parts of speech removed
+        """
+        config = super().tokenizer_config()
+        config['pos_list'] = sorted(self.pos_list)
+        return config
+
+    def _doc_tokens(self, doc):
+        """
+        :param doc: (spacy.tokens.Doc) processed text
+        :return: (list[str]) tokens, without stopwords, punctuation, whitespace, and parts of speech in pos_list
+        """
+        return [token.orth_ for token in doc
+                if token.orth_ not in self.stops and not token.is_punct | token.is_space
+                and token.pos_ not in self.pos_list]
 
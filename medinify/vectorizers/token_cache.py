@@ -0,0 +1,309 @@
+"""
+Cache of tokenized texts, shared by Vectorizers (and, on disk, by separate runs), so the same
+texts aren't tokenized again for every fit, evaluation, cross validation fold, and model
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+
+
+class TokenCache:
+    """
+    The TokenCache class keeps the tokens of texts, keyed by a hash of each text and of the
+    configuration that tokenized it (see Vectorizer.tokenizer_config: spacy model and version,
+    stop words, pipeline components, parts of speech removed), so Vectorizers tokenizing the
+    same way share tokens and Vectorizers tokenizing differently never do
+    Recently used tokens are kept in memory, up to max_size texts (least recently used are
+    evicted first). If a directory is given, tokens are also stored on disk, one subdirectory
+    per configuration, in segments of numpy arrays (sorted text hashes, offsets, and token ids
+    into a vocabulary file) that are memory-mapped when read, so a large corpus is tokenized
+    once per configuration and later runs only page in the tokens they look up
+    Only one process should write to a directory at a time
+
+    Attributes:
+        max_size:       (int) Number of texts whose tokens are kept in memory
+        directory:      (str or None) Directory tokens are stored in (None to only keep them in memory)
+        flush_size:     (int) Number of newly tokenized texts after which they are written to disk
+        num_hits:       (int) Number of texts found in the cache
+        num_misses:     (int) Number of texts that had to be tokenized
+    """
+    max_segments = 8  # segments per configuration before they are merged into one
+
+    def __init__(self, max_size=100000, directory=None, flush_size=100000):
+        """
+        Constructor for TokenCache
+        :param max_size: (int) number of texts whose tokens are kept in memory
+        :param directory: (str) directory to store tokens in (created if missing; None to
+            only keep tokens in memory)
+        :param flush_size: (int) number of newly tokenized texts to hold before writing them to disk
+        """
+        self.max_size = max_size
+        self.directory = directory
+        self.flush_size = flush_size
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.num_hits = 0
+        self.num_misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._stores = {}
+
+    def __getstate__(self):
+        """
+        Pickles only the cache's settings (e.g. with a saved model), not its tokens
+        """
+        self.flush()
+        return {'max_size': self.max_size, 'directory': self.directory, 'flush_size': self.flush_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @staticmethod
+    def config_key(config):
+        """
+        :param config: (dict) tokenizer configuration (JSON serializable)
+        :return: (str) hash of the configuration
+        """
+        return hashlib.sha1(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def text_hash(text):
+        """
+        :param text: (str) text
+        :return: (int) 64 bit hash of the text
+        """
+        return int.from_bytes(hashlib.sha1(text.encode('utf-8')).digest()[:8], 'little')
+
+    def get(self, config_key, text):
+        """
+        :param config_key: (str) hash of the tokenizer configuration (see config_key)
+        :param text: (str) text (as passed to the tokenizer)
+        :return: (list[str]) tokens of the text, or None if they aren't cached
+        """
+        return self.tokens(config_key, [text])[0]
+
+    def put(self, config_key, text, tokens):
+        """
+        Adds the tokens of a text to the cache
+        :param config_key: (str) hash of the tokenizer configuration (see config_key)
+        :param text: (str) text (as passed to the tokenizer)
+        :param tokens: (list[str]) tokens of the text
+        """
+        self._add(config_key, self.text_hash(text), tokens)
+        if sum(len(pending) for pending in self._pending.values()) >= self.flush_size:
+            self.flush()
+
+    def tokens(self, config_key, texts):
+        """
+        Looks up the tokens of texts, in memory and then on disk
+        :param config_key: (str) hash of the tokenizer configuration (see config_key)
+        :param texts: (list[str]) texts (as passed to the tokenizer)
+        :return: (list) tokens of each text (None for texts that aren't cached)
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        results = [None] * len(texts)
+        missing = []
+        pending = self._pending.get(config_key, {})
+        for i, text_hash in enumerate(hashes):
+            key = (config_key, text_hash)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                results[i] = self._entries[key]
+            elif text_hash in pending:
+                results[i] = pending[text_hash]
+                self._remember(key, results[i])
+            else:
+                missing.append(i)
+        if missing and self.directory:
+            found = self._store(config_key).lookup([hashes[i] for i in missing])
+            for i, tokens in zip(missing, found):
+                if tokens is not None:
+                    results[i] = tokens
+                    self._remember((config_key, hashes[i]), tokens)
+        num_missing = results.count(None)
+        self.num_hits += len(texts) - num_missing
+        self.num_misses += num_missing
+        return results
+
+    def tokenize(self, config_key, texts, tokenize_texts):
+        """
+        Gets the tokens of texts, tokenizing only the texts that aren't cached (each unique
+        text once) and caching their tokens
+        :param config_key: (str) hash of the tokenizer configuration (see config_key)
+        :param texts: (iterable[str]) texts (as passed to the tokenizer)
+        :param tokenize_texts: (callable) tokenizes a list of texts into a list of tokens per text
+        :return: (list[list[str]]) tokens of each text
+        """
+        texts = list(texts)
+        results = self.tokens(config_key, texts)
+        missing = {}
+        for i, tokens in enumerate(results):
+            if tokens is None:
+                missing.setdefault(texts[i], []).append(i)
+        if missing:
+            for text, tokens in zip(missing, tokenize_texts(list(missing))):
+                self._add(config_key, self.text_hash(text), tokens)
+                for i in missing[text]:
+                    results[i] = tokens
+            self.flush()
+        return results
+
+    def flush(self):
+        """
+        Writes newly tokenized texts to disk (if there is a directory)
+        """
+        if not self.directory:
+            self._pending = {}
+            return
+        for config_key, pending in self._pending.items():
+            if pending:
+                self._store(config_key).write(pending)
+        self._pending = {}
+
+    def clear(self):
+        """
+        Removes every text's tokens from memory (tokens on disk are kept)
+        """
+        self.flush()
+        self._entries.clear()
+
+    def print_stats(self):
+        """
+        Prints the number of cache hits and misses
+        """
+        total = self.num_hits + self.num_misses
+        print('Token cache: %d hit(s), %d miss(es) (%.1f%% hits), %d text(s) in memory' % (
+            self.num_hits, self.num_misses, 100 * self.num_hits / total if total else 0, len(self._entries)))
+
+    def _add(self, config_key, text_hash, tokens):
+        """
+        Adds newly tokenized text's tokens to memory (and to what will be written to disk)
+        """
+        self._remember((config_key, text_hash), tokens)
+        if self.directory:
+            self._pending.setdefault(config_key, {})[text_hash] = tokens
+
+    def _remember(self, key, tokens):
+        """
+        Keeps tokens in memory, evicting the least recently used tokens if there are too many
+        """
+        self._entries[key] = tokens
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _store(self, config_key):
+        """
+        :return: (_SegmentStore) tokens stored on disk for a configuration
+        """
+        if config_key not in self._stores:
+            self._stores[config_key] = _SegmentStore(os.path.join(self.directory, config_key), self.max_segments)
+        return self._stores[config_key]
+
+
+class _SegmentStore:
+    """
+    Tokens of one tokenizer configuration stored on disk: a vocabulary file (one token per line)
+    and segments of three memory-mapped arrays each (sorted text hashes, offsets of each text's
+    tokens, and token ids)
+    """
+    def __init__(self, directory, max_segments):
+        self.directory = directory
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+        self.vocab_path = os.path.join(directory, 'vocab.txt')
+        self.index_to_token = []
+        if os.path.exists(self.vocab_path):
+            with open(self.vocab_path, encoding='utf-8') as f:
+                self.index_to_token = f.read().split('\n')[:-1]
+        self.token_to_index = {token: i for i, token in enumerate(self.index_to_token)}
+        names = sorted(int(name.split('.')[0]) for name in os.listdir(directory) if name.endswith('.hashes.npy'))
+        self.segments = [self._load_segment(name) for name in names]
+        self.next_name = names[-1] + 1 if names else 0
+
+    def lookup(self, hashes):
+        """
+        :param hashes: (list[int]) text hashes
+        :return: (list) tokens of each text (None for texts that aren't stored)
+        """
+        hashes = np.array(hashes, dtype=np.uint64)
+        results = [None] * len(hashes)
+        for segment_hashes, offsets, token_ids in reversed(self.segments):
+            positions = np.searchsorted(segment_hashes, hashes).clip(max=len(segment_hashes) - 1)
+            found = segment_hashes[positions] == hashes
+            for i in np.flatnonzero(found):
+                if results[i] is None:
+                    position = positions[i]
+                    ids = token_ids[offsets[position]:offsets[position + 1]]
+                    results[i] = [self.index_to_token[token_id] for token_id in ids.tolist()]
+        return results
+
+    def write(self, entries):
+        """
+        Writes tokens to a new segment (merging segments if there are too many)
+        :param entries: (dict[int, list[str]]) tokens by text hash
+        """
+        new_tokens = []
+        for tokens in entries.values():
+            for token in tokens:
+                if token not in self.token_to_index:
+                    self.token_to_index[token] = len(self.index_to_token)
+                    self.index_to_token.append(token)
+                    new_tokens.append(token)
+        if new_tokens:
+            with open(self.vocab_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(token + '\n' for token in new_tokens))
+
+        hashes = np.fromiter(entries.keys(), dtype=np.uint64, count=len(entries))
+        order = np.argsort(hashes)
+        token_lists = list(entries.values())
+        lengths = np.array([len(token_lists[i]) for i in order], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        token_ids = np.fromiter((self.token_to_index[token] for i in order for token in token_lists[i]),
+                                dtype=np.int32, count=int(offsets[-1]))
+        self._write_segment(hashes[order], offsets, token_ids)
+        if len(self.segments) > self.max_segments:
+            self._merge_segments()
+
+    def _merge_segments(self):
+        """
+        Merges every segment into one (where a text is in several, its newest tokens are kept)
+        """
+        entries = {}
+        for segment_hashes, offsets, token_ids in self.segments:
+            for i, text_hash in enumerate(segment_hashes.tolist()):
+                entries[text_hash] = token_ids[offsets[i]:offsets[i + 1]]
+        old_names = list(range(self.next_name))
+        hashes = np.fromiter(entries.keys(), dtype=np.uint64, count=len(entries))
+        order = np.argsort(hashes)
+        id_lists = list(entries.values())
+        offsets = np.concatenate([[0], np.cumsum([len(id_lists[i]) for i in order])]).astype(np.int64)
+        token_ids = np.concatenate([id_lists[i] for i in order] + [np.zeros(0, dtype=np.int32)]).astype(np.int32)
+        self.segments = []
+        self._write_segment(hashes[order], offsets, token_ids)
+        for name in old_names:
+            for array in ('hashes', 'offsets', 'tokens'):
+                path = self._segment_path(name, array)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _write_segment(self, hashes, offsets, token_ids):
+        """
+        Writes a segment's arrays (hashes last, so only completely written segments are loaded)
+        """
+        name = self.next_name
+        self.next_name += 1
+        for array, values in (('offsets', offsets), ('tokens', token_ids), ('hashes', hashes)):
+            path = self._segment_path(name, array)
+            np.save(path + '.tmp.npy', values)
+            os.replace(path + '.tmp.npy', path)
+        self.segments.append(self._load_segment(name))
+
+    def _load_segment(self, name):
+        return tuple(np.load(self._segment_path(name, array), mmap_mode='r')
+                     for array in ('hashes', 'offsets', 'tokens'))
+
+    def _segment_path(self, name, array):
+        return os.path.join(self.directory, '%d.%s.npy' % (name, array))
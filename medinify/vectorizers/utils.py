@@ -1,48 +1,113 @@
 
 import os
 import numpy as np
+from gensim.models import KeyedVectors
+from medinify import paths
+
+
+CONVERTED_SUFFIX = '.kv'  # suffix of embeddings files converted by convert_embeddings
+
+_loaded_embeddings = {}
+_word_indices = {}
 
 
 def find_embeddings():
     """
     Searches of pretrained embeddings file in medinify/data/embeddings folder
+    (see paths.find_directory)
+    An embeddings file converted by convert_embeddings is found instead of the file it was converted from
     :return: abspath (str) absolute path to embeddings file or None if not found
     """
-    abspath = None
-    for file in os.walk(os.getcwd()):
-        if os.path.isdir(file[0]) and file[0][-24:] == 'medinify/data/embeddings':
-            directory_path = file[0]
-            embeddings_files = os.listdir(directory_path)
-            if not embeddings_files:
-                raise FileNotFoundError(
-                    'No word embeddings found at data/embeddings.')
-            elif len(embeddings_files) > 1:
-                print('Multiple embedding files found.\n'
-                      'Please specify which file to use (enter file name):')
-                while True:
-                    for filename in embeddings_files:
-                        print('\t%s' % filename)
-                    chosen_file = input()
-                    if chosen_file in embeddings_files:
-                        embeddings_file = chosen_file
-                        break
-                    else:
-                        print('Invalid file entered. '
-                              'Please specify which file to use (enter file name):')
+    directory_path = paths.find_directory('embeddings')
+    if not directory_path:
+        return None
+    embeddings_files = [filename for filename in os.listdir(directory_path) if not filename.endswith('.npy')]
+    embeddings_files = [filename for filename in embeddings_files
+                        if filename + CONVERTED_SUFFIX not in embeddings_files]
+    if not embeddings_files:
+        raise FileNotFoundError(
+            'No word embeddings found at data/embeddings.')
+    elif len(embeddings_files) > 1:
+        print('Multiple embedding files found.\n'
+              'Please specify which file to use (enter file name):')
+        while True:
+            for filename in embeddings_files:
+                print('\t%s' % filename)
+            chosen_file = input()
+            if chosen_file in embeddings_files:
+                embeddings_file = chosen_file
+                break
             else:
-                embeddings_file = embeddings_files[0]
-            abspath = directory_path + '/' + embeddings_file
-    return abspath
+                print('Invalid file entered. '
+                      'Please specify which file to use (enter file name):')
+    else:
+        embeddings_file = embeddings_files[0]
+    return os.path.join(directory_path, embeddings_file)
+
+
+def convert_embeddings(embeddings_file=None, output_file=None, binary=False):
+    """
+    Converts word2vec format embeddings to gensim's native format (vectors in a .npy file),
+    which load_embeddings memory-maps instead of parsing, so only needs to be done once
+    :param embeddings_file: (str) path to word2vec format embeddings (found with find_embeddings by default)
+    :param output_file: (str) path to write converted embeddings to (embeddings_file + '.kv' by
+        default, which find_embeddings and load_embeddings then use instead of embeddings_file)
+    :param binary: (boolean) whether embeddings_file is in binary word2vec format
+    :return: (str) path to converted embeddings
+    """
+    embeddings_file = embeddings_file or find_embeddings()
+    if not embeddings_file:
+        raise FileNotFoundError('No word embeddings found at data/embeddings.')
+    output_file = output_file or embeddings_file + CONVERTED_SUFFIX
+    w2v = KeyedVectors.load_word2vec_format(embeddings_file, binary=binary)
+    w2v.save(output_file)
+    print('Converted %s to %s.' % (embeddings_file, output_file))
+    return output_file
+
+
+def load_embeddings(embeddings_file=None):
+    """
+    Loads pretrained embeddings (each file is only loaded once per process)
+    Embeddings converted by convert_embeddings are memory-mapped (read-only), so loading takes
+    milliseconds and every process using them shares one copy in the page cache; other files
+    are parsed as word2vec text format (see convert_embeddings)
+    :param embeddings_file: (str) path to embeddings (found with find_embeddings by default)
+    :return: (gensim.models.KeyedVectors) embeddings
+    """
+    embeddings_file = embeddings_file or find_embeddings()
+    if not embeddings_file:
+        raise FileNotFoundError('No word embeddings found at data/embeddings.')
+    if not embeddings_file.endswith(CONVERTED_SUFFIX) and os.path.exists(embeddings_file + CONVERTED_SUFFIX):
+        embeddings_file += CONVERTED_SUFFIX
+    if embeddings_file not in _loaded_embeddings:
+        if embeddings_file.endswith(CONVERTED_SUFFIX):
+            _loaded_embeddings[embeddings_file] = KeyedVectors.load(embeddings_file, mmap='r')
+        else:
+            _loaded_embeddings[embeddings_file] = KeyedVectors.load_word2vec_format(embeddings_file)
+    return _loaded_embeddings[embeddings_file]
+
+
+def get_word_index(w2v):
+    """
+    Gets the index of each word in an embeddings vocab (built once per loaded embeddings, and
+    shared by every vectorizer that uses them)
+    :param w2v: (gensim.models.KeyedVectors) embeddings
+    :return: (dict[str, int]) index of each word in w2v.index2word
+    """
+    embeddings, word_index = _word_indices.get(id(w2v), (None, None))
+    if embeddings is not w2v:
+        word_index = {word: i for i, word in enumerate(w2v.index2word)}
+        _word_indices[id(w2v)] = (w2v, word_index)
+    return word_index
 
 
 def get_lookup_table(w2v):
     """
     :return lookup_table: (np.array) word embedding lookup table
+        (row 0 is for unknown words, row i + 1 is w2v.index2word[i]'s embedding)
     """
-    index_to_word = w2v.index2word
-    lookup_table = np.zeros((len(index_to_word) + 1, w2v.vector_size))
-    for i, word in enumerate(index_to_word):
-        lookup_table[i + 1] = w2v[word]
+    lookup_table = np.zeros((len(w2v.index2word) + 1, w2v.vector_size))
+    lookup_table[1:] = w2v.vectors
     return lookup_table
 
 
@@ -7,6 +7,7 @@ in a particular format, Vectorizers are designed to be independent of classifier
 """
 import spacy
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 
 
 class Vectorizer(ABC):
@@ -15,13 +16,28 @@ class Vectorizer(ABC):
     for the functionality of all Vectorizers
     """
     nickname = None  # how particular Vectorizer will be searched for via keyword arguments
+    precomputable = False  # whether features don't depend on what the Vectorizer was fit to
+    pipeline_components = ()  # spacy pipeline components tokenizing needs (the rest are disabled)
+    batch_size = 1000
+    n_process = 1
+    token_cache = None
+    _token_cache = None
+    _token_cache_key = None
 
-    def __init__(self):
+    def __init__(self, batch_size=1000, n_process=1, token_cache=None):
         """
         Standard constructor for all Vectorizers
         :attribute nlp:    spacy model, used for tokenizing
         :attribute stops: stop words to remove
+        :attribute batch_size: (int) number of texts spacy processes at once (see tokenize_texts)
+        :attribute n_process: (int) number of processes spacy tokenizes with (see tokenize_texts;
+            more than one needs spacy 2.2.2 or later)
+        :attribute token_cache: (TokenCache or None) cache of tokenized texts (can be shared
+            with other Vectorizers; see tokenizer_config)
         """
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.token_cache = token_cache
         self.nlp = spacy.load('en_core_web_sm')
         with open('./data/english') as sw:
             self.stops = set(sw.read().splitlines())
@@ -35,6 +51,27 @@ class Vectorizer(ABC):
         """
         pass
 
+    def vectorize(self, dataset):
+        """
+        Gets features for a dataset, using features precomputed for it if the Vectorizer's
+        features can be precomputed (see Dataset.features; e.g. shared by cross validation folds)
+        :param dataset: (Dataset or DatasetView) dataset containing data to be Vectorized
+        :return: numeric representation of texts (type varies)
+        """
+        if self.precomputable:
+            features = dataset.cached_features(self.nickname)
+            if features is not None:
+                return features
+        return self.get_features(dataset)
+
+    def fit_stream(self, datasets):
+        """
+        Fits the Vectorizer to a dataset too large to load at once, before it is vectorized
+        chunk by chunk (Vectorizers that need no fitting do nothing)
+        :param datasets: (StreamingDataset) chunks of data to fit to
+        """
+        pass
+
     @staticmethod
     def get_labels(dataset):
         """
@@ -42,18 +79,113 @@ class Vectorizer(ABC):
         :param dataset: (Dataset) dataset containing data to be Vectorized
         :return: (pd.Series) numeric representation of labels
         """
-        return dataset.data_table['label']
+        return dataset.labels()
 
     def tokenize(self, text):
         """
         Lower-cases, removes stopwords, and tokenizes instance of text
+        (texts tokenized in a batch by batch_tokenized are looked up instead of tokenized again)
         :param text: (str) instance of text from Dataset
         :return: (list) tokens
         """
-        tokens = [token.orth_ for token in self.nlp.tokenizer(text.lower())
-                  if token.orth_ not in self.stops and not token.is_punct | token.is_space]
+        text = text.lower()
+        if self._token_cache is not None and text in self._token_cache:
+            return self._token_cache[text]
+        if self.token_cache is None:
+            return self._doc_tokens(self._doc(text))
+        config_key = self.token_cache_key()
+        tokens = self.token_cache.get(config_key, text)
+        if tokens is None:
+            tokens = self._doc_tokens(self._doc(text))
+            self.token_cache.put(config_key, text, tokens)
         return tokens
 
+    def tokenize_texts(self, texts):
+        """
+        Lower-cases, removes stopwords, and tokenizes many texts at once, with spacy's nlp.pipe
+        (batch_size texts at a time, in n_process processes, and without running the pipeline
+        components tokenizing doesn't need)
+        Texts already in token_cache aren't tokenized again
+        :param texts: (iterable[str]) texts from Dataset
+        :return: (list[list[str]]) tokens of each text
+        """
+        texts = [text.lower() for text in texts]
+        if self.token_cache is None:
+            return self._pipe_tokens(texts)
+        return self.token_cache.tokenize(self.token_cache_key(), texts, self._pipe_tokens)
+
+    def token_cache_key(self):
+        """
+        Hashes tokenizer_config for token_cache (once per Vectorizer, since hashing the stop
+        words for every text tokenized would be slow; change the configuration before tokenizing)
+        :return: (str) hash of the tokenizer configuration
+        """
+        if self._token_cache_key is None:
+            self._token_cache_key = self.token_cache.config_key(self.tokenizer_config())
+        return self._token_cache_key
+
+    def tokenizer_config(self):
+        """
+        Describes how the Vectorizer tokenizes (texts tokenized with the same configuration
+        share tokens in a TokenCache)
+        :return: (dict) spacy version and model, stop words, and pipeline components used
+        """
+        return {
+            'spacy': spacy.__version__,
+            'model': '%s_%s-%s' % (self.nlp.meta.get('lang'), self.nlp.meta.get('name'), self.nlp.meta.get('version')),
+            'stops': sorted(self.stops),
+            'pipeline_components': list(self.pipeline_components),
+        }
+
+    def _pipe_tokens(self, texts):
+        """
+        :param texts: (list[str]) lower-cased texts
+        :return: (list[list[str]]) tokens of each text, tokenized with nlp.pipe
+        """
+        pipe_kwargs = {'batch_size': self.batch_size, 'disable': self._disabled_components()}
+        if self.n_process > 1:
+            # n_process was added to nlp.pipe in spacy 2.2.2 (setup.py pins 2.2.0)
+            pipe_kwargs['n_process'] = self.n_process
+        docs = self.nlp.pipe(texts, **pipe_kwargs)
+        return [self._doc_tokens(doc) for doc in docs]
+
+    @contextmanager
+    def batch_tokenized(self, texts):
+        """
+        Tokenizes texts in a batch (see tokenize_texts), so that tokenize (e.g. when called
+        by a CountVectorizer for each text) looks their tokens up while the context is open
+        :param texts: (iterable[str]) texts from Dataset
+        """
+        texts = list(texts)
+        self._token_cache = dict(zip([text.lower() for text in texts], self.tokenize_texts(texts)))
+        try:
+            yield
+        finally:
+            self._token_cache = None
+
+    def _doc(self, text):
+        """
+        :param text: (str) lower-cased text
+        :return: (spacy.tokens.Doc) text processed by the pipeline components tokenizing needs
+        """
+        if not self.pipeline_components:
+            return self.nlp.tokenizer(text)
+        return self.nlp(text, disable=self._disabled_components())
+
+    def _doc_tokens(self, doc):
+        """
+        :param doc: (spacy.tokens.Doc) processed text
+        :return: (list[str]) tokens, without stopwords, punctuation, and whitespace
+        """
+        return [token.orth_ for token in doc
+                if token.orth_ not in self.stops and not token.is_punct | token.is_space]
+
+    def _disabled_components(self):
+        """
+        :return: (list[str]) names of the spacy pipeline components tokenizing doesn't need
+        """
+        return [name for name in self.nlp.pipe_names if name not in self.pipeline_components]
+
 
 
 
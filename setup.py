@@ -19,6 +19,10 @@ setuptools.setup(
         'torchtext==0.4.0',
         'pytest==4.3.0',
     ],
+    extras_require={
+        'lxml': ['lxml==4.4.1'],
+        'parquet': ['pyarrow==0.15.1'],
+    },
     author="Example Author",
     author_email="author@example.com",
     description="For classifying medical text.",
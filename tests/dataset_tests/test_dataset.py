@@ -1,6 +1,100 @@
 
+import numpy as np
+import pandas as pd
 import pytest
-from medinify.datasets import Dataset
+from medinify.datasets import Dataset, Deduplicator, read_table, write_table
 
-# TODO write tests for dataset.py
 
+@pytest.mark.parametrize('extension', ['.csv', '.parquet', '.feather'])
+def test_read_write_table(tmp_path, extension):
+    """
+    Tests that tables are written and read back in the format given by the file extension,
+    and that only the requested columns are loaded
+    """
+    if extension != '.csv':
+        pytest.importorskip('pyarrow')
+    table = pd.DataFrame({'text': ['Review 1', 'Review 2, "quoted"'], 'label': [0, 1], 'drug': ['A', 'B']},
+                         index=[3, 7])
+    path = str(tmp_path / ('reviews' + extension))
+    write_table(table, path)
+    assert read_table(path).equals(table.reset_index(drop=True))
+    assert list(read_table(path, columns=['text', 'label']).columns) == ['text', 'label']
+
+
+def test_deduplicator():
+    """
+    Tests that texts differing only in case, spacing, or punctuation, or in a word or two,
+    are removed as duplicates across batches, and different texts are kept
+    """
+    spam = 'No script needed, order now with 10% discount. WhatsApp only: +1(252)4601212, Wickr or Kik'
+    texts = [spam, 'This drug helped my anxiety a lot, but it made me very tired in the mornings',
+             spam.upper().replace(' ', '  '), None]
+    later_texts = [spam + ' Thanks', 'I had headaches and nausea for the first two weeks']
+    deduplicator = Deduplicator()
+    assert list(deduplicator.duplicates(texts)) == [False, False, True, False]
+    assert list(deduplicator.duplicates(later_texts)) == [True, False]
+    assert (deduplicator.num_exact, deduplicator.num_near) == (1, 1)
+    assert [cluster[0] for cluster in deduplicator.clusters.values()] == [2]
+
+
+def test_deduplicator_checks_every_candidate():
+    """
+    Tests that a near-duplicate is found when an earlier, dissimilar text was stored first
+    under the only band key it shares with it
+    """
+    deduplicator = Deduplicator(threshold=0.7, num_perm=32, bands=8)
+    signature = np.arange(32, dtype=np.uint32)
+    # shares the first band (4 values) and nothing else
+    dissimilar = np.concatenate([signature[:4], signature[4:] + 100])
+    # shares the first band, and 3 of the 4 values of every other band (25 of 32 values)
+    similar = signature.copy()
+    similar[4::4] += 100
+    for i, earlier in enumerate([dissimilar, similar]):
+        deduplicator._add_signature(earlier, deduplicator._band_keys(earlier[np.newaxis])[0], b'text %d' % i)
+    keys = deduplicator._band_keys(signature[np.newaxis])[0]
+    assert deduplicator._find_near_duplicate(signature, keys) == b'text 1'
+
+
+def test_remove_near_duplicates():
+    dataset = Dataset()
+    dataset.data_table = pd.DataFrame({'text': ['Great drug', 'great  drug!', 'Terrible drug'], 'label': [1, 1, 0]})
+    dataset.remove_near_duplicates()
+    assert list(dataset.data_table['text']) == ['Great drug', 'Terrible drug']
+
+
+def test_stats():
+    """
+    Tests that stats count labels, text lengths, and drugs, and add up across tables
+    """
+    dataset = Dataset()
+    dataset.data_table = pd.DataFrame({'text': ['a' * length for length in range(1, 11)],
+                                       'label': [0, 0, 0, 1, 1, 1, 1, 2, 2, 2],
+                                       'drug': ['A'] * 7 + ['B'] * 3})
+    stats = dataset.stats()
+    assert stats.num_texts == 10
+    assert stats.label_counts == {0: 3, 1: 4, 2: 3}
+    assert stats.label_percentages()[1] == 40.0
+    assert stats.length_percentiles([10, 50, 100]) == {10: 1, 50: 5, 100: 10}
+    assert stats.drug_counts == {'A': 7, 'B': 3}
+
+    stats.add(dataset.data_table, 'text', 'label')
+    assert stats.to_dict()['label_counts'] == {0: 6, 1: 8, 2: 6}
+    assert stats.length_percentiles([50]) == {50: 5}
+    dataset.print_stats()
+
+
+def test_dataset_view():
+    """
+    Tests that a view selects rows' texts, labels, and precomputed features without copying the table
+    """
+    dataset = Dataset()
+    dataset.data_table = pd.DataFrame({'text': ['Review %d' % i for i in range(6)], 'label': [0, 1] * 3,
+                                       'drug': ['A'] * 6})
+    dataset.features['embedding'] = np.arange(12).reshape(6, 2)
+    view = dataset.view([1, 3, 4])
+    assert list(view.texts()) == ['Review 1', 'Review 3', 'Review 4']
+    assert list(view.labels()) == [1, 1, 0]
+    assert view.cached_features('embedding').tolist() == [[2, 3], [6, 7], [8, 9]]
+    assert view.cached_features('bow') is None
+    assert view._data_table is None
+    assert list(view.data_table['drug']) == ['A'] * 3
@@ -0,0 +1,51 @@
+import pandas as pd
+from medinify.datasets import ReviewStore, SentimentDataset
+
+
+def scraped_reviews():
+    return [
+        {'comment': 'Helped my anxiety', 'rating': {'effectiveness': 5.0, 'satisfaction': 4.0},
+         'date': '11/1/2019 10:00:00 AM', 'drug': 'Citalopram'},
+        {'comment': 'Made me tired', 'rating': {'effectiveness': 2.0, 'satisfaction': 1.0},
+         'date': '3/1/2019 10:00:00 AM', 'drug': 'Citalopram'},
+        {'comment': 'No change at all', 'rating': {'effectiveness': 3.0, 'satisfaction': 3.0},
+         'date': '5/1/2019 10:00:00 AM', 'drug': 'Sertraline'},
+    ]
+
+
+def test_upsert_and_load(tmp_path):
+    """
+    Tests that reviews are stored once per site, drug, and text, and that load filters them
+    """
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    assert store.upsert(scraped_reviews(), site='webmd') == 3
+    updated = scraped_reviews()[:1]
+    updated[0]['rating'] = {'effectiveness': 4.0, 'satisfaction': 4.0}
+    store.upsert(updated, site='webmd')
+    store.upsert(scraped_reviews()[:1], site='drug')
+    assert store.count() == 4
+
+    citalopram = store.load(drug='Citalopram', site='webmd')
+    assert sorted(citalopram['comment']) == ['Helped my anxiety', 'Made me tired']
+    assert citalopram.loc[citalopram['comment'] == 'Helped my anxiety', 'effectiveness'].iloc[0] == 4.0
+    assert list(store.load(start_date='2019-04-01', end_date='2019-06-30')['comment']) == ['No change at all']
+    assert list(store.load(site='drug')['date']) == ['2019-11-01']
+    store.close()
+
+
+def test_sentiment_dataset_store(tmp_path):
+    """
+    Tests that a dataset's labelled reviews can be written to a store and loaded back
+    """
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    dataset = SentimentDataset(num_classes=3)
+    dataset.data_table = pd.DataFrame(scraped_reviews())
+    dataset.transform_old_dataset()
+    dataset.generate_labels()
+    dataset.write_store(store)
+
+    loaded = SentimentDataset(num_classes=3)
+    loaded.load_store(store, label=[0, 2])
+    assert sorted(loaded.data_table['comment']) == ['Helped my anxiety', 'Made me tired']
+    assert sorted(loaded.data_table['label']) == [0, 2]
+    assert set(loaded.data_table['site']) == {'webmd'}
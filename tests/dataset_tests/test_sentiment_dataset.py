@@ -0,0 +1,234 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from medinify.datasets import SentimentDataset, CheckpointJournal
+from medinify.scrapers import review_key
+
+
+class FixtureScraper:
+    """
+    Stands in for a site scraper, serving fixed reviews for each url
+    (and failing like a dropped connection at fail_url)
+    """
+    def __init__(self, reviews, fail_url=None):
+        self.reviews = reviews
+        self.fail_url = fail_url
+        self.scraped_urls = []
+        self.num_scraped = 0
+
+    def iter_reviews(self, url, seen=None):
+        self.scraped_urls.append(url)
+        if url == self.fail_url:
+            raise ConnectionError(url)
+        for review in self.reviews[url]:
+            if not seen or review_key(review) not in seen:
+                self.num_scraped += 1
+                yield review
+
+
+def fixture_reviews(num_urls, per_url=3):
+    reviews = {}
+    for i in range(num_urls):
+        reviews['url%d' % i] = [{'comment': 'Review %d of url %d, "quoted",\nover two lines' % (j, i),
+                                 'rating': {'effectiveness': float(j % 5 + 1), 'satisfaction': 3.0},
+                                 'date': '1/%d/2019' % (j + 1), 'drug': 'Drug%d' % i} for j in range(per_url)]
+    return reviews
+
+
+def test_collect_from_urls(tmp_path):
+    """
+    Tests that collect_from_urls collects every url's reviews and removes its checkpoint files
+    """
+    checkpoint_file = str(tmp_path / 'temp_file.csv')
+    dataset = SentimentDataset(num_classes=3)
+    dataset.scraper = FixtureScraper(fixture_reviews(4))
+    dataset.collect_from_urls(urls=['url0', 'url1', 'url2', 'url3'], checkpoint_file=checkpoint_file)
+    assert len(dataset.data_table) == 12
+    assert list(dataset.data_table['effectiveness'][:3]) == [1.0, 2.0, 3.0]
+    assert 'label' in dataset.data_table.columns
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_collect_from_urls_resume(tmp_path):
+    """
+    Tests that a stopped collection resumes after the last finished url,
+    without scraping finished urls again or losing their reviews
+    """
+    checkpoint_file = str(tmp_path / 'temp_file.csv')
+    urls = ['url0', 'url1', 'url2', 'url3']
+    reviews = fixture_reviews(4)
+    dataset = SentimentDataset(num_classes=3)
+    dataset.scraper = FixtureScraper(reviews, fail_url='url2')
+    with pytest.raises(ConnectionError):
+        dataset.collect_from_urls(urls=urls, checkpoint_file=checkpoint_file)
+
+    resumed = SentimentDataset(num_classes=3)
+    resumed.scraper = FixtureScraper(reviews)
+    resumed.collect_from_urls(urls=urls, start=2, checkpoint_file=checkpoint_file)
+    assert resumed.scraper.scraped_urls == ['url2', 'url3']
+    assert len(resumed.data_table) == 12
+    assert sorted(resumed.data_table['drug'].unique()) == ['Drug0', 'Drug1', 'Drug2', 'Drug3']
+
+
+def test_checkpoint_journal_drops_unfinished_write(tmp_path):
+    """
+    Tests that reopening a journal cuts off anything written after the last finished url
+    """
+    checkpoint_file = str(tmp_path / 'temp_file.csv')
+    journal = CheckpointJournal(checkpoint_file)
+    journal.append(pd.DataFrame(fixture_reviews(1)['url0']), 0)
+    journal.append(pd.DataFrame(), 1)
+    with open(checkpoint_file, 'a') as f:
+        f.write('"Half written review')
+
+    reopened = CheckpointJournal(checkpoint_file)
+    assert reopened.done == {0, 1}
+    assert reopened.next_url() == 2
+    assert len(reopened.read()) == 3
+
+
+def test_collect_incremental_no_new_reviews():
+    """
+    Tests that recrawling a url without new reviews leaves the dataset unchanged
+    """
+    dataset = SentimentDataset(num_classes=3)
+    dataset.scraper = FixtureScraper(fixture_reviews(1))
+    dataset.collect('url0')
+    assert len(dataset.data_table) == 3
+    dataset.collect('url0', incremental=True)
+    dataset.collect('url0', incremental=True)
+    assert len(dataset.data_table) == 3
+    assert dataset.scraper.num_scraped == 3
+
+
+def test_checkpoint_journal_new_columns(tmp_path):
+    """
+    Tests that reviews missing some of the journal's columns are appended, and that reviews
+    with a column the journal doesn't have are refused instead of losing that column
+    """
+    journal = CheckpointJournal(str(tmp_path / 'temp_file.csv'))
+    reviews = pd.DataFrame(fixture_reviews(1)['url0'])
+    journal.append(reviews, 0)
+    journal.append(reviews.drop(columns=['date']), 1)
+    assert len(journal.read()) == 6
+    with pytest.raises(ValueError):
+        journal.append(reviews.assign(url='url2'), 2)
+    assert journal.done == {0, 1}
+
+
+def test_collect_from_urls_incremental(tmp_path):
+    """
+    Tests that an incremental recrawl only adds reviews that aren't in the dataset yet
+    """
+    checkpoint_file = str(tmp_path / 'temp_file.csv')
+    reviews = fixture_reviews(2)
+    dataset = SentimentDataset(num_classes=3)
+    dataset.scraper = FixtureScraper(reviews)
+    dataset.collect_from_urls(urls=['url0', 'url1'], checkpoint_file=checkpoint_file)
+    assert len(dataset.data_table) == 6
+
+    reviews['url0'].insert(0, {'comment': 'A new review', 'rating': {'effectiveness': 5.0, 'satisfaction': 5.0},
+                               'date': '2/1/2019', 'drug': 'Drug0'})
+    dataset.collect_from_urls(urls=['url0', 'url1'], checkpoint_file=checkpoint_file, incremental=True)
+    assert len(dataset.data_table) == 7
+    assert list(dataset.data_table['comment']).count('A new review') == 1
+
+
+def test_collect_from_urls_incremental_compacted(tmp_path):
+    """
+    Tests that an incremental recrawl recognizes collected reviews after their dates were compacted
+    into datetimes
+    """
+    checkpoint_file = str(tmp_path / 'temp_file.csv')
+    reviews = fixture_reviews(2)
+    dataset = SentimentDataset(num_classes=3)
+    dataset.scraper = FixtureScraper(reviews)
+    dataset.collect_from_urls(urls=['url0', 'url1'], checkpoint_file=checkpoint_file)
+    dataset.compact_data()
+    assert pd.api.types.is_datetime64_any_dtype(dataset.data_table['date'])
+
+    reviews['url0'].insert(0, {'comment': 'A new review', 'rating': {'effectiveness': 5.0, 'satisfaction': 5.0},
+                               'date': '2/1/2019', 'drug': 'Drug0'})
+    dataset.scraper.num_scraped = 0
+    dataset.collect_from_urls(urls=['url0', 'url1'], checkpoint_file=checkpoint_file, incremental=True)
+    assert dataset.scraper.num_scraped == 1
+    assert len(dataset.data_table) == 7
+    assert list(dataset.data_table['comment']).count('A new review') == 1
+
+
+@pytest.mark.parametrize('ratings', [
+    ["{'effectiveness': 5.0, 'satisfaction': 3.0}", "{'effectiveness': 1.0, 'satisfaction': None}"],
+    ["{'effectiveness': 5.0, 'satisfaction': 3.0}", "{'effectiveness': 1.0, 'satisfaction': nan}"],
+    [{'effectiveness': 5.0, 'satisfaction': 3.0}, {'effectiveness': 1.0, 'satisfaction': None}],
+])
+def test_transform_old_dataset(ratings):
+    """
+    Tests that rating dictionaries (or their strings, as read from csv files) are split
+    into one column per rating type
+    """
+    dataset = SentimentDataset(num_classes=3)
+    dataset.data_table = pd.DataFrame({'comment': ['Review 1', 'Review 2'], 'rating': ratings})
+    dataset.transform_old_dataset()
+    assert list(dataset.data_table.columns) == ['comment', 'effectiveness', 'satisfaction']
+    assert list(dataset.data_table['effectiveness']) == [5.0, 1.0]
+    assert dataset.data_table['satisfaction'][0] == 3.0
+    assert pd.isnull(dataset.data_table['satisfaction'][1])
+
+
+@pytest.mark.parametrize('num_classes,thresholds,expected', [
+    (2, {}, [0, 0, None, 1, 1]),
+    (3, {}, [0, 0, 1, 2, 2]),
+    (5, {}, [0, 1, 2, 3, 4]),
+    (2, {'pos_threshold': 5.0, 'neg_threshold': 1.0}, [0, None, None, None, 1]),
+    (3, {'pos_threshold': 3.0, 'neg_threshold': 1.0}, [0, 1, 2, 2, 2]),
+])
+def test_generate_labels(num_classes, thresholds, expected):
+    """
+    Tests that star ratings are turned into sentiment labels for each number of classes and thresholds
+    """
+    dataset = SentimentDataset(num_classes=num_classes, **thresholds)
+    dataset.data_table = pd.DataFrame({'comment': ['Review %d' % i for i in range(1, 6)],
+                                       'effectiveness': [1.0, 2.0, 3.0, 4.0, 5.0]})
+    dataset.generate_labels()
+    assert list(dataset.data_table['label']) == [label for label in expected if label is not None]
+    assert list(dataset.data_table['comment']) == ['Review %d' % i for i, label in enumerate(expected, 1)
+                                                   if label is not None]
+
+
+@pytest.mark.parametrize('num_classes,expected', [(2, [1]), (3, [2, 1]), (5, [4])])
+def test_generate_labels_missing_rating(num_classes, expected):
+    """
+    Tests that a review with a missing rating is labelled neutral for 3 classes, and is left
+    unlabelled otherwise (and dropped for 2 classes)
+    """
+    dataset = SentimentDataset(num_classes=num_classes)
+    ratings = pd.Series([5.0, np.nan])
+    assert list(dataset._ratings_to_labels(ratings).dropna()) == expected
+
+    dataset.data_table = pd.DataFrame({'comment': ['Review 1', 'Review 2'], 'effectiveness': [5.0, np.nan]})
+    dataset.generate_labels()
+    assert list(dataset.data_table['label'].dropna()) == expected
+    assert len(dataset.data_table) == (1 if num_classes == 2 else 2)
+
+
+def test_compact_data(tmp_path):
+    """
+    Tests that loading with compact dtypes keeps the data but uses less memory
+    """
+    reviews = [review for url_reviews in fixture_reviews(20, per_url=10).values() for review in url_reviews]
+    path = str(tmp_path / 'reviews.csv')
+    reviews = pd.DataFrame(reviews)
+    reviews = pd.concat([reviews.drop(columns=['rating']), pd.DataFrame(list(reviews['rating']))], axis=1)
+    reviews.to_csv(path, index=False)
+
+    dataset = SentimentDataset(path, num_classes=5)
+    compacted = SentimentDataset(path, num_classes=5, compact=True)
+    assert str(compacted.data_table['drug'].dtype) == 'category'
+    assert str(compacted.data_table['effectiveness'].dtype) == 'int8'
+    assert str(compacted.data_table['label'].dtype) == 'int8'
+    assert compacted.data_table['date'].iloc[0] == pd.Timestamp('2019-01-01')
+    assert list(compacted.data_table['label']) == list(dataset.data_table['label'])
+    assert list(compacted.data_table['drug']) == list(dataset.data_table['drug'])
+    assert compacted.uncompacted_memory > compacted.data_table.memory_usage(deep=True).sum()
+    compacted.print_stats()
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+from medinify.datasets import Dataset, StreamingDataset, write_table
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.parquet', '.feather'])
+def test_streaming_dataset(tmp_path, extension):
+    """
+    Tests that a streamed file is cleaned like a loaded Dataset, including duplicates
+    that are in different chunks, and that missing texts are counted as empty in every format
+    """
+    if extension != '.csv':
+        pytest.importorskip('pyarrow')
+    texts = ['Review %d' % (i % 7) for i in range(20)] + ['', None, '', None, 'No label']
+    labels = [i % 2 for i in range(20)] + [1, 0, 1, 0, None]
+    path = str(tmp_path / ('reviews' + extension))
+    write_table(pd.DataFrame({'text': texts, 'label': labels}), path)
+
+    dataset = StreamingDataset(path, chunk_size=3)
+    chunks = list(dataset)
+    assert all(len(chunk.data_table) <= 3 for chunk in chunks)
+    streamed = pd.concat([chunk.data_table for chunk in chunks])
+    loaded = Dataset(path).data_table
+    assert list(streamed['text']) == list(loaded['text'])
+    assert list(streamed['label']) == list(loaded['label'])
+    assert (dataset.num_texts, dataset.num_duplicates, dataset.num_empty) == (7, 13, 5)
+    assert len(list(dataset)) == len(chunks)
+    assert dataset.unique_labels() == [0, 1]
+
+
+def test_streaming_dataset_near_duplicates(tmp_path):
+    path = str(tmp_path / 'reviews.csv')
+    texts = ['Review number %d' % i for i in range(5)] + ['REVIEW  number 3!', 'review number 4']
+    pd.DataFrame({'text': texts, 'label': [1] * 7}).to_csv(path, index=False)
+    dataset = StreamingDataset(path, chunk_size=2, near_duplicates=True)
+    assert sum(len(chunk.data_table) for chunk in dataset) == 5
+    assert dataset.deduplicator.num_exact == 2
+
+
+def test_streaming_dataset_stats(tmp_path):
+    path = str(tmp_path / 'reviews.csv')
+    pd.DataFrame({'text': ['Review %d' % i for i in range(25)], 'label': [i % 3 for i in range(25)],
+                  'drug': ['Drug%d' % (i % 4) for i in range(25)]}).to_csv(path, index=False)
+    streamed = StreamingDataset(path, chunk_size=4).stats()
+    loaded = Dataset(path).stats()
+    assert streamed.label_counts == loaded.label_counts
+    assert streamed.drug_counts == loaded.drug_counts
+    assert streamed.length_percentiles() == loaded.length_percentiles()
+
+
+def test_streaming_dataset_parquet_row_groups(tmp_path):
+    """
+    Tests that a Parquet file with several row groups is streamed one row group at a time,
+    in chunks of at most chunk_size rows
+    """
+    pyarrow = pytest.importorskip('pyarrow')
+    from pyarrow import parquet
+    path = str(tmp_path / 'reviews.parquet')
+    table = pd.DataFrame({'text': ['Review %d' % i for i in range(10)], 'label': [i % 2 for i in range(10)]})
+    parquet.write_table(pyarrow.Table.from_pandas(table, preserve_index=False), path, row_group_size=4)
+    chunks = [chunk.data_table for chunk in StreamingDataset(path, chunk_size=3)]
+    assert [len(chunk) for chunk in chunks] == [3, 1, 3, 1, 2]
+    assert list(pd.concat(chunks)['text']) == list(table['text'])
@@ -0,0 +1,123 @@
+"""
+Local HTTP stand-in for the drug review sites, serving saved html fixtures
+(tests/test_data/html) so scraping can be tested without the network
+"""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import pytest
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'test_data', 'html')
+
+
+def read_fixture(name):
+    """
+    Reads a saved html fixture page
+    :param name: (str) fixture file name
+    :return: (str) html
+    """
+    with open(os.path.join(FIXTURES_DIR, name), 'r') as f:
+        return f.read()
+
+
+class FixtureServer(ThreadingMixIn, HTTPServer):
+    """
+    Threaded HTTP server that serves fixture files for registered paths
+    and records how it was used (requests per path, client connections, peak concurrency)
+    Pages are served with ETags, and conditional requests for unchanged pages get a 304
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FixtureHandler)
+        self.routes = {}
+        self.failures = {}
+        self.delay = 0
+        self.requests = []
+        self.conditional_requests = 0
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+    def route(self, path, fixture):
+        """
+        Serves a fixture file (or literal html, if fixture is not a file name) at path
+        :param path: (str) request path, including the query string
+        :param fixture: (str) fixture file name or html
+        """
+        if os.path.isfile(os.path.join(FIXTURES_DIR, fixture)):
+            fixture = read_fixture(fixture)
+        self.routes[path] = fixture
+        return self.base_url + path
+
+    def fail(self, path, times, status=503):
+        """
+        Makes the next requests for path fail
+        :param path: (str) request path, including the query string
+        :param times: (int) number of requests that fail before the page is served
+        :param status: (int) error status returned
+        """
+        self.failures[path] = [status] * times
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for FixtureServer (HTTP/1.1, so clients can keep connections alive)
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.conditional_requests += 'If-None-Match' in self.headers
+            server.client_ports.add(self.client_address[1])
+            failures = server.failures.get(self.path)
+            error_status = failures.pop() if failures else None
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            body = server.routes.get(self.path)
+            status = 200 if body is not None else 404
+            if error_status:
+                body, status = None, error_status
+            body = (body or '<html><head><title>Error %d</title></head></html>' % status).encode('utf-8')
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if status == 200 and self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if status in (200, 304):
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server():
+    """
+    Starts a FixtureServer on a free local port for the duration of a test
+    """
+    server = FixtureServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,89 @@
+from medinify.scrapers import CrawlScheduler, RateLimiter, create_scraper
+from medinify.scrapers import WebMDScraper, EverydayHealthScraper
+
+SITE_PAGES = {
+    'webmd': ('/webmd?drugid=%d', {
+        '/webmd?drugid=%d&pageIndex=0&sortby=3&conditionFilter=-1': 'webmd_page0.html',
+        '/webmd?drugid=%d&pageIndex=1&sortby=3&conditionFilter=-1': 'webmd_page1.html',
+        '/webmd?drugid=%d&pageIndex=2&sortby=3&conditionFilter=-1': 'webmd_page2.html'}, 12),
+    'drug': ('/drugs/%d/', {
+        '/drugs/%d/?page=1': 'drugs_page1.html',
+        '/drugs/%d/?page=2': 'drugs_page2.html'}, 5),
+    'everydayhealth': ('/everydayhealth/%d/reviews', {
+        '/everydayhealth/%d/reviews/1': 'everydayhealth_page1.html',
+        '/everydayhealth/%d/reviews/2': 'everydayhealth_page2.html'}, 5),
+    'drugratingz': ('/drugratingz/%d/', {
+        '/drugratingz/%d/': 'drugratingz_page.html'}, 3),
+}
+
+
+def route_drugs(fixture_server, site, num_drugs):
+    """
+    Serves the review pages of num_drugs drugs from a site
+    :return: (list[tuple(str, str)]) crawl jobs for the drugs
+    """
+    url_path, pages, _ = SITE_PAGES[site]
+    for drug in range(num_drugs):
+        for path, fixture in pages.items():
+            fixture_server.route(path % drug, fixture)
+    return [(site, fixture_server.base_url + url_path % drug) for drug in range(num_drugs)]
+
+
+def test_crawl_all_sites(fixture_server):
+    """
+    Tests that crawling drugs from every site collects all of each drug's reviews
+    """
+    jobs = []
+    for site in SITE_PAGES:
+        jobs += route_drugs(fixture_server, site, 3)
+    scheduler = CrawlScheduler(max_drugs_per_site=2, scraper_options={'max_in_flight': 2})
+    results = dict(scheduler.crawl(jobs))
+    assert sorted(results) == list(range(len(jobs)))
+    for index, (site, _) in enumerate(jobs):
+        assert len(results[index]) == SITE_PAGES[site][2]
+
+
+def test_crawl_per_site_cap(fixture_server):
+    """
+    Tests that no more than the site's cap of drugs are scraped at once from a site
+    """
+    fixture_server.delay = 0.05
+    jobs = route_drugs(fixture_server, 'drugratingz', 6)
+    scheduler = CrawlScheduler(max_drugs_per_site=2)
+    assert len(list(scheduler.crawl(jobs))) == 6
+    assert fixture_server.max_in_flight == 2
+
+
+def test_crawl_sites_concurrently(fixture_server):
+    """
+    Tests that different sites are crawled at the same time, each up to its own cap
+    """
+    fixture_server.delay = 0.05
+    jobs = route_drugs(fixture_server, 'drugratingz', 4) + route_drugs(fixture_server, 'webmd', 1)
+    scheduler = CrawlScheduler(max_drugs_per_site={'drugratingz': 2, 'webmd': 1},
+                               scraper_options={'max_in_flight': 1})
+    assert len(list(scheduler.crawl(jobs))) == 5
+    assert fixture_server.max_in_flight == 3
+
+
+def test_crawl_skips_finished_drugs(fixture_server):
+    """
+    Tests that resuming a crawl only scrapes drugs that aren't done
+    """
+    jobs = route_drugs(fixture_server, 'drugratingz', 4)
+    scheduler = CrawlScheduler()
+    assert sorted(index for index, _ in scheduler.crawl(jobs, skip={0, 2})) == [1, 3]
+    assert sorted(fixture_server.requests) == ['/drugratingz/1/', '/drugratingz/3/']
+
+
+def test_create_scraper():
+    """
+    Tests that create_scraper only asks for user ids from scrapers that collect them
+    and passes on a shared rate limiter
+    """
+    rate_limiter = RateLimiter(2)
+    scraper = create_scraper('webmd', collect_user_ids=True, rate_limiter=rate_limiter)
+    assert isinstance(scraper, WebMDScraper)
+    assert scraper.collect_user_ids
+    assert scraper.rate_limiter is rate_limiter
+    assert isinstance(create_scraper('everydayhealth', collect_user_ids=True), EverydayHealthScraper)
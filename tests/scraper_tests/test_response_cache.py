@@ -0,0 +1,115 @@
+import os
+import time
+import pytest
+from medinify.scrapers import ResponseCache, WebMDScraper
+
+
+def test_put_and_get(tmp_path):
+    """
+    Tests that a stored page (with its validators) can be read back, and
+    that pages that were never stored aren't found
+    """
+    cache = ResponseCache(str(tmp_path))
+    cache.put('https://www.webmd.com/a', '<p>a</p>', etag='"abc"', last_modified='Mon, 01 Jul 2019 00:00:00 GMT')
+    entry = cache.get('https://www.webmd.com/a')
+    assert entry['body'] == '<p>a</p>'
+    assert entry['etag'] == '"abc"'
+    assert entry['last_modified'] == 'Mon, 01 Jul 2019 00:00:00 GMT'
+    assert cache.get('https://www.webmd.com/b') is None
+
+
+def test_cache_persists(tmp_path):
+    """
+    Tests that cached pages are available to a new cache over the same directory
+    """
+    ResponseCache(str(tmp_path)).put('https://www.webmd.com/a', '<p>a</p>')
+    assert ResponseCache(str(tmp_path)).get('https://www.webmd.com/a')['body'] == '<p>a</p>'
+
+
+def test_lru_eviction(tmp_path):
+    """
+    Tests that when the cache grows past max_size, the least recently used pages are evicted
+    """
+    cache = ResponseCache(str(tmp_path), max_size=3000)
+    body = 'x' * 900
+    for name in ['a', 'b', 'c']:
+        cache.put('https://www.webmd.com/' + name, body)
+        time.sleep(0.01)
+    cache.get('https://www.webmd.com/a')
+    cache.put('https://www.webmd.com/d', body)
+    assert cache.get('https://www.webmd.com/a')
+    assert not cache.get('https://www.webmd.com/b')
+    assert cache.get('https://www.webmd.com/d')
+    sizes = [os.path.getsize(os.path.join(directory, f)) for directory, _, files in os.walk(str(tmp_path))
+             for f in files]
+    assert sum(sizes) <= 3000
+
+
+def test_scraper_revalidates_cached_pages(fixture_server, tmp_path):
+    """
+    Tests that a scraper with a cache stores downloaded pages and afterwards revalidates them
+    with conditional requests, using the cached page when the server says it is unchanged
+    """
+    url = fixture_server.route('/page', '<p>page</p>')
+    scraper = WebMDScraper(cache=ResponseCache(str(tmp_path)))
+    assert scraper.fetch_page(url) == '<p>page</p>'
+    assert fixture_server.conditional_requests == 0
+    assert scraper.fetch_page(url) == '<p>page</p>'
+    assert fixture_server.conditional_requests == 1
+
+
+def test_scraper_keeps_cached_page_on_server_error(fixture_server, tmp_path):
+    """
+    Tests that a cached page is used when revalidating it fails with a server error
+    """
+    url = fixture_server.route('/page', '<p>page</p>')
+    scraper = WebMDScraper(cache=ResponseCache(str(tmp_path)), retries=0)
+    assert scraper.fetch_page(url) == '<p>page</p>'
+    fixture_server.fail('/page', 1)
+    assert scraper.fetch_page(url) == '<p>page</p>'
+    assert len(fixture_server.requests) == 2
+
+
+def test_offline_replay(fixture_server, tmp_path):
+    """
+    Tests that a drug scraped once can be scraped again in offline mode
+    entirely from the cache, without any requests
+    """
+    for i in range(3):
+        fixture_server.route('/webmd?drugid=1&pageIndex=%d&sortby=3&conditionFilter=-1' % i, 'webmd_page%d.html' % i)
+    url = fixture_server.base_url + '/webmd?drugid=1'
+    online = WebMDScraper(cache=ResponseCache(str(tmp_path)))
+    online.scrape(url)
+    num_requests = len(fixture_server.requests)
+
+    offline = WebMDScraper(cache=ResponseCache(str(tmp_path), offline=True))
+    offline.scrape(url)
+    assert len(fixture_server.requests) == num_requests
+    assert offline.reviews == online.reviews
+
+
+def test_offline_cache_miss(tmp_path):
+    """
+    Tests that in offline mode, requesting a page that isn't cached raises a FileNotFoundError
+    """
+    scraper = WebMDScraper(cache=ResponseCache(str(tmp_path), offline=True))
+    with pytest.raises(FileNotFoundError):
+        scraper.fetch_page('https://www.webmd.com/drugs/drugreview-1')
+
+
+def test_offline_replay_missing_page(fixture_server, tmp_path):
+    """
+    Tests that an offline replay skips a page that isn't cached and still collects the other pages
+    """
+    for i in range(3):
+        fixture_server.route('/webmd?drugid=1&pageIndex=%d&sortby=3&conditionFilter=-1' % i, 'webmd_page%d.html' % i)
+    url = fixture_server.base_url + '/webmd?drugid=1'
+    online = WebMDScraper(cache=ResponseCache(str(tmp_path)))
+    online.scrape(url)
+    missing_page = fixture_server.base_url + '/webmd?drugid=1&pageIndex=1&sortby=3&conditionFilter=-1'
+    os.remove(online.cache._path(missing_page))
+
+    offline = WebMDScraper(cache=ResponseCache(str(tmp_path), offline=True))
+    offline.scrape(url)
+    assert len(online.reviews) == 12
+    assert offline.reviews == online.reviews[:5] + online.reviews[10:]
@@ -0,0 +1,407 @@
+import time
+import pytest
+import requests
+from medinify.scrapers import WebMDScraper, DrugsScraper, EverydayHealthScraper, DrugRatingzScraper
+from medinify.scrapers import RateLimiter, create_session, review_key
+from medinify.scrapers import webmd_scraper, drugs_scraper, everydayhealth_scraper
+from medinify.scrapers.utils import lxml_available, parse_lxml
+
+
+def test_fetch_pages_in_order(fixture_server):
+    """
+    Tests that fetch_pages yields every page's html in the same order
+    as the urls, even though pages are downloaded concurrently
+    """
+    fixture_server.delay = 0.02
+    urls = [fixture_server.route('/page/%d' % i, '<p>page %d</p>' % i) for i in range(10)]
+    scraper = WebMDScraper(max_in_flight=4)
+    pages = list(scraper.fetch_pages(urls))
+    assert pages == ['<p>page %d</p>' % i for i in range(10)]
+
+
+def test_fetch_pages_max_in_flight(fixture_server):
+    """
+    Tests that fetch_pages never has more than max_in_flight requests open at once
+    """
+    fixture_server.delay = 0.05
+    urls = [fixture_server.route('/page/%d' % i, '<p>page %d</p>' % i) for i in range(8)]
+    scraper = WebMDScraper(max_in_flight=2)
+    list(scraper.fetch_pages(urls))
+    assert len(fixture_server.requests) == 8
+    assert fixture_server.max_in_flight == 2
+
+
+def test_fetch_pages_stops_early(fixture_server):
+    """
+    Tests that when the consumer stops reading pages, fetch_pages does not go on
+    to download every remaining page
+    """
+    fixture_server.delay = 0.02
+    urls = [fixture_server.route('/page/%d' % i, '<p>page %d</p>' % i) for i in range(40)]
+    scraper = WebMDScraper(max_in_flight=2)
+    pages = scraper.fetch_pages(urls)
+    next(pages)
+    pages.close()
+    assert len(fixture_server.requests) < 40
+
+
+def test_rate_limit(fixture_server):
+    """
+    Tests that requests to one host are spaced out according to requests_per_second
+    """
+    urls = [fixture_server.route('/page/%d' % i, '<p>page %d</p>' % i) for i in range(5)]
+    scraper = WebMDScraper(max_in_flight=5, requests_per_second=20)
+    start = time.monotonic()
+    list(scraper.fetch_pages(urls))
+    assert time.monotonic() - start >= 0.2
+
+
+def test_rate_limiter_hosts_independent():
+    """
+    Tests that the RateLimiter only delays requests to the same host
+    """
+    limiter = RateLimiter(requests_per_second=2)
+    start = time.monotonic()
+    limiter.wait('https://www.webmd.com/drugs/a')
+    limiter.wait('https://www.drugs.com/comments/a')
+    limiter.wait('https://www.everydayhealth.com/drugs/a')
+    assert time.monotonic() - start < 0.25
+    limiter.wait('https://www.webmd.com/drugs/b')
+    assert time.monotonic() - start >= 0.45
+
+
+def test_scrape_pages_page_order(fixture_server):
+    """
+    Tests that scrape_pages collects the reviews of concurrently
+    downloaded pages in page order
+    """
+    fixture_server.delay = 0.02
+    urls = [fixture_server.route('/webmd/%d' % i, 'webmd_page%d.html' % i) for i in range(3)]
+    scraper = WebMDScraper(collect_urls=True, max_in_flight=3)
+    scraper.scrape_pages(urls)
+    assert len(scraper.reviews) == 12
+    assert [review['comment'] for review in scraper.reviews] == [
+        'WebMD review number %d.' % i for i in range(1, 13)]
+    assert scraper.reviews[0]['url'] == urls[0]
+    assert scraper.reviews[-1]['url'] == urls[2]
+
+
+def test_session_reuses_connections(fixture_server):
+    """
+    Tests that pages are downloaded over a handful of kept-alive connections
+    instead of one new connection per page
+    """
+    urls = [fixture_server.route('/page/%d' % i, '<p>page %d</p>' % i) for i in range(20)]
+    scraper = WebMDScraper(max_in_flight=2)
+    list(scraper.fetch_pages(urls))
+    assert len(fixture_server.requests) == 20
+    assert len(fixture_server.client_ports) <= 2
+
+
+def test_fetch_page_retries_server_errors(fixture_server):
+    """
+    Tests that a page that fails with transient 5xx errors is retried until it is served
+    """
+    url = fixture_server.route('/flaky', '<p>finally</p>')
+    fixture_server.fail('/flaky', times=2)
+    scraper = WebMDScraper(retries=3, backoff_factor=0)
+    assert scraper.fetch_page(url) == '<p>finally</p>'
+    assert fixture_server.requests == ['/flaky'] * 3
+
+
+def test_fetch_page_gives_up_after_retries(fixture_server):
+    """
+    Tests that once retries are used up the last error page is returned (rather than
+    raising and ending the crawl), so the page is just skipped as having no reviews
+    """
+    url = fixture_server.route('/down', '<p>never served</p>')
+    fixture_server.fail('/down', times=5)
+    scraper = WebMDScraper(retries=1, backoff_factor=0)
+    assert 'Error 503' in scraper.fetch_page(url)
+    assert len(fixture_server.requests) == 2
+
+
+def test_fetch_page_timeout(fixture_server):
+    """
+    Tests that requests that take longer than the scraper's timeout are abandoned, and that
+    fetch_pages yields such a page as empty instead of ending the crawl
+    """
+    url = fixture_server.route('/slow', '<p>slow</p>')
+    fixture_server.delay = 1
+    scraper = WebMDScraper(retries=0, timeout=0.1)
+    with pytest.raises(requests.exceptions.RequestException):
+        scraper.fetch_page(url)
+    assert list(scraper.fetch_pages([url, url])) == ['', '']
+
+
+def test_fetch_pages_connection_error(fixture_server):
+    """
+    Tests that a page whose connection fails is yielded as empty and the other pages are still downloaded
+    """
+    url = fixture_server.route('/page', '<p>page</p>')
+    scraper = WebMDScraper(retries=1, backoff_factor=0)
+    assert list(scraper.fetch_pages([url, 'http://127.0.0.1:1/down', url])) == ['<p>page</p>', '', '<p>page</p>']
+
+
+def test_scrape_skips_failed_page(fixture_server):
+    """
+    Tests that a review page whose request fails is skipped and the drug's other pages are still scraped
+    """
+    for path, fixture in SITE_FIXTURES[0][2].items():
+        fixture_server.route(path, fixture)
+    url = fixture_server.base_url + SITE_FIXTURES[0][1]
+    scraper = WebMDScraper()
+    scraper.scrape(url)
+    reviews = scraper.reviews
+
+    failed_page = scraper.page_url(url, 1)
+    fetch_page = scraper.fetch_page
+
+    def fail_page(page_url):
+        if page_url == failed_page:
+            raise requests.exceptions.ConnectionError(page_url)
+        return fetch_page(page_url)
+
+    scraper.fetch_page = fail_page
+    scraper.scrape(url)
+    assert scraper.reviews == reviews[:5] + reviews[10:]
+
+
+def test_scrape_front_page_connection_error(fixture_server):
+    """
+    Tests that a drug whose first page can't be downloaded is skipped like an invalid url
+    """
+    scraper = WebMDScraper(retries=0)
+    assert list(scraper.iter_reviews('http://127.0.0.1:1/webmd?drugid=1')) == []
+
+
+def test_backoff_jitter():
+    """
+    Tests that retry backoff grows exponentially and is jittered
+    """
+    retry = create_session(retries=5, backoff_factor=1).get_adapter('https://').max_retries
+    for _ in range(3):
+        retry = retry.increment(method='GET', url='/')
+    backoff_times = {retry.get_backoff_time() for _ in range(20)}
+    assert len(backoff_times) > 1
+    assert all(4 <= backoff <= 8 for backoff in backoff_times)
+
+
+SITE_FIXTURES = [
+    (WebMDScraper, '/webmd?drugid=1', {
+        '/webmd?drugid=1&pageIndex=0&sortby=3&conditionFilter=-1': 'webmd_page0.html',
+        '/webmd?drugid=1&pageIndex=1&sortby=3&conditionFilter=-1': 'webmd_page1.html',
+        '/webmd?drugid=1&pageIndex=2&sortby=3&conditionFilter=-1': 'webmd_page2.html'}, 12),
+    (DrugsScraper, '/drugs/', {
+        '/drugs/?page=1': 'drugs_page1.html',
+        '/drugs/?page=2': 'drugs_page2.html'}, 5),
+    (EverydayHealthScraper, '/everydayhealth/reviews', {
+        '/everydayhealth/reviews/1': 'everydayhealth_page1.html',
+        '/everydayhealth/reviews/2': 'everydayhealth_page2.html'}, 5),
+    (DrugRatingzScraper, '/drugratingz/', {
+        '/drugratingz/': 'drugratingz_page.html'}, 3),
+]
+
+
+@pytest.mark.parametrize('scraper_class,url_path,pages,num_reviews', SITE_FIXTURES)
+def test_scrape_downloads_each_page_once(fixture_server, scraper_class, url_path, pages, num_reviews):
+    """
+    Tests that scrape downloads every review page exactly once (the first page is
+    reused for checking the url, counting pages, and its reviews) and collects all reviews
+    """
+    for path, fixture in pages.items():
+        fixture_server.route(path, fixture)
+    scraper = scraper_class()
+    scraper.scrape(fixture_server.base_url + url_path)
+    assert sorted(fixture_server.requests) == sorted(pages)
+    assert len(scraper.reviews) == num_reviews
+
+
+MAX_PAGES_FIXTURES = [(module, pages) for module, (_, _, pages, _) in zip(
+    [webmd_scraper, drugs_scraper, everydayhealth_scraper], SITE_FIXTURES)]
+
+
+@pytest.mark.parametrize('module,pages', MAX_PAGES_FIXTURES)
+def test_max_pages_from_url(fixture_server, module, pages):
+    """
+    Tests that max_pages still takes the url of a drug's first review page
+    """
+    for path, fixture in pages.items():
+        fixture_server.route(path, fixture)
+    first_page = fixture_server.base_url + sorted(pages)[0]
+    assert module.max_pages(first_page) == len(pages)
+
+
+@pytest.mark.skipif(not lxml_available(), reason='lxml is not installed')
+@pytest.mark.parametrize('scraper_class,url_path,pages,num_reviews', SITE_FIXTURES)
+def test_lxml_parser_matches_beautifulsoup(fixture_server, scraper_class, url_path, pages, num_reviews):
+    """
+    Tests that the lxml and BeautifulSoup parsers collect the same review data
+    """
+    for path, fixture in pages.items():
+        fixture_server.route(path, fixture)
+    options = {'collect_user_ids': True} if scraper_class in (WebMDScraper, DrugsScraper) else {}
+    collected = {}
+    for parser in ['lxml', 'beautifulsoup']:
+        scraper = scraper_class(collect_urls=True, parser=parser, **options)
+        scraper.scrape(fixture_server.base_url + url_path)
+        collected[parser] = scraper.reviews
+    assert len(collected['lxml']) == num_reviews
+    assert collected['lxml'] == collected['beautifulsoup']
+
+
+@pytest.mark.skipif(not lxml_available(), reason='lxml is not installed')
+def test_parse_lxml_encoding_declaration():
+    """
+    Tests that lxml parses pages that declare their encoding (and non-ascii text) instead of dropping them
+    """
+    root = parse_lxml('<?xml version="1.0" encoding="utf-8"?><html><body><p>Caf\u00e9</p></body></html>')
+    assert root.xpath('string(//p)') == 'Caf\u00e9'
+    assert parse_lxml('').tag == 'html'
+
+
+def test_iter_reviews_streams_pages(fixture_server):
+    """
+    Tests that iter_reviews yields the same reviews as scrape, in page order,
+    and only downloads pages as their reviews are consumed
+    """
+    for path, fixture in SITE_FIXTURES[0][2].items():
+        fixture_server.route(path, fixture)
+    scraper = WebMDScraper()
+    reviews = scraper.iter_reviews(fixture_server.base_url + '/webmd?drugid=1')
+    first_review = next(reviews)
+    assert len(fixture_server.requests) == 1
+    assert first_review['comment'] == 'WebMD review number 1.'
+    streamed = [first_review] + list(reviews)
+    assert scraper.reviews == []
+
+    scraper.scrape(fixture_server.base_url + '/webmd?drugid=1')
+    assert streamed == scraper.reviews
+
+
+def test_iter_reviews_invalid_page(fixture_server):
+    """
+    Tests that iter_reviews yields nothing when the url is not a reviews page
+    """
+    scraper = WebMDScraper()
+    assert list(scraper.iter_reviews(fixture_server.base_url + '/webmd?drugid=3')) == []
+
+
+def test_scrape_no_reviews_single_request(fixture_server):
+    """
+    Tests that scraping a drug without reviews only downloads its first page
+    """
+    fixture_server.route('/webmd?drugid=2&pageIndex=0&sortby=3&conditionFilter=-1', 'webmd_no_reviews.html')
+    scraper = WebMDScraper()
+    scraper.scrape(fixture_server.base_url + '/webmd?drugid=2')
+    assert len(fixture_server.requests) == 1
+    assert len(scraper.reviews) == 0
+
+
+def test_scrape_invalid_page(fixture_server):
+    """
+    Tests that scrape returns 0 after one request when the url is not a reviews page
+    """
+    scraper = WebMDScraper()
+    returned = scraper.scrape(fixture_server.base_url + '/webmd?drugid=3')
+    assert returned == 0
+    assert len(fixture_server.requests) == 1
+
+
+def test_get_urls_concurrent_and_cached(fixture_server, tmp_path):
+    """
+    Tests that get_urls searches for names concurrently, writes a not-found report
+    next to the output file, and only searches for new names when given a url cache
+    """
+    fixture_server.delay = 0.05
+    names = ['drug%d' % i for i in range(6)]
+    for name in names[:4]:
+        fixture_server.route('/search/' + name, '<a>%s reviews</a>' % name)
+    names_file = tmp_path / 'names.txt'
+    names_file.write_text('\n'.join(names) + '\n')
+    cache_file = str(tmp_path / 'url_cache.json')
+    output_file = str(tmp_path / 'urls.txt')
+
+    scraper = WebMDScraper(max_in_flight=3)
+    scraper.get_url = lambda name: (fixture_server.base_url + '/reviews/' + name
+                                    if 'reviews' in scraper.fetch_page(fixture_server.base_url + '/search/' + name)
+                                    else None)
+    scraper.get_urls(str(names_file), output_file=output_file, url_cache_file=cache_file)
+    assert len(fixture_server.requests) == 6
+    assert fixture_server.max_in_flight == 3
+    with open(output_file) as f:
+        assert f.read().split() == [fixture_server.base_url + '/reviews/' + name for name in names[:4]]
+    with open(str(tmp_path / 'urls_not_found.txt')) as f:
+        assert f.read().split() == names[4:]
+
+    names_file.write_text('\n'.join(names + ['drug6']) + '\n')
+    urls = scraper.get_urls(str(names_file), url_cache_file=cache_file)
+    assert len(urls) == 4
+    assert fixture_server.requests[6:] == ['/search/drug6']
+
+
+def test_get_urls_failed_searches(tmp_path, capsys):
+    """
+    Tests that names whose search fails (page not cached in offline mode, or unexpected markup)
+    are reported as not found without losing the urls found for other names
+    """
+    names = ['drug0', 'drug1', 'uncached', 'unparsable', 'drug0']
+    names_file = tmp_path / 'names.txt'
+    names_file.write_text('\n'.join(names) + '\n')
+    cache_file = str(tmp_path / 'url_cache.json')
+    output_file = str(tmp_path / 'urls.txt')
+
+    def get_url(name):
+        if name == 'uncached':
+            raise FileNotFoundError('Page not found in cache (offline mode)')
+        if name == 'unparsable':
+            raise AttributeError("'NoneType' object has no attribute 'find'")
+        return 'https://reviews/' + name
+
+    scraper = WebMDScraper(max_in_flight=2)
+    scraper.get_url = get_url
+    scraper.get_urls(str(names_file), output_file=output_file, url_cache_file=cache_file)
+    with open(output_file) as f:
+        assert f.read().split() == ['https://reviews/drug0', 'https://reviews/drug1', 'https://reviews/drug0']
+    with open(str(tmp_path / 'urls_not_found.txt')) as f:
+        assert f.read().split() == ['uncached', 'unparsable']
+
+    capsys.readouterr()
+    scraper.get_urls(str(names_file), url_cache_file=cache_file)
+    assert 'Found cached urls for 2 drug names.' in capsys.readouterr().out
+
+
+def test_iter_reviews_incremental(fixture_server):
+    """
+    Tests that incremental scraping only yields new reviews, and stops downloading
+    pages at the first already collected review on newest-first sites
+    """
+    for path, fixture in SITE_FIXTURES[0][2].items():
+        fixture_server.route(path, fixture)
+    url = fixture_server.base_url + '/webmd?drugid=1'
+    scraper = WebMDScraper()
+    reviews = list(scraper.iter_reviews(url))
+    num_requests = len(fixture_server.requests)
+
+    seen = {review_key(review) for review in reviews[3:]}
+    assert list(scraper.iter_reviews(url, seen=seen)) == reviews[:3]
+    assert len(fixture_server.requests) == num_requests + 1
+
+    seen = {review_key(review) for review in reviews}
+    assert list(scraper.iter_reviews(url, seen=seen)) == []
+
+
+def test_iter_reviews_incremental_unordered_site(fixture_server):
+    """
+    Tests that on sites that don't list reviews newest first, incremental scraping
+    reads every page and skips already collected reviews
+    """
+    for path, fixture in SITE_FIXTURES[2][2].items():
+        fixture_server.route(path, fixture)
+    url = fixture_server.base_url + '/everydayhealth/reviews'
+    scraper = EverydayHealthScraper()
+    reviews = list(scraper.iter_reviews(url))
+
+    seen = {review_key(reviews[0]), review_key(reviews[3])}
+    new_reviews = list(scraper.iter_reviews(url, seen=seen))
+    assert new_reviews == reviews[1:3] + reviews[4:]
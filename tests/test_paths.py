@@ -0,0 +1,82 @@
+"""
+Tests for locating medinify's data directories
+"""
+import os
+import pandas as pd
+import pytest
+from medinify import paths
+from medinify.datasets import Dataset, find_csv
+
+
+@pytest.fixture(autouse=True)
+def clear_paths_cache():
+    paths.clear_cache()
+    yield
+    paths.set_directory('csvs', None)
+
+
+def test_find_directory_from_environment(tmp_path, monkeypatch):
+    """
+    Tests that a directory set in its environment variable is used
+    """
+    monkeypatch.setenv('MEDINIFY_CSVS_DIR', str(tmp_path))
+    (tmp_path / 'reviews.csv').write_text('text,label\nReview,1\n')
+    assert paths.find_directory('csvs') == str(tmp_path)
+    assert find_csv('reviews.csv') == str(tmp_path / 'reviews.csv')
+    assert find_csv('missing.csv') is None
+
+
+def test_find_directory_in_working_directory(tmp_path, monkeypatch):
+    """
+    Tests that medinify/data/csvs is found under the working directory (and remembered)
+    """
+    monkeypatch.delenv('MEDINIFY_CSVS_DIR', raising=False)
+    csvs = tmp_path / 'medinify' / 'data' / 'csvs'
+    csvs.mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    assert paths.find_directory('csvs') == str(csvs)
+    csvs.rmdir()
+    assert paths.find_directory('csvs') == str(csvs)
+    paths.clear_cache()
+    assert paths.find_directory('csvs') != str(csvs)
+
+
+def test_find_csv_from_repository_root(tmp_path, monkeypatch):
+    """
+    Tests that data/csvs at the root of the repository is found, from the root and from elsewhere
+    """
+    monkeypatch.delenv('MEDINIFY_CSVS_DIR', raising=False)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    citalopram = os.path.join(root, 'data', 'csvs', 'citalopram.csv')
+    monkeypatch.chdir(root)
+    assert find_csv('citalopram.csv') == citalopram
+    paths.clear_cache()
+    monkeypatch.chdir(tmp_path)
+    assert find_csv('citalopram.csv') == citalopram
+
+
+def test_write_and_load_file(tmp_path):
+    """
+    Tests that file names are written to (and loaded from) the configured directory,
+    and that paths are used as they are
+    """
+    paths.set_directory('csvs', str(tmp_path))
+    dataset = Dataset()
+    dataset.data_table = pd.DataFrame({'text': ['Review 1', 'Review 2'], 'label': [0, 1]})
+    dataset.write_file('reviews.csv')
+    assert os.path.isfile(str(tmp_path / 'reviews.csv'))
+    assert len(Dataset('reviews.csv').data_table) == 2
+
+    other_path = str(tmp_path / 'other' / 'reviews.csv')
+    os.makedirs(os.path.dirname(other_path))
+    dataset.write_file(other_path)
+    assert len(Dataset(other_path).data_table) == 2
+
+
+def test_output_path_without_directory(tmp_path):
+    """
+    Tests that writing a file name fails when the directory can't be found
+    """
+    paths.set_directory('csvs', str(tmp_path / 'missing'))
+    with pytest.raises(NotADirectoryError):
+        paths.output_path('csvs', 'reviews.csv')
@@ -0,0 +1,93 @@
+"""
+Tests for the cache of tokenized texts shared by Vectorizers
+"""
+import pickle
+import pytest
+
+# importing medinify.vectorizers loads the vectorizers, which need spacy and gensim
+pytest.importorskip('spacy')
+pytest.importorskip('gensim')
+
+from medinify.vectorizers.token_cache import TokenCache  # noqa: E402
+
+
+class SplitTokenizer:
+    """
+    Tokenizes texts on whitespace, counting how many texts it tokenized
+    """
+    def __init__(self):
+        self.num_tokenized = 0
+
+    def __call__(self, texts):
+        self.num_tokenized += len(texts)
+        return [text.split() for text in texts]
+
+
+def test_tokenize_once():
+    """
+    Tests that each unique text is only tokenized once
+    """
+    cache = TokenCache()
+    tokenizer = SplitTokenizer()
+    config_key = cache.config_key({'stops': ['the']})
+    texts = ['great drug', 'made me tired', 'great drug']
+    assert cache.tokenize(config_key, texts, tokenizer) == [['great', 'drug'], ['made', 'me', 'tired'], ['great', 'drug']]
+    assert tokenizer.num_tokenized == 2
+    assert cache.tokenize(config_key, texts, tokenizer) == [['great', 'drug'], ['made', 'me', 'tired'], ['great', 'drug']]
+    assert tokenizer.num_tokenized == 2
+
+
+def test_configs_not_shared():
+    """
+    Tests that tokens cached for one tokenizer configuration aren't used for another
+    """
+    cache = TokenCache()
+    cache.put(cache.config_key({'pos_list': ['NOUN']}), 'great drug', ['great'])
+    assert cache.get(cache.config_key({'pos_list': ['ADJ']}), 'great drug') is None
+    assert cache.get(cache.config_key({'pos_list': ['NOUN']}), 'great drug') == ['great']
+
+
+def test_least_recently_used_evicted():
+    """
+    Tests that the least recently used tokens are evicted from memory
+    """
+    cache = TokenCache(max_size=2)
+    config_key = cache.config_key({})
+    cache.put(config_key, 'a', ['a'])
+    cache.put(config_key, 'b', ['b'])
+    cache.get(config_key, 'a')
+    cache.put(config_key, 'c', ['c'])
+    assert cache.get(config_key, 'b') is None
+    assert cache.get(config_key, 'a') == ['a']
+    assert cache.get(config_key, 'c') == ['c']
+
+
+def test_disk_cache(tmp_path):
+    """
+    Tests that tokens stored on disk are used by a new cache (and survive merging segments)
+    """
+    cache = TokenCache(directory=str(tmp_path))
+    config_key = cache.config_key({})
+    for i in range(TokenCache.max_segments + 2):
+        cache.tokenize(config_key, ['review %d' % i], SplitTokenizer())
+
+    tokenizer = SplitTokenizer()
+    new_cache = TokenCache(directory=str(tmp_path))
+    texts = ['review %d' % i for i in range(TokenCache.max_segments + 2)]
+    assert new_cache.tokenize(config_key, texts, tokenizer) == [text.split() for text in texts]
+    assert tokenizer.num_tokenized == 0
+    assert new_cache.tokenize(config_key, ['new review'], tokenizer) == [['new', 'review']]
+    assert tokenizer.num_tokenized == 1
+
+
+def test_pickle(tmp_path):
+    """
+    Tests that a pickled cache keeps its settings, but not its tokens
+    """
+    cache = TokenCache(max_size=10, directory=str(tmp_path))
+    config_key = cache.config_key({})
+    cache.put(config_key, 'great drug', ['great', 'drug'])
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert unpickled.max_size == 10
+    assert unpickled.directory == str(tmp_path)
+    assert unpickled.get(config_key, 'great drug') == ['great', 'drug']
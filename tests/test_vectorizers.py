@@ -0,0 +1,185 @@
+"""
+Tests for Vectorizers (set up with fake spacy pipelines and embeddings, so no models are loaded)
+"""
+import pickle
+import pytest
+
+pytest.importorskip('spacy')
+pytest.importorskip('gensim')
+
+import numpy as np  # noqa: E402
+from medinify.vectorizers import BowVectorizer, EmbeddingsVectorizer, MatrixVectorizer, TokenCache  # noqa: E402
+
+
+class FakeToken:
+    def __init__(self, text):
+        self.orth_ = text
+        self.is_punct = not text.isalnum()
+        self.is_space = text.isspace()
+
+
+class FakeNlp:
+    """
+    spacy pipeline stand-in whose pipe only takes the arguments spacy 2.2.0 accepts
+    """
+    pipe_names = ['tagger', 'parser', 'ner']
+
+    def __init__(self):
+        self.pipe_calls = []
+
+    def pipe(self, texts, batch_size=1000, disable=()):
+        self.pipe_calls.append({'batch_size': batch_size, 'disable': list(disable)})
+        return [[FakeToken(word) for word in text.split()] for text in texts]
+
+
+def fake_vectorizer(vectorizer_class, **attributes):
+    """
+    Sets up a Vectorizer without loading a spacy model or embeddings
+    """
+    vectorizer = vectorizer_class.__new__(vectorizer_class)
+    vectorizer.nlp = FakeNlp()
+    vectorizer.stops = {'the'}
+    for name, value in attributes.items():
+        setattr(vectorizer, name, value)
+    return vectorizer
+
+
+def test_pipe_tokens_without_n_process():
+    """
+    Tests that texts are tokenized with nlp.pipe without passing n_process (which spacy 2.2.0's
+    pipe doesn't take) and without the pipeline components tokenizing doesn't need
+    """
+    vectorizer = fake_vectorizer(BowVectorizer, batch_size=2)
+    assert vectorizer._pipe_tokens(['the drug helped !', 'no change']) == [['drug', 'helped'], ['no', 'change']]
+    assert vectorizer.nlp.pipe_calls == [{'batch_size': 2, 'disable': ['tagger', 'parser', 'ner']}]
+    assert vectorizer.tokenize_texts(['The DRUG']) == [['drug']]
+
+
+def test_texts_to_indices():
+    """
+    Tests that tokens are converted to the same indices as a scan of the vocabulary
+    (index of the word + 1, and 0, the padding index, for unknown words)
+    """
+    index_to_word = ['drug', 'helped', 'headache', 'tired']
+    vectorizer = fake_vectorizer(MatrixVectorizer, index_to_word=index_to_word,
+                                 word_to_index={word: i for i, word in enumerate(index_to_word)})
+    texts_tokens = [['drug', 'helped', 'unknown'], [], ['tired', 'headache', 'tired']]
+    scanned = [[index_to_word.index(token) + 1 if token in index_to_word else 0 for token in tokens]
+               for tokens in texts_tokens]
+    indices = vectorizer.texts_to_indices(texts_tokens)
+    assert [text_indices.tolist() for text_indices in indices] == scanned == [[1, 2, 0], [], [4, 3, 4]]
+    assert [vectorizer.tokens_to_indices(tokens).tolist() for tokens in texts_tokens] == scanned
+    assert vectorizer.texts_to_indices([]) == []
+    assert list(vectorizer.indices_to_tokens(np.array([1, 0, 4]))) == ['drug', None, 'tired']
+
+
+class FakeEmbeddings:
+    """
+    Word embeddings stand-in with the parts of gensim's KeyedVectors vectorizers use
+    """
+    def __init__(self):
+        self.index2word = ['drug', 'helped', 'headache']
+        self.vectors = np.array([[1, 0], [0, 2], [4, 4]], dtype=np.float32)
+        self.vector_size = 2
+
+
+TEXTS_TOKENS = [['drug', 'helped', 'drug', 'unknown'], ['headache'], ['unknown'], ['drug', 'headache']]
+
+
+def fake_embeddings_vectorizer(weighting=None):
+    return fake_vectorizer(EmbeddingsVectorizer, w2v=FakeEmbeddings(), weighting=weighting, sif_a=0.1,
+                           word_weights=None)
+
+
+def test_word_index_shared_and_not_pickled():
+    """
+    Tests that vectorizers using the same embeddings share one word index, built when first
+    needed, and that it isn't pickled with a vectorizer (it is rebuilt after unpickling)
+    """
+    w2v = FakeEmbeddings()
+    embeddings_vectorizer = fake_vectorizer(EmbeddingsVectorizer, w2v=w2v, weighting=None, word_weights=None)
+    matrix_vectorizer = fake_vectorizer(MatrixVectorizer, w2v=w2v, index_to_word=w2v.index2word)
+    assert matrix_vectorizer.texts_to_indices([['headache', 'unknown']])[0].tolist() == [3, 0]
+    embeddings_vectorizer.token_counts([['drug']])
+    assert embeddings_vectorizer.word_to_index is matrix_vectorizer.word_to_index
+    assert embeddings_vectorizer.word_to_index == {'drug': 0, 'helped': 1, 'headache': 2}
+
+    for vectorizer in [embeddings_vectorizer, matrix_vectorizer]:
+        vectorizer.nlp = vectorizer.stops = None
+        unpickled = pickle.loads(pickle.dumps(vectorizer))
+        assert unpickled.word_to_index is None
+    assert unpickled.tokens_to_indices(['drug', 'tired']).tolist() == [1, 0]
+
+
+def weighted_averages(w2v, weights):
+    """
+    Averages each text's embeddings one token at a time (the previous implementation, with weights)
+    """
+    averages = np.zeros((len(TEXTS_TOKENS), w2v.vector_size))
+    for i, tokens in enumerate(TEXTS_TOKENS):
+        known = [token for token in tokens if token in w2v.index2word]
+        if known:
+            averages[i] = np.average([w2v.vectors[w2v.index2word.index(token)] for token in known], axis=0,
+                                     weights=[weights[token] for token in known])
+    return averages
+
+
+def test_average_embeddings():
+    """
+    Tests that average embeddings match a per-text average (in float32, with zeros for texts
+    without any tokens that have embeddings)
+    """
+    vectorizer = fake_embeddings_vectorizer()
+    embeddings = vectorizer.average_embeddings(vectorizer.token_counts(TEXTS_TOKENS))
+    assert embeddings.dtype == np.float32
+    assert np.allclose(embeddings, weighted_averages(vectorizer.w2v, {'drug': 1, 'helped': 1, 'headache': 1}))
+    assert np.allclose(embeddings, [[2 / 3, 2 / 3], [4, 4], [0, 0], [2.5, 2]])
+
+
+def test_tfidf_average_embeddings():
+    """
+    Tests that TF-IDF weights are smoothed inverse document frequencies
+    """
+    vectorizer = fake_embeddings_vectorizer('tfidf')
+    counts = vectorizer.token_counts(TEXTS_TOKENS)
+    vectorizer.fit_weights(counts)
+    # 4 texts; drug and headache are in 2, helped in 1
+    weights = {'drug': np.log(5 / 3) + 1, 'helped': np.log(5 / 2) + 1, 'headache': np.log(5 / 3) + 1}
+    assert np.allclose(vectorizer.word_weights, [weights['drug'], weights['helped'], weights['headache']])
+    assert np.allclose(vectorizer.average_embeddings(counts), weighted_averages(vectorizer.w2v, weights))
+
+
+def test_sif_average_embeddings():
+    """
+    Tests that SIF weights are a / (a + word frequency)
+    """
+    vectorizer = fake_embeddings_vectorizer('sif')
+    counts = vectorizer.token_counts(TEXTS_TOKENS)
+    vectorizer.fit_weights(counts)
+    # 6 tokens with embeddings: drug 3 times, helped once, headache twice
+    weights = {'drug': 0.1 / (0.1 + 3 / 6), 'helped': 0.1 / (0.1 + 1 / 6), 'headache': 0.1 / (0.1 + 2 / 6)}
+    assert np.allclose(vectorizer.word_weights, [weights['drug'], weights['helped'], weights['headache']])
+    embeddings = vectorizer.average_embeddings(counts)
+    assert np.allclose(embeddings, weighted_averages(vectorizer.w2v, weights))
+    assert np.allclose(embeddings[2], [0, 0])
+
+
+def test_token_cache_key_computed_once(monkeypatch):
+    """
+    Tests that the tokenizer configuration is only hashed once, not for every text tokenized
+    """
+    vectorizer = fake_vectorizer(BowVectorizer, token_cache=TokenCache(), pipeline_components=())
+    vectorizer.nlp.tokenizer = lambda text: [FakeToken(word) for word in text.split()]
+    vectorizer.tokenizer_config = lambda: {'stops': sorted(vectorizer.stops)}
+    configs = []
+    config_key = TokenCache.config_key
+
+    def counting_config_key(config):
+        configs.append(config)
+        return config_key(config)
+    monkeypatch.setattr(TokenCache, 'config_key', staticmethod(counting_config_key))
+    assert vectorizer.tokenize('The drug') == ['drug']
+    assert vectorizer.tokenize('helped') == ['helped']
+    assert vectorizer.tokenize_texts(['The drug', 'no change']) == [['drug'], ['no', 'change']]
+    assert len(configs) == 1
+    assert vectorizer.token_cache.num_hits == 1